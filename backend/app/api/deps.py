@@ -1,8 +1,16 @@
+from functools import lru_cache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from jose import JWTError, jwt
 from ..core.config import settings
 from ..core.security import verify_token
+from ..services.gmail_cache import gmail_service_cache
+from ..services.gmail_service import GmailService
+from ..services.ai_service import AIService
+from ..services.job_queue import JobQueue, create_job_store
+from ..services.credential_store import get_credential_store
+from ..services.inbox_push import InboxPushHub, create_inbox_push_hub
+from ..services.health import HealthProber, create_health_prober
 
 oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl=f"https://accounts.google.com/o/oauth2/v2/auth",
@@ -19,6 +27,46 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         payload = verify_token(token)
         if payload is None:
             raise credentials_exception
+        if "credentials" not in payload and "cid" in payload:
+            # Issued with AUTH_CREDENTIALS_MODE=server: resolve the opaque id.
+            credentials = get_credential_store().get(payload["cid"])
+            if credentials is None:
+                raise credentials_exception
+            payload["credentials"] = credentials
         return payload
     except JWTError:
-        raise credentials_exception 
\ No newline at end of file
+        raise credentials_exception
+
+def get_gmail_service(current_user = Depends(get_current_user)) -> GmailService:
+    """Reuse the user's cached Gmail client instead of rebuilding it per request.
+
+    Declared sync so FastAPI resolves it in its threadpool: a cache miss
+    builds the discovery client, which must not stall the event loop.
+    """
+    return gmail_service_cache.get(current_user)
+
+@lru_cache
+def get_ai_service() -> AIService:
+    """The single AIService shared by every request for the app's lifetime."""
+    return AIService()
+
+@lru_cache
+def get_job_queue() -> JobQueue:
+    """Worker pool running background process-command jobs."""
+    return JobQueue(
+        store=create_job_store(),
+        workers=settings.JOB_QUEUE_WORKERS,
+        max_depth=settings.JOB_QUEUE_MAX_DEPTH,
+        max_per_user=settings.JOB_QUEUE_MAX_PER_USER,
+        job_timeout=settings.JOB_TIMEOUT_SECONDS
+    )
+
+@lru_cache
+def get_inbox_push_hub() -> InboxPushHub:
+    """Per-process fan-out of Gmail push notifications to connected clients."""
+    return create_inbox_push_hub()
+
+@lru_cache
+def get_health_prober() -> HealthProber:
+    """Background dependency checks; started with the app."""
+    return create_health_prober()
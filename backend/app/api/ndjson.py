@@ -0,0 +1,18 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_response(chunks: AsyncIterator[List[Any]], headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Stream every item of ``chunks`` as one JSON document per line."""
+    async def lines():
+        async for chunk in chunks:
+            yield "".join(json.dumps(item, default=str) + "\n" for item in chunk)
+
+    return StreamingResponse(
+        lines(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"X-Accel-Buffering": "no", **(headers or {})}
+    )
@@ -0,0 +1,22 @@
+import json
+from typing import Any, AsyncIterator, Dict
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Event frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream ``{"event": ..., "data": ...}`` dicts to the client as SSE."""
+    async def frames():
+        async for event in events:
+            yield format_sse(event["event"], event["data"])
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        # Stop proxies such as nginx from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
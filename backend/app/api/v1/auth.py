@@ -5,6 +5,7 @@ from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from ...core.config import settings
 from ...core.security import create_access_token
+from ...services.credential_store import get_credential_store
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -49,19 +50,22 @@ async def auth_callback(code: str, state: str):
         profile = service.users().getProfile(userId="me").execute()
         email = profile.get("emailAddress")
         
-        # Create JWT token with additional user info
-        token_data = {
-            "sub": email,
-            "email": email,
-            "credentials": {
-                "token": credentials.token,
-                "refresh_token": credentials.refresh_token,
-                "token_uri": credentials.token_uri,
-                "client_id": credentials.client_id,
-                "client_secret": credentials.client_secret,
-                "scopes": credentials.scopes
-            }
+        credentials_info = {
+            "token": credentials.token,
+            "refresh_token": credentials.refresh_token,
+            "token_uri": credentials.token_uri,
+            "client_id": credentials.client_id,
+            "client_secret": credentials.client_secret,
+            "scopes": credentials.scopes,
+            "expiry": credentials.expiry.isoformat() if credentials.expiry else None
         }
+
+        # Create JWT token with additional user info
+        token_data = {"sub": email, "email": email}
+        if settings.AUTH_CREDENTIALS_MODE == "server":
+            token_data["cid"] = get_credential_store().put(email, credentials_info)
+        else:
+            token_data["credentials"] = credentials_info
         
         access_token = create_access_token(data=token_data)
         
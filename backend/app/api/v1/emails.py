@@ -1,18 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from typing import List, Optional
-from ...models.email import EmailResponse, EmailCreate, DraftRequest
+import base64
+import binascii
+import io
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from googleapiclient.errors import HttpError, MediaUploadSizeError
+from starlette.background import BackgroundTask
+from typing import List, Literal, Optional
+from ...models.email import EmailResponse, EmailCreate, DraftRequest, BulkSendRequest
+from ...services.attachments import Attachment
 from ...services.gmail_service import GmailService
 from ...services.ai_service import AIService
-from ..deps import get_current_user
-from pydantic import BaseModel, EmailStr, constr
+from ...services.bulk_send import BulkSender
+from ...core.config import settings
+from ..deps import get_current_user, get_gmail_service, get_ai_service
+from ..ndjson import NDJSON_MEDIA_TYPE, ndjson_response
+from ..sse import sse_response
+from pydantic import BaseModel, EmailStr, Field, constr
 from datetime import datetime
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
+# Bare type/subtype (RFC 6838 names): the value goes into a MIME header, so
+# parameters and line breaks are rejected.
+MIME_TYPE_PATTERN = r"^[A-Za-z0-9][A-Za-z0-9!#$&^_.+-]*/[A-Za-z0-9][A-Za-z0-9!#$&^_.+-]*$"
+
+class AttachmentUpload(BaseModel):
+    filename: constr(min_length=1)
+    content_type: constr(pattern=MIME_TYPE_PATTERN) = "application/octet-stream"
+    # Standard base64 of the file.
+    content: str
+
 class EmailCreate(BaseModel):
     recipients: List[EmailStr]
     subject: constr(min_length=1, strip_whitespace=True)
     body: constr(min_length=1)
+    cc: Optional[List[EmailStr]] = None
+    bcc: Optional[List[EmailStr]] = None
+    attachments: List[AttachmentUpload] = []
 
     class Config:
         json_schema_extra = {
@@ -35,34 +60,177 @@ class DraftRequest(BaseModel):
     context: str
     recipient: Optional[str] = None
 
+class TriageRequest(BaseModel):
+    limit: int = Field(20, ge=1, le=settings.TRIAGE_MAX_EMAILS)
+
 @router.get("/recent")
 async def get_recent_emails(
-    limit: int = 10,
-    current_user = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1),
+    page_token: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """INBOX messages, newest first, at most ``EMAIL_PAGE_MAX_SIZE`` per page.
+
+    The cursor for the next page comes back in the ``X-Next-Page-Token``
+    header; pass it as ``page_token``. With ``format=ndjson`` (or an
+    ``Accept: application/x-ndjson`` header) messages are streamed one per
+    line as their batches arrive. The first page is served from the
+    history-synced message store.
+    """
+    page_size = min(limit, settings.EMAIL_PAGE_MAX_SIZE)
+    try:
+        if format == "ndjson" or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            chunks, next_page_token = await gmail_service.open_emails_page(page_size, page_token)
+            headers = {"X-Next-Page-Token": next_page_token} if next_page_token else None
+            return ndjson_response(chunks, headers)
+        page = await gmail_service.get_emails_page(page_size, page_token)
+    except HttpError as e:
+        if e.resp.status == 400 and page_token:
+            raise HTTPException(status_code=400, detail="Invalid page token")
+        raise
+    if page["nextPageToken"]:
+        response.headers["X-Next-Page-Token"] = page["nextPageToken"]
+    return page["emails"]
+
+@router.get("/search")
+async def search_emails(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """Full-text search over subject, sender and text of the user's messages.
+
+    Words are prefix-matched and ANDed; ``"quoted phrases"``, ``from:`` /
+    ``subject:`` filters and ``-word`` exclusions are supported. Results
+    come from the local index, most relevant first, each with a ``match``
+    passage.
+    """
+    if gmail_service.search_index is None:
+        raise HTTPException(status_code=503, detail="Search index is disabled")
+    return await gmail_service.search_emails(q, limit)
+
+@router.get("/messages/{message_id}")
+async def get_email(
+    message_id: str,
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """Full message including its body; list endpoints only return snippets."""
+    try:
+        return await gmail_service.get_email(message_id)
+    except HttpError as e:
+        if e.resp.status == 404:
+            raise HTTPException(status_code=404, detail="Email not found")
+        raise
+
+@router.get("/messages/{message_id}/attachments")
+async def list_attachments(
+    message_id: str,
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """Attachment names, types and sizes; download one by its ``partId``."""
+    try:
+        return await gmail_service.list_attachments(message_id)
+    except HttpError as e:
+        if e.resp.status == 404:
+            raise HTTPException(status_code=404, detail="Email not found")
+        raise
+
+@router.get("/messages/{message_id}/attachments/{part_id}")
+async def download_attachment(
+    message_id: str,
+    part_id: str,
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """The attachment's bytes, streamed as they are downloaded and decoded."""
+    try:
+        attachment = await gmail_service.get_attachment(message_id, part_id)
+        if attachment is None:
+            raise HTTPException(status_code=404, detail="Attachment not found")
+        stream = await gmail_service.open_attachment(message_id, attachment["attachmentId"])
+    except HttpError as e:
+        if e.resp.status == 404:
+            raise HTTPException(status_code=404, detail="Attachment not found")
+        raise
+    filename = quote(attachment["filename"])
+    disposition = (
+        f'attachment; filename="{attachment["filename"]}"' if filename == attachment["filename"]
+        else f"attachment; filename*=utf-8''{filename}"
+    )
+    return StreamingResponse(
+        stream,
+        media_type=attachment["mimeType"],
+        headers={"Content-Disposition": disposition},
+        # Runs even when the client disconnects mid-download.
+        background=BackgroundTask(stream.aclose)
+    )
+
+@router.get("/threads")
+async def list_threads(
+    page_size: int = Query(20, ge=1, le=100),
+    page_token: Optional[str] = None,
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """INBOX threads, newest first; pass ``nextPageToken`` back as ``page_token``."""
+    return await gmail_service.list_threads(page_size, page_token)
+
+@router.get("/threads/{thread_id}")
+async def get_thread(
+    thread_id: str,
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    try:
+        return await gmail_service.get_thread(thread_id)
+    except HttpError as e:
+        if e.resp.status == 404:
+            raise HTTPException(status_code=404, detail="Thread not found")
+        raise
+
+@router.post("/triage")
+async def triage_emails(
+    request: TriageRequest = Body(TriageRequest()),
+    current_user = Depends(get_current_user),
+    gmail_service: GmailService = Depends(get_gmail_service),
+    ai_service: AIService = Depends(get_ai_service)
 ):
-    gmail_service = GmailService(current_user)
-    emails = await gmail_service.get_recent_emails(limit)
-    return emails
+    """The ``limit`` most recent emails with priority, category and summary.
+
+    Emails triaged before are answered from the cache; the rest are sent to
+    the model in batches of ``TRIAGE_BATCH_SIZE``.
+    """
+    emails = await gmail_service.get_recent_emails(request.limit)
+    return await ai_service.triage_emails(emails, user=current_user.get("email"))
 
 @router.post("/draft")
 async def create_draft(
     request: DraftRequest,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
 ):
-    ai_service = AIService()
-    gmail_service = GmailService(current_user)
-    
     draft = await ai_service.generate_draft(
         request.context,
-        request.recipient
+        request.recipient,
+        user=current_user.get("email")
     )
     
     return draft
 
+@router.post("/draft/stream")
+async def stream_draft(
+    request: DraftRequest,
+    current_user = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """Server-Sent Events variant of /draft: a subject event as soon as the
+    subject line is complete, then body tokens, then the final draft."""
+    return sse_response(ai_service.stream_draft(request.context, request.recipient, user=current_user.get("email")))
+
 @router.post("/send")
 async def send_email(
     email: EmailCreate,
-    current_user = Depends(get_current_user)
+    gmail_service: GmailService = Depends(get_gmail_service)
 ):
     if not email.recipients:
         raise HTTPException(
@@ -70,16 +238,52 @@ async def send_email(
             detail="At least one recipient is required"
         )
     
-    gmail_service = GmailService(current_user)
+    try:
+        attachments = [
+            Attachment(a.filename, io.BytesIO(base64.b64decode(a.content, validate=True)), a.content_type)
+            for a in email.attachments
+        ]
+    except binascii.Error:
+        raise HTTPException(status_code=422, detail="Attachment content must be base64")
+
     try:
         result = await gmail_service.send_email(
-            to=email.recipients[0],
+            to=email.recipients,
             subject=email.subject,
-            body=email.body
+            body=email.body,
+            cc=email.cc,
+            bcc=email.bcc,
+            attachments=attachments
         )
         return result
+    except MediaUploadSizeError as e:
+        raise HTTPException(status_code=413, detail=f"Email too large: {str(e)}")
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to send email: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/send/bulk")
+async def send_bulk(
+    request: BulkSendRequest,
+    gmail_service: GmailService = Depends(get_gmail_service)
+):
+    """Send several messages, each to its own to/cc/bcc recipients.
+
+    Sends are throttled per user and retried when Gmail throttles them; the
+    response holds one result per message in request order.
+    """
+    if not request.messages:
+        raise HTTPException(status_code=422, detail="At least one message is required")
+    if len(request.messages) > settings.GMAIL_BULK_SEND_MAX_MESSAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.GMAIL_BULK_SEND_MAX_MESSAGES} messages can be sent per request"
+        )
+    if any(not message.to for message in request.messages):
+        raise HTTPException(status_code=422, detail="Every message needs at least one recipient")
+
+    results = await BulkSender(gmail_service).send(request.messages)
+    sent = sum(1 for result in results if result["status"] == "sent")
+    return {"sent": sent, "failed": len(results) - sent, "results": results}
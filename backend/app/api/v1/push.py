@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import binascii
+import hmac
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+from ...core.config import settings
+from ...services.gmail_cache import gmail_service_cache
+from ...services.gmail_service import GmailService
+from ...services.inbox_push import InboxPushHub
+from ..deps import get_current_user, get_gmail_service, get_inbox_push_hub
+from ..sse import sse_response
+
+router = APIRouter(prefix="/push", tags=["push"])
+
+@router.post("/gmail", status_code=204)
+async def gmail_notification(
+    envelope: dict,
+    token: str = Query(None),
+    hub: InboxPushHub = Depends(get_inbox_push_hub)
+):
+    """Pub/Sub push endpoint for Gmail ``users.watch`` notifications.
+
+    Always acknowledges well-formed and malformed messages alike (Pub/Sub
+    redelivers anything that is not a 2xx), except when the verification
+    token does not match. Without ``PUBSUB_VERIFICATION_TOKEN`` anyone could
+    forge notifications, so every request is refused until it is set.
+    """
+    if not settings.PUBSUB_VERIFICATION_TOKEN:
+        raise HTTPException(status_code=503, detail="Push notifications are not configured")
+    if not hmac.compare_digest((token or "").encode(), settings.PUBSUB_VERIFICATION_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid verification token")
+    try:
+        data = json.loads(base64.b64decode(envelope["message"]["data"]))
+        email, history_id = data["emailAddress"], int(data["historyId"])
+    except (KeyError, TypeError, ValueError, binascii.Error) as e:
+        logger.warning(f"Ignoring malformed Gmail push message: {e}")
+        return Response(status_code=204)
+    await hub.notify(email, history_id)
+    return Response(status_code=204)
+
+@router.get("/updates")
+async def inbox_updates(
+    gmail_service: GmailService = Depends(get_gmail_service),
+    hub: InboxPushHub = Depends(get_inbox_push_hub)
+):
+    """Server-Sent Events stream of inbox changes for the current user."""
+    return sse_response(hub.subscribe(gmail_service))
+
+@router.websocket("/updates/ws")
+async def inbox_updates_ws(
+    websocket: WebSocket,
+    token: str = Query(...),
+    hub: InboxPushHub = Depends(get_inbox_push_hub)
+):
+    """WebSocket variant of /updates; browsers pass the JWT as ``?token=``."""
+    try:
+        current_user = await get_current_user(token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    gmail_service = await run_in_threadpool(gmail_service_cache.get, current_user)
+    await websocket.accept()
+    events = hub.subscribe(gmail_service)
+
+    async def forward():
+        async for event in events:
+            await websocket.send_json(event)
+
+    async def until_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Watch for the client going away while waiting on the next event, so
+    # the subscription is released right away rather than at the next ping.
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(until_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await events.aclose()
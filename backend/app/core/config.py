@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Literal
 import os
 
 # Get the absolute path to the backend directory
@@ -32,16 +32,137 @@ class Settings(BaseSettings):
     GROQ_MODEL_NAME: str = "llama-3.2-90b-vision-preview"
     GROQ_TEMPERATURE: float = 0.7
     GROQ_MAX_TOKENS: int = 1000
+    GROQ_MAX_CONNECTIONS: int = 20
+    # Answer simple commands ("show my last 5 emails") without the LLM agent
+    COMMAND_FAST_PATH_ENABLED: bool = True
+
+    # LLM response cache for drafts and read-only commands
+    LLM_CACHE_BACKEND: Literal["memory", "sqlite", "none"] = "memory"
+    LLM_CACHE_PATH: str = os.path.join(BASE_DIR, "config", "llm_cache.db")
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 300
+    LLM_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    # Embeddings for the similarity tier ("hashing" reuses the vector index's
+    # HashingEmbedder); "none" keeps exact matches only
+    LLM_CACHE_EMBEDDER: Literal["none", "hashing"] = "none"
+
+    # How tool results are shown to the agent: "compact" renders email lists
+    # as a table with bare sender addresses and snippets cut to a token budget
+    TOOL_OUTPUT_FORMAT: Literal["compact", "json"] = "compact"
+    TOOL_SNIPPET_MAX_TOKENS: int = 24
+
+    # Inbox triage: emails packed into each LLM call, concurrent calls, and
+    # how long a message's result is reused
+    TRIAGE_BATCH_SIZE: int = 10
+    TRIAGE_CONCURRENCY: int = 4
+    TRIAGE_MAX_EMAILS: int = 100
+    TRIAGE_CACHE_BACKEND: Literal["memory", "sqlite", "none"] = "memory"
+    TRIAGE_CACHE_PATH: str = os.path.join(BASE_DIR, "config", "triage_cache.db")
+    TRIAGE_CACHE_MAX_ENTRIES: int = 10000
+    TRIAGE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Per-user agent conversation memory: history kept within a token budget
+    # (oldest turns trimmed or summarized), conversations idle for the TTL
+    # start over, and fetch_emails results this recent are reused
+    CONVERSATION_MEMORY_BACKEND: Literal["memory", "sqlite", "none"] = "memory"
+    CONVERSATION_MEMORY_PATH: str = os.path.join(BASE_DIR, "config", "conversations.db")
+    CONVERSATION_MAX_TOKENS: int = 2000
+    CONVERSATION_OVERFLOW: Literal["trim", "summarize"] = "trim"
+    CONVERSATION_TTL_SECONDS: int = 1800
+    CONVERSATION_TOOL_REUSE_SECONDS: int = 60
+    
+    # Background jobs for process-command: worker pool size, queue depth
+    # limits and where job records live ("redis" needs JOB_QUEUE_REDIS_URL)
+    JOB_QUEUE_WORKERS: int = 4
+    JOB_QUEUE_MAX_DEPTH: int = 100
+    JOB_QUEUE_MAX_PER_USER: int = 10
+    JOB_QUEUE_BACKEND: Literal["memory", "redis"] = "memory"
+    JOB_QUEUE_REDIS_URL: str = "redis://localhost:6379/0"
+    JOB_RESULT_TTL_SECONDS: int = 3600
+    # A job still running after this long is cancelled and marked failed
+    JOB_TIMEOUT_SECONDS: int = 300
     
     # JWT settings
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Verified JWT payloads kept in memory until their exp; 0 disables
+    AUTH_TOKEN_CACHE_SIZE: int = 1024
+    # "token" embeds the Google credentials in the JWT; "server" keeps them in
+    # the credential store and puts only an opaque id in the token
+    AUTH_CREDENTIALS_MODE: Literal["token", "server"] = "token"
+    CREDENTIAL_STORE_PATH: str = os.path.join(BASE_DIR, "config", "credentials.db")
     # Update CORS settings to include Vite's default port
     FRONTEND_URL: str = "http://localhost:5173"
     ALLOWED_ORIGINS: List[str] = ["http://localhost:5173"]
     # Google API settings
+    GMAIL_API_ENDPOINT: Optional[str] = None
+    GMAIL_BATCH_SIZE: int = 50
+    # Batch requests one GmailService runs at once, so large fetches do not
+    # burst against the per-user quota
+    GMAIL_BATCH_CONCURRENCY: int = 4
+    # Entries that fail inside a batch are fetched again one by one; throttled
+    # ones back off exponentially (or per Retry-After) up to this many times
+    GMAIL_FETCH_MAX_RETRIES: int = 3
+    GMAIL_FETCH_BACKOFF_SECONDS: float = 0.5
+    # "metadata" (headers + snippet only) or "full" for inbox listings
+    GMAIL_LIST_FETCH_FORMAT: Literal["metadata", "full"] = "metadata"
+    GMAIL_EXECUTOR_MAX_WORKERS: int = 32
+    GMAIL_SERVICE_CACHE_MAX_SIZE: int = 256
+    GMAIL_SERVICE_CACHE_TTL_SECONDS: int = 900
+    # Attachment downloads are decoded this many bytes of base64 at a time.
+    # Sent messages up to GMAIL_SEND_INLINE_MAX_BYTES go inline as ``raw``;
+    # larger ones spill to a temporary file and are uploaded in resumable
+    # chunks (Google requires multiples of 256 KiB).
+    GMAIL_ATTACHMENT_CHUNK_BYTES: int = 64 * 1024
+    GMAIL_SEND_INLINE_MAX_BYTES: int = 1024 * 1024
+    GMAIL_UPLOAD_CHUNK_BYTES: int = 4 * 1024 * 1024
+    # Largest page /emails/recent returns; clients page with nextPageToken
+    EMAIL_PAGE_MAX_SIZE: int = 100
+    # Local full-text index over fetched messages for /emails/search and the
+    # search_emails agent tool; an empty index (search or vector) is
+    # backfilled with this many of the newest messages on the first query
+    SEARCH_INDEX_BACKEND: Literal["sqlite", "memory", "none"] = "sqlite"
+    SEARCH_INDEX_PATH: str = os.path.join(BASE_DIR, "config", "search.db")
+    SEARCH_INDEX_BACKFILL_MESSAGES: int = 500
+    # List views fetch metadata only, so they index subject, sender and
+    # snippet; opening a message indexes its body. With this on, the
+    # backfill fetches full messages and re-fetches snippet-only rows so
+    # the backfilled window is searchable by body text
+    SEARCH_INDEX_BODIES: bool = True
+    # Embedding index for the find_relevant_emails agent tool: one
+    # memory-mapped float32 matrix per user under VECTOR_INDEX_DIR, filled
+    # and backfilled like the search index
+    VECTOR_INDEX_BACKEND: Literal["memmap", "memory", "none"] = "memmap"
+    VECTOR_INDEX_DIR: str = os.path.join(BASE_DIR, "config", "vectors")
+    VECTOR_INDEX_DIM: int = 256
+    # Threads whose parsed headers are kept in memory for thread views
+    HEADER_INDEX_MAX_THREADS: int = 5000
+    # Refresh shared OAuth access tokens this long before they expire
+    OAUTH_REFRESH_MARGIN_SECONDS: int = 300
+    # Bulk send: per-user token bucket sized to the Gmail sending quota,
+    # concurrent sends per request and retries on 429/503/rate-limit responses
+    GMAIL_SEND_RATE_PER_SECOND: float = 2.0
+    GMAIL_SEND_BURST: int = 10
+    GMAIL_SEND_CONCURRENCY: int = 8
+    GMAIL_SEND_MAX_RETRIES: int = 4
+    GMAIL_SEND_BACKOFF_SECONDS: float = 0.5
+    GMAIL_BULK_SEND_MAX_MESSAGES: int = 500
+    # Local SQLite message cache synced through history.list; empty disables it
+    MESSAGE_STORE_PATH: str = os.path.join(BASE_DIR, "config", "messages.db")
     PUBSUB_TOPIC_NAME: str = "projects/langflow-449814/topics/gmail-notifications"
+    # Shared secret expected as ?token= on the Pub/Sub push webhook; the
+    # webhook refuses every notification while it is unset
+    PUBSUB_VERIFICATION_TOKEN: Optional[str] = None
+    PUSH_HEARTBEAT_SECONDS: int = 30
+    PUSH_SUBSCRIBER_QUEUE_SIZE: int = 100
+    # Background dependency checks served by /health and /health/ready
+    HEALTH_PROBE_ENABLED: bool = True
+    HEALTH_PROBE_INTERVAL_SECONDS: int = 30
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    HEALTH_GROQ_URL: str = "https://api.groq.com/openai/v1/models"
+    HEALTH_GMAIL_DISCOVERY_URL: str = "https://gmail.googleapis.com/$discovery/rest?version=v1"
+    HEALTH_TOKEN_ENDPOINT_URL: str = "https://oauth2.googleapis.com/token"
     
     # CORS settings
     ALLOWED_METHODS: List[str] = ["*"]
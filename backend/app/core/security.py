@@ -1,7 +1,12 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 from jose import jwt
 from .config import settings
+from .metrics import STAGE_SECONDS
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -18,13 +23,72 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
+class VerifiedTokenCache:
+    """Bounded LRU of already verified JWT payloads.
+
+    Keyed by a hash of the signing key and the token, so the raw token is not
+    kept in memory and rotating ``SECRET_KEY`` invalidates every entry. An
+    entry is only served until the token's ``exp``; tokens without ``exp``
+    are never cached.
+    """
+
+    def __init__(self, max_size: int = 1024, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(f"{settings.SECRET_KEY}\0{token}".encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, payload: Dict) -> None:
+        exp = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (payload, float(exp))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+verified_token_cache = VerifiedTokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
 def verify_token(token: str) -> Optional[dict]:
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=["HS256"]
-        )
+    payload = verified_token_cache.get(token)
+    if payload is not None:
         return payload
+    try:
+        with STAGE_SECONDS.time("jwt_decode"):
+            payload = jwt.decode(
+                token, 
+                settings.SECRET_KEY, 
+                algorithms=["HS256"]
+            )
     except jwt.JWTError:
-        return None 
\ No newline at end of file
+        return None
+    verified_token_cache.set(token, payload)
+    return dict(payload) 
\ No newline at end of file
@@ -1,15 +1,33 @@
-from fastapi import FastAPI, Depends, HTTPException, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .core.config import Settings, settings
+from .core.metrics import MetricsMiddleware, registry
 from .services.gmail_service import GmailService
 from .services.ai_service import AIService
-from .api.deps import get_current_user
+from .services.gmail_executor import shutdown_gmail_executor
+from .services.job_queue import JobQueue, QueueFullError
+from .services.inbox_push import InboxPushHub
+from .services.health import HealthProber
+from .api.deps import get_current_user, get_gmail_service, get_ai_service, get_job_queue, get_inbox_push_hub, get_health_prober
 from typing import Dict
-from .api.v1 import auth, emails
-from langchain.prompts import ChatPromptTemplate
+from .api.v1 import auth, emails, push
+from .api.sse import sse_response
 from pydantic import BaseModel, constr
 
-app = FastAPI(title=settings.PROJECT_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_health_prober().start()
+    yield
+    await get_health_prober().aclose()
+    if get_job_queue.cache_info().currsize:
+        await get_job_queue().aclose()
+    shutdown_gmail_executor()
+    if get_ai_service.cache_info().currsize:
+        await get_ai_service().aclose()
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -20,9 +38,13 @@ app.add_middleware(
     allow_headers=settings.ALLOWED_HEADERS,
 )
 
+# Outermost, so the timing covers CORS handling too.
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_STR)
 app.include_router(emails.router, prefix=settings.API_V1_STR)
+app.include_router(push.router, prefix=settings.API_V1_STR)
 
 class CommandRequest(BaseModel):
     command: constr(min_length=1, strip_whitespace=True)
@@ -34,20 +56,11 @@ class CommandRequest(BaseModel):
             }
         }
 
-# Email routes
-@app.get(f"{settings.API_V1_STR}/emails/recent")
-async def get_recent_emails(
-    limit: int = 10,
-    current_user = Depends(get_current_user)
-):
-    gmail_service = GmailService(current_user)
-    emails = await gmail_service.get_recent_emails(limit)
-    return emails
-
 @app.post("/api/emails/process-command")
 async def process_command(
     command_req: CommandRequest = Body(...),
-    current_user = Depends(get_current_user)
+    gmail_service: GmailService = Depends(get_gmail_service),
+    ai_service: AIService = Depends(get_ai_service)
 ):
     if not command_req.command.strip():
         raise HTTPException(
@@ -56,8 +69,6 @@ async def process_command(
         )
     
     try:
-        ai_service = AIService()
-        gmail_service = GmailService(current_user)
         result = await ai_service.interpret_command(command_req.command, gmail_service)
         return result["output"]
     except Exception as e:
@@ -66,39 +77,120 @@ async def process_command(
             detail=f"Failed to process command: {str(e)}"
         )
 
+@app.post("/api/emails/process-command/stream")
+async def process_command_stream(
+    command_req: CommandRequest = Body(...),
+    gmail_service: GmailService = Depends(get_gmail_service),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """Server-Sent Events variant of process-command: tokens and tool calls
+    are sent as they are produced, followed by a final event."""
+    return sse_response(ai_service.stream_command(command_req.command, gmail_service))
+
+def _job_owner(current_user: Dict) -> str:
+    return current_user.get("email") or current_user.get("sub")
+
+async def _get_own_job(job_id: str, current_user: Dict, job_queue: JobQueue) -> Dict:
+    job = await job_queue.get(job_id)
+    if job is None or job["user"] != _job_owner(current_user):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/api/emails/process-command/jobs", status_code=202)
+async def submit_command_job(
+    command_req: CommandRequest = Body(...),
+    current_user = Depends(get_current_user),
+    gmail_service: GmailService = Depends(get_gmail_service),
+    ai_service: AIService = Depends(get_ai_service),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Queue process-command in the background and return the job at once.
+
+    Poll ``GET .../jobs/{id}`` (optionally with ``wait`` seconds) or follow
+    ``GET .../jobs/{id}/events`` for the result.
+    """
+    async def run():
+        result = await ai_service.interpret_command(command_req.command, gmail_service)
+        return result["output"]
+
+    try:
+        return await job_queue.submit(_job_owner(current_user), run, command=command_req.command)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+@app.get("/api/emails/process-command/jobs/{job_id}")
+async def get_command_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30),
+    current_user = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    job = await _get_own_job(job_id, current_user, job_queue)
+    if wait:
+        job = await job_queue.wait(job_id, wait) or job
+    return job
+
+@app.get("/api/emails/process-command/jobs/{job_id}/events")
+async def command_job_events(
+    job_id: str,
+    current_user = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Server-Sent Events with the job record on every status change."""
+    await _get_own_job(job_id, current_user, job_queue)
+
+    async def events():
+        async for job in job_queue.subscribe(job_id):
+            yield {"event": job["status"], "data": job}
+
+    return sse_response(events())
+
+@app.delete("/api/emails/process-command/jobs/{job_id}")
+async def cancel_command_job(
+    job_id: str,
+    current_user = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    await _get_own_job(job_id, current_user, job_queue)
+    return await job_queue.cancel(job_id)
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; no dependency is contacted."""
+    return {"status": "ok", "version": settings.VERSION}
+
 @app.get("/health")
-async def health_check() -> Dict[str, str]:
+@app.get("/health/ready")
+async def health_check(prober: HealthProber = Depends(get_health_prober)):
     """
-    Check the health of the system components.
+    Readiness: the last results of the background dependency checks.
     Returns:
-        Dict with status of each component and overall health
+        Overall status, version and each check's status, age and latency;
+        503 unless every check passed recently
     """
-    try:
-        # Initialize services to check their configuration
-        ai_service = AIService()
-        
-        # Test Groq API connection using ChatPromptTemplate
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a test assistant"),
-            ("user", "test")
-        ])
-        chain = prompt | ai_service.llm
-        await chain.ainvoke({"context": "test"})
-        
-        return {
-            "status": "healthy",
-            "groq_api": "connected",
-            "version": settings.VERSION
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "status": "unhealthy",
-                "error": str(e),
-                "version": settings.VERSION
-            }
-        )
+    snapshot = {**prober.snapshot(), "version": settings.VERSION}
+    return JSONResponse(snapshot, status_code=200 if snapshot["status"] == "healthy" else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus exposition of request, Gmail, LLM and tool latencies."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/llm-cache")
+async def llm_cache_stats(ai_service: AIService = Depends(get_ai_service)):
+    """Hit/miss counters of the LLM response cache."""
+    return ai_service.cache_stats() or {"enabled": False}
+
+@app.get("/metrics/jobs")
+async def job_queue_stats(job_queue: JobQueue = Depends(get_job_queue)):
+    """Queue depth, outcome counters and queue-wait/run timings of background jobs."""
+    return job_queue.stats()
+
+@app.get("/metrics/push")
+async def push_stats(hub: InboxPushHub = Depends(get_inbox_push_hub)):
+    """Notification, sync and fan-out counters of the Gmail push pipeline."""
+    return hub.stats()
+
 @app.get("/health_check")
 async def health():
     return {"status": "ok"}
\ No newline at end of file
@@ -9,6 +9,9 @@ class EmailBase(BaseModel):
     cc: Optional[List[EmailStr]] = None
     bcc: Optional[List[EmailStr]] = None
 
+class BulkSendRequest(BaseModel):
+    messages: List[EmailBase]
+
 class EmailCreate(BaseModel):
     recipients: List[str]
     subject: str
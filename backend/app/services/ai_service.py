@@ -1,11 +1,26 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_groq import ChatGroq
-from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.agents import AgentExecutor
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
 from langchain.tools import StructuredTool
-from typing import Dict, Any, List
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnablePassthrough
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from typing import Dict, Any, List, Optional, AsyncIterator, Sequence
 from pydantic import BaseModel
+import hashlib
+import json
+import re
+import httpx
 from ..core.config import settings
+from .gmail_executor import run_blocking
+from .llm_cache import LLMResponseCache, create_llm_cache
+from .command_parser import parse_command
+from .conversation_memory import ConversationMemory, ToolStep, create_conversation_memory
+from .tool_encoding import format_tool_steps
+from .email_triage import TRIAGE_SYSTEM_PROMPT, EmailTriage, create_triage_cache
+from .llm_metrics import metrics_callback
 
 class SendEmailSchema(BaseModel):
     to: str
@@ -15,14 +30,251 @@ class SendEmailSchema(BaseModel):
 class FetchEmailsSchema(BaseModel):
     limit: int
 
-class AIService:
+class SearchEmailsSchema(BaseModel):
+    query: str
+    limit: int = 10
+
+class FindRelevantEmailsSchema(BaseModel):
+    question: str
+    limit: int = 5
+
+COMMAND_SYSTEM_PROMPT = """You are an AI email assistant that helps users manage their emails.
+You have access to four tools:
+1. send_email - For sending emails (requires 'to' email address, subject, and body)
+2. fetch_emails - For fetching recent emails (requires a number limit)
+3. search_emails - For finding emails by words in the subject, sender or text (requires a query;
+   supports "exact phrases", from:name and subject:word). Prefer it over fetching many emails.
+4. find_relevant_emails - For answering questions about what emails said (requires the question);
+   returns the few emails closest in meaning. Answer from those instead of fetching the inbox.
+
+When sending emails, make sure to write a complete and appropriate message based on the user's request."""
+
+DRAFT_SYSTEM_PROMPT = """You are an email assistant. Generate a professional email based on the context.
+            Format your response exactly like this:
+            SUBJECT: <subject line>
+            ---
+            <email body>
+            
+            Do not include any other metadata like 'To:', 'From:', or 'Send to:' in the response."""
+
+SUMMARY_SYSTEM_PROMPT = """You maintain the memory of a conversation between a user and their email assistant.
+Merge the earlier summary and the new exchanges into one short summary (at most a few sentences).
+Keep the facts needed for follow-up requests: which emails were listed (sender, subject, order),
+what was sent and to whom. Reply with the summary only."""
+
+def format_email_list(emails: List[Dict[str, Any]]) -> str:
+    if not emails:
+        return "Your inbox is empty."
+    lines = [f"Here are your {len(emails)} most recent emails:"]
+    for index, email in enumerate(emails, start=1):
+        lines.append(f"{index}. From: {email['from']} | Subject: {email['subject']}\n   {email['snippet']}")
+    return "\n".join(lines)
+
+def parse_draft(content: str) -> Dict[str, str]:
+    # Split on the first occurrence of "---"
+    parts = content.split("---", 1)
+    
+    if len(parts) != 2:
+        raise ValueError("Invalid email format from AI")
+    
+    subject = parts[0].replace("SUBJECT:", "").strip()
+    body = parts[1].strip()
+    
+    return {
+        "subject": subject,
+        "body": body
+    }
+
+class DraftStreamParser:
+    """Incremental version of ``parse_draft`` for streamed completions.
+
+    Text is buffered until the first ``---`` separator arrives (it may be
+    split across chunks), at which point the subject is emitted. Body text is
+    then forwarded as it comes, holding back leading and trailing whitespace
+    so the concatenated ``body`` events equal the stripped final body.
+    """
+
+    SEPARATOR = "---"
+
     def __init__(self):
-        self.llm = ChatGroq(
-            api_key=settings.GROQ_API_KEY,
-            model_name=settings.GROQ_MODEL_NAME,
-            temperature=settings.GROQ_TEMPERATURE,
-            max_tokens=settings.GROQ_MAX_TOKENS
+        self.content = ""
+        self.subject: Optional[str] = None
+        self._pending = ""
+        self._body_started = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self.content += text
+        events = []
+        if self.subject is None:
+            index = self.content.find(self.SEPARATOR)
+            if index == -1:
+                return events
+            self.subject = parse_draft(self.content)["subject"]
+            events.append({"event": "subject", "data": {"subject": self.subject}})
+            text = self.content[index + len(self.SEPARATOR):]
+
+        self._pending += text
+        if not self._body_started:
+            self._pending = self._pending.lstrip()
+            self._body_started = bool(self._pending)
+        emit = self._pending.rstrip()
+        if emit:
+            self._pending = self._pending[len(emit):]
+            events.append({"event": "body", "data": {"content": emit}})
+        return events
+
+    def close(self) -> Dict[str, str]:
+        return parse_draft(self.content)
+
+# Tools whose runs change the mailbox; results that used them are never cached.
+SIDE_EFFECT_TOOLS = {"send_email"}
+# Commands that ask for a side effect skip the cache entirely, so a similar
+# read-only command can never stand in for them.
+SIDE_EFFECT_COMMAND = re.compile(r"\b(send|reply|respond|forward)\b", re.IGNORECASE)
+# Commands that point back at earlier turns ("what does the second one say?");
+# their answers are cached per conversation state instead of per user.
+REFERS_BACK = re.compile(
+    r"\b(it|its|that|those|these|this|them|they|he|she|him|her|one|ones|again|above|"
+    r"previous|earlier|same|else|more|other|first|second|third)\b",
+    re.IGNORECASE
+)
+
+_DEFAULT_CACHE = object()
+
+class AIService:
+    """App-scoped LLM service.
+
+    The chat model, its HTTP connection pools, the prompts and the tool-calling
+    agent are built once; only the Gmail tools, which close over the calling
+    user's ``GmailService``, are bound per command.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        response_cache: Optional[LLMResponseCache] = _DEFAULT_CACHE,
+        memory: Optional[ConversationMemory] = _DEFAULT_CACHE
+    ):
+        self.response_cache = create_llm_cache() if response_cache is _DEFAULT_CACHE else response_cache
+        self.memory = create_conversation_memory(self._summarize_turns) if memory is _DEFAULT_CACHE else memory
+        self._http_clients = []
+        if llm is None:
+            limits = httpx.Limits(
+                max_connections=settings.GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GROQ_MAX_CONNECTIONS
+            )
+            self._http_clients = [httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)]
+            llm = ChatGroq(
+                api_key=settings.GROQ_API_KEY,
+                model_name=settings.GROQ_MODEL_NAME,
+                temperature=settings.GROQ_TEMPERATURE,
+                max_tokens=settings.GROQ_MAX_TOKENS,
+                http_client=self._http_clients[0],
+                http_async_client=self._http_clients[1]
+            )
+        # Every chain built on the model reports its latency and token usage.
+        if metrics_callback not in (llm.callbacks or []):
+            llm.callbacks = [*(llm.callbacks or []), metrics_callback]
+        self.llm = llm
+
+        self.command_prompt = ChatPromptTemplate.from_messages([
+            ("system", COMMAND_SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder(variable_name="agent_scratchpad")
+        ])
+        self.draft_chain = ChatPromptTemplate.from_messages([
+            ("system", DRAFT_SYSTEM_PROMPT),
+            ("user", "{context}")
+        ]) | self.llm
+        self.email_triage = EmailTriage(
+            ChatPromptTemplate.from_messages([("system", TRIAGE_SYSTEM_PROMPT), ("user", "{table}")]) | self.llm,
+            cache=create_triage_cache(),
+            batch_size=settings.TRIAGE_BATCH_SIZE,
+            concurrency=settings.TRIAGE_CONCURRENCY
+        )
+        self.summary_chain = ChatPromptTemplate.from_messages([
+            ("system", SUMMARY_SYSTEM_PROMPT),
+            ("user", "Earlier summary:\n{summary}\n\nNew exchanges:\n{transcript}")
+        ]) | self.llm
+        # Tool schemas are the same for every user, so the agent (prompt +
+        # tool-bound model) is compiled once against unbound tools. It is
+        # ``create_openai_tools_agent`` with tool results run through the
+        # compact encoder before they go back to the model.
+        llm_with_tools = self.llm.bind(tools=[convert_to_openai_tool(tool) for tool in self._create_tools(None)])
+        self.agent = (
+            RunnablePassthrough.assign(agent_scratchpad=lambda x: format_tool_steps(x["intermediate_steps"]))
+            | self.command_prompt
+            | llm_with_tools
+            | OpenAIToolsAgentOutputParser()
+        )
+
+    async def aclose(self) -> None:
+        if self.memory is not None:
+            await self.memory.drain()
+        for client in self._http_clients:
+            if isinstance(client, httpx.AsyncClient):
+                await client.aclose()
+            else:
+                client.close()
+        self._http_clients = []
+
+    def _create_tools(self, gmail_service) -> List[StructuredTool]:
+        return [
+            self._create_send_email_tool(gmail_service),
+            self._create_fetch_emails_tool(gmail_service),
+            self._create_search_emails_tool(gmail_service),
+            self._create_find_relevant_emails_tool(gmail_service)
+        ]
+
+    def _create_agent_executor(self, gmail_service) -> AgentExecutor:
+        return AgentExecutor(
+            agent=self.agent,
+            tools=self._create_tools(gmail_service),
+            return_intermediate_steps=True
+        )
+
+    def _command_cache_namespace(self, command: str, gmail_service, chat_history: Sequence = ()) -> Optional[str]:
+        user = getattr(gmail_service, "user_email", None)
+        if self.response_cache is None or not user or SIDE_EFFECT_COMMAND.search(command):
+            return None
+        if chat_history and REFERS_BACK.search(command):
+            # The answer depends on earlier turns, so it is only reusable
+            # in the same conversation state.
+            digest = hashlib.sha256(
+                "\n".join(f"{message.type}:{message.content}" for message in chat_history).encode()
+            ).hexdigest()[:16]
+            return f"command:{user}:{digest}"
+        return f"command:{user}"
+
+    def _chat_history(self, gmail_service) -> List:
+        user = getattr(gmail_service, "user_email", None)
+        if self.memory is None or not user:
+            return []
+        return self.memory.history(user)
+
+    async def _remember(self, gmail_service, command: str, output: str, steps: Sequence[ToolStep] = ()) -> None:
+        user = getattr(gmail_service, "user_email", None)
+        if self.memory is not None and user:
+            await self.memory.record(user, command, output, steps)
+
+    async def _summarize_turns(self, summary: str, turns: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(
+            f"User: {turn['input']}\n"
+            + "".join(f"Tool {step['tool']}: {json.dumps(step['output'], default=str)[:1000]}\n" for step in turn["steps"])
+            + f"Assistant: {turn['output']}"
+            for turn in turns
         )
+        result = await self.summary_chain.ainvoke({"summary": summary or "(none)", "transcript": transcript})
+        return result.content.strip()
+
+    def _draft_cache_namespace(self, user: Optional[str]) -> Optional[str]:
+        if self.response_cache is None or not user:
+            return None
+        return f"draft:{user}"
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        return self.response_cache.stats() if self.response_cache is not None else None
         
     def _create_send_email_tool(self, gmail_service) -> StructuredTool:
         async def send_email(to: str, subject: str, body: str) -> str:
@@ -39,6 +291,12 @@ class AIService:
         
     def _create_fetch_emails_tool(self, gmail_service) -> StructuredTool:
         async def fetch_emails(limit: int) -> Dict[str, Any]:
+            user = getattr(gmail_service, "user_email", None)
+            if self.memory is not None and user:
+                # A fetch this conversation made moments ago still answers it.
+                recent = self.memory.find_tool_output(user, "fetch_emails", lambda params: params.get("limit", 0) >= limit)
+                if recent is not None:
+                    return {"emails": recent["emails"][:limit]}
             emails = await gmail_service.get_recent_emails(limit)
             email_list = []
             
@@ -71,99 +329,222 @@ class AIService:
             coroutine=fetch_emails
         )
         
+    def _create_search_emails_tool(self, gmail_service) -> StructuredTool:
+        async def search_emails(query: str, limit: int = 10) -> Dict[str, Any]:
+            emails = await gmail_service.search_emails(query, limit)
+            return {"emails": [
+                {
+                    "from": email.get("sender", "Unknown"),
+                    "subject": email.get("subject", "No Subject"),
+                    "snippet": email.get("match") or email.get("snippet", "")
+                }
+                for email in emails
+            ]}
+
+        return StructuredTool.from_function(
+            name="search_emails",
+            description="Use this tool to find emails about a topic or from a sender. Requires a search query; "
+                        "optionally a limit on the number of results.",
+            func=search_emails,
+            args_schema=SearchEmailsSchema,
+            coroutine=search_emails
+        )
+
+    def _create_find_relevant_emails_tool(self, gmail_service) -> StructuredTool:
+        async def find_relevant_emails(question: str, limit: int = 5) -> Dict[str, Any]:
+            emails = await gmail_service.find_relevant_emails(question, limit)
+            return {"emails": [
+                {
+                    "from": email.get("sender", "Unknown"),
+                    "subject": email.get("subject", "No Subject"),
+                    "snippet": email.get("snippet", "")
+                }
+                for email in emails
+            ]}
+
+        return StructuredTool.from_function(
+            name="find_relevant_emails",
+            description="Use this tool to answer a question about the content of the user's emails. Requires the "
+                        "question; returns the emails most related to it, best match first.",
+            func=find_relevant_emails,
+            args_schema=FindRelevantEmailsSchema,
+            coroutine=find_relevant_emails
+        )
+
     async def interpret_command(self, command: str, gmail_service) -> Dict[str, Any]:
-        tools = [
-            self._create_send_email_tool(gmail_service),
-            self._create_fetch_emails_tool(gmail_service)
-        ]
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an AI email assistant that helps users manage their emails.
-You have access to two tools:
-1. send_email - For sending emails (requires 'to' email address, subject, and body)
-2. fetch_emails - For fetching recent emails (requires a number limit)
+        action = self._parse_command_result(command)
+        if action["type"] != "unknown":
+            try:
+                result = await self._run_fast_path(action, gmail_service)
+            except Exception as e:
+                raise ValueError(f"Failed to execute command: {str(e)}")
+            await self._remember(gmail_service, command, result["output"], [
+                (action["type"], action["params"], result["observation"])
+            ])
+            return {
+                "input": command,
+                "chat_history": [],
+                "output": result["output"],
+                "intermediate_steps": [],
+                "fast_path": action
+            }
 
-When sending emails, make sure to write a complete and appropriate message based on the user's request."""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad")
-        ])
-        
-        agent = create_openai_tools_agent(self.llm, tools, prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+        chat_history = self._chat_history(gmail_service)
+        namespace = self._command_cache_namespace(command, gmail_service, chat_history)
+        if namespace:
+            cached = await run_blocking(self.response_cache.lookup, namespace, command)
+            if cached is not None:
+                await self._remember(gmail_service, command, cached["output"])
+                return {"input": command, "chat_history": [], "output": cached["output"], "intermediate_steps": []}
+
+        agent_executor = self._create_agent_executor(gmail_service)
         
         try:
             result = await agent_executor.ainvoke(
                 {
                     "input": command,
-                    "chat_history": []
-                }
+                    "chat_history": chat_history
+                },
+                config={"callbacks": [metrics_callback]}
             )
-            return result
         except Exception as e:
             raise ValueError(f"Failed to execute command: {str(e)}")
+
+        steps = [(action.tool, action.tool_input, observation) for action, observation in result.get("intermediate_steps", [])]
+        if namespace:
+            await self._store_command_result(namespace, command, result["output"], {tool for tool, _, _ in steps})
+        await self._remember(gmail_service, command, result["output"], steps)
+        return result
+
+    async def _store_command_result(self, namespace: str, command: str, output: str, tools_used: set) -> None:
+        if tools_used & SIDE_EFFECT_TOOLS:
+            self.response_cache.skip()
+        else:
+            await run_blocking(self.response_cache.store, namespace, command, {"output": output})
         
-    async def generate_draft(self, context: str, recipient: str = None) -> Dict[str, str]:
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an email assistant. Generate a professional email based on the context.
-            Format your response exactly like this:
-            SUBJECT: <subject line>
-            ---
-            <email body>
-            
-            Do not include any other metadata like 'To:', 'From:', or 'Send to:' in the response."""),
-            ("user", "{context}")
-        ])
-        
-        chain = prompt | self.llm
-        result = await chain.ainvoke({"context": context})
-        
-        content = result.content
-        # Split on the first occurrence of "---"
-        parts = content.split("---", 1)
-        
-        if len(parts) != 2:
-            raise ValueError("Invalid email format from AI")
-        
-        subject = parts[0].replace("SUBJECT:", "").strip()
-        body = parts[1].strip()
-        
-        return {
-            "subject": subject,
-            "body": body
-        }
-        
-    def _parse_command_result(self, result: str) -> Dict[str, Any]:
-        """Parse the LLM output into structured action data."""
+    async def stream_command(self, command: str, gmail_service) -> AsyncIterator[Dict[str, Any]]:
+        """Run a command like ``interpret_command`` but yield progress as it happens.
+
+        Yields ``{"event": ..., "data": ...}`` dicts: ``token`` for LLM output
+        tokens, ``tool_start``/``tool_end`` around each tool call, then a
+        single ``final`` (or ``error``) event carrying the agent's output.
+        """
+        action = self._parse_command_result(command)
+        if action["type"] != "unknown":
+            yield {"event": "tool_start", "data": {"tool": action["type"], "input": action["params"]}}
+            try:
+                result = await self._run_fast_path(action, gmail_service)
+            except Exception as e:
+                yield {"event": "error", "data": {"detail": f"Failed to execute command: {str(e)}"}}
+                return
+            yield {"event": "tool_end", "data": {"tool": action["type"], "output": result["observation"]}}
+            await self._remember(gmail_service, command, result["output"], [
+                (action["type"], action["params"], result["observation"])
+            ])
+            yield {"event": "final", "data": {"output": result["output"]}}
+            return
+
+        chat_history = self._chat_history(gmail_service)
+        namespace = self._command_cache_namespace(command, gmail_service, chat_history)
+        if namespace:
+            cached = await run_blocking(self.response_cache.lookup, namespace, command)
+            if cached is not None:
+                await self._remember(gmail_service, command, cached["output"])
+                yield {"event": "final", "data": {"output": cached["output"]}}
+                return
+
+        agent_executor = self._create_agent_executor(gmail_service)
+        tools_used = set()
+        steps: Dict[str, List] = {}
         try:
-            # Basic parsing of common commands
-            result = result.lower().strip()
-            
-            if "fetch" in result or "get" in result:
-                return {
-                    "type": "fetch_emails",
-                    "params": {
-                        "limit": 10  # default limit
-                    }
-                }
-            elif "send" in result:
-                # Extract recipient, subject, and body from the result
-                # This is a simplified version - you might want to use more sophisticated parsing
-                return {
-                    "type": "send_email",
-                    "params": {
-                        "recipient": "",  # Extract from result
-                        "subject": "",    # Extract from result
-                        "body": ""        # Extract from result
-                    }
-                }
-            else:
-                return {
-                    "type": "unknown",
-                    "params": {}
-                }
+            async for event in agent_executor.astream_events(
+                {"input": command, "chat_history": chat_history},
+                config={"callbacks": [metrics_callback]},
+                version="v2"
+            ):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield {"event": "token", "data": {"content": content}}
+                elif kind == "on_tool_start":
+                    tools_used.add(event["name"])
+                    steps[event["run_id"]] = [event["name"], event["data"].get("input"), None]
+                    yield {"event": "tool_start", "data": {"tool": event["name"], "input": event["data"].get("input")}}
+                elif kind == "on_tool_end":
+                    if event["run_id"] in steps:
+                        steps[event["run_id"]][2] = event["data"].get("output")
+                    yield {"event": "tool_end", "data": {"tool": event["name"], "output": event["data"].get("output")}}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    output = event["data"]["output"]["output"]
+                    if namespace:
+                        await self._store_command_result(namespace, command, output, tools_used)
+                    await self._remember(gmail_service, command, output, [tuple(step) for step in steps.values()])
+                    yield {"event": "final", "data": {"output": output}}
         except Exception as e:
-            return {
-                "type": "error",
-                "params": {"error": str(e)}
-            } 
\ No newline at end of file
+            yield {"event": "error", "data": {"detail": f"Failed to execute command: {str(e)}"}}
+
+    async def triage_emails(self, emails: List[Dict[str, Any]], user: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Add ``priority``, ``category`` and ``summary`` to each email."""
+        return await self.email_triage.triage(emails, user)
+
+    async def generate_draft(self, context: str, recipient: str = None, user: Optional[str] = None) -> Dict[str, str]:
+        namespace = self._draft_cache_namespace(user)
+        if namespace:
+            cached = await run_blocking(self.response_cache.lookup, namespace, context)
+            if cached is not None:
+                return cached
+
+        result = await self.draft_chain.ainvoke({"context": context})
+        draft = parse_draft(result.content)
+        if namespace:
+            await run_blocking(self.response_cache.store, namespace, context, draft)
+        return draft
+
+    async def stream_draft(self, context: str, recipient: str = None, user: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a draft as ``subject``, ``body`` and ``final`` events.
+
+        The ``final`` event carries exactly what ``generate_draft`` returns.
+        """
+        namespace = self._draft_cache_namespace(user)
+        if namespace:
+            cached = await run_blocking(self.response_cache.lookup, namespace, context)
+            if cached is not None:
+                yield {"event": "subject", "data": {"subject": cached["subject"]}}
+                yield {"event": "body", "data": {"content": cached["body"]}}
+                yield {"event": "final", "data": cached}
+                return
+
+        parser = DraftStreamParser()
+        try:
+            async for chunk in self.draft_chain.astream({"context": context}):
+                for event in parser.feed(chunk.content):
+                    yield event
+            draft = parser.close()
+        except Exception as e:
+            yield {"event": "error", "data": {"detail": str(e)}}
+            return
+        if namespace:
+            await run_blocking(self.response_cache.store, namespace, context, draft)
+        yield {"event": "final", "data": draft}
+        
+    def _parse_command_result(self, command: str) -> Dict[str, Any]:
+        """Parse a command into structured action data without the LLM.
+
+        Returns ``{"type": "unknown", "params": {}}`` when the command has to
+        go through the agent.
+        """
+        if not settings.COMMAND_FAST_PATH_ENABLED:
+            return {"type": "unknown", "params": {}}
+        return parse_command(command) or {"type": "unknown", "params": {}}
+
+    async def _run_fast_path(self, action: Dict[str, Any], gmail_service) -> Dict[str, Any]:
+        """Call the Gmail tool for a parsed command directly."""
+        tool = next(t for t in self._create_tools(gmail_service) if t.name == action["type"])
+        observation = await tool.ainvoke(action["params"], config={"callbacks": [metrics_callback]})
+        if action["type"] == "fetch_emails":
+            output = format_email_list(observation["emails"])
+        else:
+            params = action["params"]
+            output = f"Email sent to {params['to']} with subject \"{params['subject']}\"."
+        return {"output": output, "observation": observation}
@@ -0,0 +1,159 @@
+import base64
+import io
+import re
+import secrets
+from email.message import EmailMessage
+from email.policy import SMTP
+from typing import AsyncIterator, BinaryIO, Iterator, NamedTuple, Optional, Sequence, Union
+import httpx
+
+# Bytes of an attachment base64-encoded per step when sending; a multiple of
+# 57 so every step ends on a whole 76-character line.
+ENCODE_CHUNK_BYTES = 57 * 1024
+DOWNLOAD_TIMEOUT_SECONDS = 30.0
+
+_DATA_FIELD = re.compile(rb'"data"\s*:\s*"')
+
+
+class Attachment(NamedTuple):
+    """A file to send; ``content`` is read in chunks when it is a stream."""
+    filename: str
+    content: Union[bytes, BinaryIO]
+    content_type: str = "application/octet-stream"
+
+
+class Base64UrlDecoder:
+    """Incremental base64url decoder for data arriving in arbitrary pieces.
+
+    Only whole 4-character groups are decoded; the rest is kept for the next
+    piece, and ``flush`` decodes the final group whether or not it is padded.
+    """
+
+    def __init__(self):
+        self._pending = b""
+
+    def decode(self, data: bytes) -> bytes:
+        data = self._pending + data
+        whole = len(data) - len(data) % 4
+        self._pending = data[whole:]
+        return base64.urlsafe_b64decode(data[:whole])
+
+    def flush(self) -> bytes:
+        data, self._pending = self._pending, b""
+        return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4)) if data else b""
+
+
+async def json_data_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """The value of the ``"data"`` string in a streamed JSON object, piece by piece.
+
+    Base64url never contains quotes or escapes, so the value ends at the
+    next ``"``; fields before it are buffered, nothing after it is read.
+    """
+    head: Optional[bytes] = b""
+    async for chunk in chunks:
+        if head is not None:
+            head += chunk
+            match = _DATA_FIELD.search(head)
+            if match is None:
+                continue
+            chunk, head = head[match.end():], None
+        end = chunk.find(b'"')
+        if end >= 0:
+            if end:
+                yield chunk[:end]
+            return
+        if chunk:
+            yield chunk
+    raise ValueError("Attachment response has no data")
+
+
+class AttachmentStream:
+    """An open ``attachments.get`` response, decoded to raw bytes as it arrives.
+
+    At most ``chunk_bytes`` of base64 is held at a time. Iterating closes the
+    response when done; call ``aclose`` if it is abandoned before that.
+    """
+
+    def __init__(self, response: httpx.Response, client: httpx.AsyncClient, chunk_bytes: int):
+        self.response = response
+        self.client = client
+        self.chunk_bytes = chunk_bytes
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        decoder = Base64UrlDecoder()
+        try:
+            async for data in json_data_chunks(self.response.aiter_bytes(self.chunk_bytes)):
+                decoded = decoder.decode(data)
+                if decoded:
+                    yield decoded
+            tail = decoder.flush()
+            if tail:
+                yield tail
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.response.aclose()
+        await self.client.aclose()
+
+
+def _headers(message: EmailMessage) -> bytes:
+    return b"".join(message.policy.fold_binary(name, value) for name, value in message.items()) + b"\r\n"
+
+
+def _base64_lines(content: Union[bytes, BinaryIO]) -> Iterator[bytes]:
+    stream = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    pending = b""
+    while True:
+        data = stream.read(ENCODE_CHUNK_BYTES)
+        if not data:
+            break
+        pending += data
+        whole = len(pending) - len(pending) % 57
+        if whole:
+            yield base64.encodebytes(pending[:whole]).replace(b"\n", b"\r\n")
+            pending = pending[whole:]
+    if pending:
+        yield base64.encodebytes(pending).replace(b"\n", b"\r\n")
+
+
+def iter_mime_message(
+    to: Union[str, Sequence[str]],
+    subject: str,
+    body: str,
+    cc: Optional[Sequence[str]] = None,
+    bcc: Optional[Sequence[str]] = None,
+    attachments: Sequence[Attachment] = ()
+) -> Iterator[bytes]:
+    """A multipart/mixed message (HTML body, then attachments) as byte chunks.
+
+    Unlike ``Message.as_bytes`` the message is never built in memory:
+    headers come from the ``email`` package, attachment contents are read
+    and base64-encoded ``ENCODE_CHUNK_BYTES`` at a time.
+    """
+    boundary = f"==============={secrets.token_hex(16)}=="
+    envelope = EmailMessage(policy=SMTP)
+    envelope["To"] = to if isinstance(to, str) else ", ".join(to)
+    # Gmail delivers to Bcc recipients and strips the header on send.
+    if cc:
+        envelope["Cc"] = ", ".join(cc)
+    if bcc:
+        envelope["Bcc"] = ", ".join(bcc)
+    envelope["Subject"] = subject
+    envelope["MIME-Version"] = "1.0"
+    envelope["Content-Type"] = f'multipart/mixed; boundary="{boundary}"'
+    yield _headers(envelope)
+
+    text = EmailMessage(policy=SMTP)
+    text.set_content(body, subtype="html")
+    del text["MIME-Version"]
+    yield f"--{boundary}\r\n".encode() + text.as_bytes()
+
+    for attachment in attachments:
+        part = EmailMessage(policy=SMTP)
+        part["Content-Type"] = attachment.content_type
+        part.add_header("Content-Disposition", "attachment", filename=attachment.filename)
+        part["Content-Transfer-Encoding"] = "base64"
+        yield f"--{boundary}\r\n".encode() + _headers(part)
+        yield from _base64_lines(attachment.content)
+    yield f"--{boundary}--\r\n".encode()
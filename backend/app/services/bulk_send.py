@@ -0,0 +1,178 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+from googleapiclient.errors import HttpError
+from loguru import logger
+from ..core.config import settings
+from ..models.email import EmailBase
+
+
+class TokenBucket:
+    """Token bucket limiting how often an operation may start.
+
+    ``acquire`` reserves a token immediately (the balance may go negative)
+    and then sleeps until that reservation is covered by the refill rate, so
+    waiters are served in arrival order without holding a lock while asleep.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` and return how long the caller has to wait."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, tokens: float = 1) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await self._sleep(wait)
+
+
+_send_limiters: Dict[str, TokenBucket] = {}
+_send_limiters_lock = threading.Lock()
+
+
+def get_send_limiter(user: str) -> TokenBucket:
+    """Per-user bucket shared by every request, since Gmail quotas are per user."""
+    with _send_limiters_lock:
+        limiter = _send_limiters.get(user)
+        if limiter is None:
+            limiter = _send_limiters[user] = TokenBucket(
+                settings.GMAIL_SEND_RATE_PER_SECOND, settings.GMAIL_SEND_BURST
+            )
+        return limiter
+
+
+# Errors Gmail reports for a send it refused for quota, so it is safe to retry
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether the message certainly was not sent, so sending again is safe.
+
+    ``messages.send`` is not idempotent: only throttling (429, 503 and 403
+    rate-limit reasons) and connections that were never established qualify.
+    """
+    if isinstance(error, HttpError):
+        if error.resp.status in (429, 503):
+            return True
+        details = error.error_details if isinstance(error.error_details, list) else []
+        return error.resp.status == 403 and any(
+            isinstance(detail, dict) and detail.get("reason") in RATE_LIMIT_REASONS for detail in details
+        )
+    return isinstance(error, ConnectionRefusedError)
+
+
+def delivery_unknown(error: Exception) -> bool:
+    """Whether the request may have reached Gmail and the message been sent."""
+    if isinstance(error, HttpError):
+        return error.resp.status >= 500 and not is_retryable(error)
+    return isinstance(error, (ConnectionError, TimeoutError)) and not is_retryable(error)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header, when Gmail sent one."""
+    if isinstance(error, HttpError):
+        value = error.resp.get("retry-after")
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+def backoff_delay(error: Exception, attempts: int, base_seconds: float) -> float:
+    """``Retry-After`` when Gmail sent one, else exponential backoff with jitter."""
+    delay = retry_after(error)
+    if delay is None:
+        delay = base_seconds * 2 ** (attempts - 1) * random.uniform(0.5, 1.0)
+    return delay
+
+
+class BulkSender:
+    """Send many messages for one user through a bounded pool of workers.
+
+    At most ``concurrency`` sends are in flight, each start (including
+    retries) takes a token from ``limiter``, and throttled sends are retried
+    with exponential backoff and jitter, honoring ``Retry-After``. Other
+    server errors and timeouts are never resent, since the message may have
+    gone out. Every message gets its own result; one failure never aborts
+    the others.
+    """
+
+    def __init__(
+        self,
+        gmail_service,
+        limiter: Optional[TokenBucket] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.gmail_service = gmail_service
+        self.limiter = limiter or get_send_limiter(gmail_service.user_email)
+        self.concurrency = concurrency or settings.GMAIL_SEND_CONCURRENCY
+        self.max_retries = settings.GMAIL_SEND_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_seconds = settings.GMAIL_SEND_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self._sleep = sleep
+
+    async def send(self, messages: Sequence[EmailBase]) -> List[Dict]:
+        queue: "asyncio.Queue[int]" = asyncio.Queue()
+        for index in range(len(messages)):
+            queue.put_nowait(index)
+        results: List[Optional[Dict]] = [None] * len(messages)
+
+        async def worker():
+            while not queue.empty():
+                index = queue.get_nowait()
+                results[index] = await self._send_one(index, messages[index])
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(messages)))))
+        return results
+
+    async def _send_one(self, index: int, message: EmailBase) -> Dict:
+        attempts = 0
+        while True:
+            attempts += 1
+            await self.limiter.acquire()
+            try:
+                sent = await self.gmail_service.send_email(
+                    to=list(message.to),
+                    subject=message.subject,
+                    body=message.body,
+                    cc=message.cc,
+                    bcc=message.bcc
+                )
+                return {
+                    "index": index,
+                    "status": "sent",
+                    "id": sent.get("id"),
+                    "threadId": sent.get("threadId"),
+                    "attempts": attempts
+                }
+            except Exception as e:
+                if not is_retryable(e) or attempts > self.max_retries:
+                    error = f"Unknown delivery state, not resent: {e}" if delivery_unknown(e) else str(e)
+                    logger.warning(f"Bulk send of message {index} failed after {attempts} attempt(s): {error}")
+                    return {"index": index, "status": "failed", "error": error, "attempts": attempts}
+                await self._sleep(backoff_delay(e, attempts, self.backoff_seconds))
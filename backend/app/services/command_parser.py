@@ -0,0 +1,90 @@
+import re
+from typing import Any, Dict, Optional
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15,
+    "twenty": 20, "thirty": 30, "fifty": 50
+}
+DEFAULT_FETCH_LIMIT = 10
+MAX_FETCH_LIMIT = 100
+
+_COUNT = r"(?P<count>\d{1,3}|" + "|".join(NUMBER_WORDS) + r")"
+_RECENT = r"(?:last|latest|recent|most\s+recent|newest|new)"
+_MAIL = r"(?:e-?mails?|messages?|mails?)"
+_EMAIL_ADDRESS = r"(?P<to>[^\s@<>\"',;]+@[^\s@<>\"',;]+\.[A-Za-z]{2,})"
+_BODY_KEYWORD = r"(?:body|message|text|saying)"
+
+
+def _field(name: str) -> str:
+    """A field value introduced by a colon, or a quoted value."""
+    return rf"(?:\s*:\s*(?P<{name}>.+?)|\s+(?P<quoted_{name}>\"[^\"]*\"|'[^']*'))"
+
+
+# "show my last 5 emails", "fetch 10 messages", "check my inbox", ...
+FETCH_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:show|get|fetch|list|display|read|check|give|pull\s+up|open)\s+"
+    r"(?:me\s+)?(?:my\s+|the\s+)?"
+    rf"(?P<recent>{_RECENT}\s+)?(?:{_COUNT}\s+)?(?:{_RECENT}\s+)?"
+    rf"(?:(?P<mail>{_MAIL})(?:\s+(?:in|from)\s+(?:my\s+)?inbox)?|inbox)"
+    r"(?:\s+please)?\s*[.!?]?$",
+    re.IGNORECASE
+)
+
+# "send an email to bob@example.com with subject: Lunch and body: See you at noon"
+# Fields need a colon or quotes; the email goes out without the LLM, so a
+# guessed split between subject and body is never acceptable.
+SEND_PATTERN = re.compile(
+    rf"^(?:please\s+)?(?:send\s+(?:an?\s+)?(?:{_MAIL}\s+)?to|e-?mail)\s+{_EMAIL_ADDRESS}\s*,?\s+"
+    rf"(?:with\s+)?(?:the\s+|a\s+)?\bsubject\b{_field('subject')}\s*,?\s+"
+    rf"(?:and\s+)?(?:with\s+)?(?:the\s+|a\s+)?\b{_BODY_KEYWORD}\b{_field('body')}\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+# A keyword inside the subject means the split point is a guess
+_AMBIGUOUS_SUBJECT = re.compile(rf"\b(?:subject|{_BODY_KEYWORD})\b", re.IGNORECASE)
+
+
+def _unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1].strip()
+    return text
+
+
+def parse_command(command: str) -> Optional[Dict[str, Any]]:
+    """Recognize common, unambiguous commands without calling the LLM.
+
+    Returns ``{"type": <tool name>, "params": <tool arguments>}`` or ``None``
+    when the command needs the agent (filters, composing text, anything
+    that does not match the grammar exactly).
+    """
+    text = command.strip()
+
+    match = FETCH_PATTERN.match(text)
+    if match:
+        count, mail = match.group("count"), match.group("mail")
+        if count is None and mail and not mail.lower().endswith("s"):
+            # "open my last email" means one; "check my email" is unclear
+            if not match.group("recent"):
+                return None
+            limit = 1
+        elif count is None:
+            limit = DEFAULT_FETCH_LIMIT
+        else:
+            limit = int(count) if count.isdigit() else NUMBER_WORDS[count.lower()]
+        if not 1 <= limit <= MAX_FETCH_LIMIT:
+            return None
+        return {"type": "fetch_emails", "params": {"limit": limit}}
+
+    match = SEND_PATTERN.match(text)
+    if match:
+        subject = match.group("subject") or match.group("quoted_subject")
+        if match.group("subject") and _AMBIGUOUS_SUBJECT.search(subject):
+            return None
+        subject = _unquote(subject)
+        body = _unquote(match.group("body") or match.group("quoted_body"))
+        if not subject or not body:
+            return None
+        return {"type": "send_email", "params": {"to": match.group("to"), "subject": subject, "body": body}}
+
+    return None
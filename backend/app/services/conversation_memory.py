@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from loguru import logger
+from ..core.config import settings
+from .tool_encoding import encode_tool_output, estimate_tokens
+
+# (previous summary, turns being dropped) -> new summary
+Summarizer = Callable[[str, List[Dict]], Awaitable[str]]
+# (tool name, tool input, tool output) as recorded for one agent step
+ToolStep = Tuple[str, Dict, Any]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+def turn_tokens(turn: Dict) -> int:
+    return estimate_tokens(turn["input"]) + estimate_tokens(turn["output"]) + sum(
+        estimate_tokens(_dumps(step["input"])) + estimate_tokens(encode_tool_output(step["tool"], step["output"]))
+        for step in turn["steps"]
+    )
+
+
+def turn_messages(turn: Dict, turn_index: int) -> List[BaseMessage]:
+    """Replay a turn as the messages the tools agent produced for it."""
+    messages: List[BaseMessage] = [HumanMessage(content=turn["input"])]
+    for step_index, step in enumerate(turn["steps"]):
+        call_id = f"call_history_{turn_index}_{step_index}"
+        messages.append(AIMessage(content="", additional_kwargs={"tool_calls": [{
+            "id": call_id,
+            "type": "function",
+            "function": {"name": step["tool"], "arguments": _dumps(step["input"])}
+        }]}))
+        messages.append(ToolMessage(content=encode_tool_output(step["tool"], step["output"]), tool_call_id=call_id))
+    messages.append(AIMessage(content=turn["output"]))
+    return messages
+
+
+class InMemoryConversationStore:
+    """Conversations held in process memory, least recently used evicted first."""
+
+    def __init__(self, max_users: int = 1024):
+        self.max_users = max_users
+        self._conversations: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, user: str) -> Optional[Dict]:
+        with self._lock:
+            conversation = self._conversations.get(user)
+            if conversation is None:
+                return None
+            self._conversations.move_to_end(user)
+            return json.loads(_dumps(conversation))
+
+    def save(self, user: str, conversation: Dict) -> None:
+        with self._lock:
+            self._conversations[user] = json.loads(_dumps(conversation))
+            self._conversations.move_to_end(user)
+            while len(self._conversations) > self.max_users:
+                self._conversations.popitem(last=False)
+
+    def delete(self, user: str) -> None:
+        with self._lock:
+            self._conversations.pop(user, None)
+
+
+class SQLiteConversationStore:
+    """Same contract as ``InMemoryConversationStore``, persisted in a SQLite file."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    user TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+            """)
+
+    def load(self, user: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM conversations WHERE user = ?", (user,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, user: str, conversation: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversations (user, data) VALUES (?, ?)", (user, _dumps(conversation))
+            )
+
+    def delete(self, user: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE user = ?", (user,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ConversationMemory:
+    """Per-user agent history: prior commands, answers and tool results.
+
+    ``history`` replays the kept turns (plus a running summary) as chat
+    messages for the agent prompt. Turns are kept within ``max_tokens``: when
+    a new turn pushes the conversation over budget the oldest turns are
+    dropped or, with a ``summarizer``, folded into the summary by a
+    background task, so the request that overflowed does not wait for the
+    LLM. A conversation idle for ``ttl_seconds`` starts over, and tool
+    results younger than ``reuse_seconds`` can be served again by
+    ``find_tool_output``.
+    """
+
+    def __init__(
+        self,
+        store,
+        max_tokens: int = 2000,
+        ttl_seconds: float = 1800,
+        reuse_seconds: float = 60,
+        summarizer: Optional[Summarizer] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.store = store
+        self.max_tokens = max_tokens
+        self.ttl_seconds = ttl_seconds
+        self.reuse_seconds = reuse_seconds
+        self.summarizer = summarizer
+        self._clock = clock
+        self.counters = {"turns": 0, "trimmed": 0, "summaries": 0, "reused": 0}
+        # Newest summary task per user; each waits for the one before it.
+        self._summaries: Dict[str, asyncio.Task] = {}
+
+    def load(self, user: str) -> Dict:
+        conversation = self.store.load(user)
+        if conversation is None or self._clock() - conversation["updated_at"] > self.ttl_seconds:
+            return {"summary": "", "turns": [], "updated_at": self._clock()}
+        return conversation
+
+    def history(self, user: str) -> List[BaseMessage]:
+        conversation = self.load(user)
+        messages: List[BaseMessage] = []
+        if conversation["summary"]:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{conversation['summary']}"))
+        for index, turn in enumerate(conversation["turns"]):
+            messages.extend(turn_messages(turn, index))
+        return messages
+
+    def find_tool_output(self, user: str, tool: str, accept: Callable[[Dict], bool] = lambda step: True) -> Optional[Any]:
+        """Output of the newest fresh ``tool`` step whose input ``accept`` allows."""
+        cutoff = self._clock() - self.reuse_seconds
+        for turn in reversed(self.load(user)["turns"]):
+            if turn["created_at"] < cutoff:
+                break
+            for step in reversed(turn["steps"]):
+                if step["tool"] == tool and accept(step["input"]):
+                    self.counters["reused"] += 1
+                    return step["output"]
+        return None
+
+    async def record(self, user: str, command: str, output: str, steps: Sequence[ToolStep] = ()) -> None:
+        now = self._clock()
+        conversation = self.load(user)
+        conversation["turns"].append({
+            "input": command,
+            "output": output,
+            "steps": [{"tool": tool, "input": tool_input, "output": tool_output} for tool, tool_input, tool_output in steps],
+            "created_at": now
+        })
+        conversation["updated_at"] = now
+        overflow = []
+        budget = self.max_tokens - estimate_tokens(conversation["summary"])
+        while conversation["turns"] and sum(turn_tokens(turn) for turn in conversation["turns"]) > budget:
+            overflow.append(conversation["turns"].pop(0))
+        self.store.save(user, conversation)
+        self.counters["turns"] += 1
+        self.counters["trimmed"] += len(overflow)
+
+        if overflow and self.summarizer is not None:
+            task = asyncio.create_task(self._summarize(user, overflow, self._summaries.get(user)))
+            self._summaries[user] = task
+            task.add_done_callback(lambda done: self._summaries.get(user) is done and self._summaries.pop(user))
+
+    async def _summarize(self, user: str, overflow: List[Dict], previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            # Fold into the summary the previous task wrote, not a stale one.
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            summary = await self.summarizer(self.load(user)["summary"], overflow)
+        except Exception as e:
+            logger.warning(f"Could not summarize conversation for {user}, dropping old turns: {e}")
+            return
+        # Keep the summary from crowding out the turns it precedes.
+        summary = summary[:self.max_tokens * 2]
+        latest = self.load(user)
+        latest["summary"] = summary
+        self.store.save(user, latest)
+        self.counters["summaries"] += 1
+
+    async def drain(self) -> None:
+        """Wait for in-flight summaries (used by tests and on shutdown)."""
+        while self._summaries:
+            await asyncio.gather(*list(self._summaries.values()), return_exceptions=True)
+
+    def clear(self, user: str) -> None:
+        self.store.delete(user)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+
+def create_conversation_memory(summarizer: Optional[Summarizer] = None) -> Optional[ConversationMemory]:
+    """Build the memory configured by the ``CONVERSATION_*`` settings."""
+    if settings.CONVERSATION_MEMORY_BACKEND == "none":
+        return None
+    if settings.CONVERSATION_MEMORY_BACKEND == "sqlite":
+        directory = os.path.dirname(settings.CONVERSATION_MEMORY_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        store = SQLiteConversationStore(settings.CONVERSATION_MEMORY_PATH)
+    else:
+        store = InMemoryConversationStore()
+    return ConversationMemory(
+        store,
+        max_tokens=settings.CONVERSATION_MAX_TOKENS,
+        ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        reuse_seconds=settings.CONVERSATION_TOOL_REUSE_SECONDS,
+        summarizer=summarizer if settings.CONVERSATION_OVERFLOW == "summarize" else None
+    )
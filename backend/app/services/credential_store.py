@@ -0,0 +1,104 @@
+import base64
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional
+from cryptography.fernet import Fernet, InvalidToken
+from ..core.config import settings
+
+
+class CredentialStore:
+    """Server-side store of users' Google OAuth credentials.
+
+    With ``AUTH_CREDENTIALS_MODE=server`` the JWT only carries the opaque id
+    returned by ``put`` instead of the whole credential set. Credentials are
+    encrypted at rest with a key derived from ``secret`` and decrypted ones are
+    kept in a small in-process LRU so lookups stay off SQLite on hot paths.
+    """
+
+    def __init__(self, path: str, secret: str, cache_size: int = 1024):
+        self.path = path
+        self._fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest()))
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._cache_size = cache_size
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS credentials (
+                    id TEXT PRIMARY KEY,
+                    user TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, credential_id: str, credentials: Dict) -> None:
+        self._cache[credential_id] = credentials
+        self._cache.move_to_end(credential_id)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, user: str, credentials: Dict) -> str:
+        """Store ``credentials`` for ``user`` and return their opaque id."""
+        credential_id = secrets.token_urlsafe(16)
+        self.update(credential_id, credentials, user=user)
+        return credential_id
+
+    def update(self, credential_id: str, credentials: Dict, user: Optional[str] = None) -> None:
+        """Replace the credentials behind ``credential_id`` (e.g. after a token refresh)."""
+        data = self._fernet.encrypt(json.dumps(credentials).encode())
+        with self._lock:
+            if user is None:
+                self._conn.execute(
+                    "UPDATE credentials SET data = ?, updated_at = ? WHERE id = ?",
+                    (data, time.time(), credential_id)
+                )
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO credentials (id, user, data, updated_at) VALUES (?, ?, ?, ?)",
+                    (credential_id, user, data, time.time())
+                )
+            self._remember(credential_id, dict(credentials))
+
+    def get(self, credential_id: str) -> Optional[Dict]:
+        with self._lock:
+            credentials = self._cache.get(credential_id)
+            if credentials is not None:
+                self._cache.move_to_end(credential_id)
+                return dict(credentials)
+            row = self._conn.execute("SELECT data FROM credentials WHERE id = ?", (credential_id,)).fetchone()
+            if row is None:
+                return None
+            try:
+                credentials = json.loads(self._fernet.decrypt(row[0]))
+            except InvalidToken:
+                # Written under a previous SECRET_KEY: the user has to sign in again.
+                return None
+            self._remember(credential_id, credentials)
+            return dict(credentials)
+
+    def delete(self, credential_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM credentials WHERE id = ?", (credential_id,))
+            self._cache.pop(credential_id, None)
+
+
+@lru_cache
+def get_credential_store() -> CredentialStore:
+    """Process-wide store; an empty ``CREDENTIAL_STORE_PATH`` keeps it in memory."""
+    path = settings.CREDENTIAL_STORE_PATH or ":memory:"
+    directory = os.path.dirname(settings.CREDENTIAL_STORE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return CredentialStore(path, settings.SECRET_KEY)
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+from loguru import logger
+from ..core.config import settings
+from .llm_cache import InMemoryCacheBackend, SQLiteCacheBackend, prompt_key
+from .tool_encoding import encode_email_table
+
+TRIAGE_SYSTEM_PROMPT = """You triage a user's inbox. For every email in the table, reply with exactly one line:
+<id>|<priority>|<category>|<one-line summary>
+priority is one of: high, medium, low.
+category is one of: work, personal, finance, newsletter, promotion, notification, social, other.
+The summary is at most 15 words. Reply with the lines only, in the order of the table."""
+
+PRIORITIES = ("high", "medium", "low")
+CATEGORIES = ("work", "personal", "finance", "newsletter", "promotion", "notification", "social", "other")
+_TRIAGE_LINE = re.compile(r"^\s*(\d+)\s*\|\s*(\w+)\s*\|\s*([^|]*?)\s*\|\s*(.*?)\s*$")
+
+
+def parse_triage(content: str, count: int) -> Dict[int, Dict[str, str]]:
+    """Map the 1-based table ids in a triage reply to their results.
+
+    Lines that do not parse, use an unknown priority or refer to a row
+    outside the table are ignored; unknown categories become ``other``.
+    """
+    results = {}
+    for line in content.splitlines():
+        match = _TRIAGE_LINE.match(line)
+        if not match:
+            continue
+        index, priority, category, summary = match.groups()
+        priority, category = priority.lower(), category.lower()
+        if not 1 <= int(index) <= count or priority not in PRIORITIES:
+            continue
+        results[int(index)] = {
+            "priority": priority,
+            "category": category if category in CATEGORIES else "other",
+            "summary": summary
+        }
+    return results
+
+
+class EmailTriage:
+    """Priority, category and one-line summary for inbox messages.
+
+    Emails are packed ``batch_size`` to an LLM call and the calls run
+    concurrently, at most ``concurrency`` at a time. Results are cached per
+    user and message id in ``cache`` (an LLM cache backend), so triaging the
+    inbox again only sends messages that were not triaged before.
+    """
+
+    def __init__(self, chain, cache=None, batch_size: int = 10, concurrency: int = 4):
+        self.chain = chain
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.counters = {"emails": 0, "cached": 0, "llm_calls": 0, "unparsed": 0}
+
+    def _key(self, user: str, message_id: str) -> str:
+        return prompt_key(f"triage:{user}", message_id)
+
+    async def triage(self, emails: Sequence[Dict[str, Any]], user: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return ``emails`` in order, each with ``priority``, ``category``
+        and ``summary`` added (None when the model gave no usable answer)."""
+        results: List[Optional[Dict[str, str]]] = [None] * len(emails)
+        pending = []
+        for index, email in enumerate(emails):
+            cached = None
+            if self.cache is not None and user and email.get("id"):
+                cached = self.cache.get(self._key(user, email["id"]))
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+        self.counters["emails"] += len(emails)
+        self.counters["cached"] += len(emails) - len(pending)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_chunk(chunk: List[int]) -> None:
+            async with semaphore:
+                self.counters["llm_calls"] += 1
+                try:
+                    reply = await self.chain.ainvoke({"table": encode_email_table([
+                        {"from": emails[i].get("sender", ""), "subject": emails[i].get("subject", ""),
+                         "snippet": emails[i].get("snippet", "")}
+                        for i in chunk
+                    ], settings.TOOL_SNIPPET_MAX_TOKENS)})
+                except Exception as e:
+                    logger.error(f"Triage call for {len(chunk)} emails failed: {e}")
+                    return
+            parsed = parse_triage(reply.content, len(chunk))
+            self.counters["unparsed"] += len(chunk) - len(parsed)
+            for position, index in enumerate(chunk, start=1):
+                result = parsed.get(position)
+                if result is None:
+                    continue
+                results[index] = result
+                message_id = emails[index].get("id")
+                if self.cache is not None and user and message_id:
+                    self.cache.set(self._key(user, message_id), f"triage:{user}", result)
+
+        await asyncio.gather(*(
+            run_chunk(pending[start:start + self.batch_size]) for start in range(0, len(pending), self.batch_size)
+        ))
+        empty = {"priority": None, "category": None, "summary": None}
+        return [{**email, **(result or empty)} for email, result in zip(emails, results)]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+
+def create_triage_cache():
+    """Backend configured by the ``TRIAGE_CACHE_*`` settings, or None."""
+    if settings.TRIAGE_CACHE_BACKEND == "none":
+        return None
+    if settings.TRIAGE_CACHE_BACKEND == "sqlite":
+        directory = os.path.dirname(settings.TRIAGE_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SQLiteCacheBackend(
+            settings.TRIAGE_CACHE_PATH,
+            max_entries=settings.TRIAGE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TRIAGE_CACHE_TTL_SECONDS
+        )
+    return InMemoryCacheBackend(
+        max_entries=settings.TRIAGE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.TRIAGE_CACHE_TTL_SECONDS
+    )
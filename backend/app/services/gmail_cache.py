@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+from ..core.config import settings
+from ..core.metrics import STAGE_SECONDS
+from .gmail_service import GmailService
+
+
+def credentials_fingerprint(user_credentials: Dict) -> str:
+    credentials_info = user_credentials.get('credentials', {})
+    encoded = json.dumps(credentials_info, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class GmailServiceCache:
+    """Process-wide LRU + TTL cache of built ``GmailService`` instances.
+
+    Entries are keyed by user email and a fingerprint of the OAuth
+    credentials, so a re-issued token with new credentials gets a fresh
+    client while repeat requests reuse the parsed discovery document and the
+    HTTP connections of the previous one.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl_seconds: float = 900,
+        factory: Callable[[Dict], GmailService] = GmailService,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._factory = factory
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[GmailService, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_credentials: Dict) -> GmailService:
+        key = (user_credentials.get('email') or user_credentials.get('sub') or "", credentials_fingerprint(user_credentials))
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+
+        # Build outside the lock: discovery parsing is the slow part we are
+        # caching and must not serialize unrelated users.
+        with STAGE_SECONDS.time("gmail_build"):
+            service = self._factory(user_credentials)
+
+        with self._lock:
+            self._entries[key] = (service, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return service
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+gmail_service_cache = GmailServiceCache(
+    max_size=settings.GMAIL_SERVICE_CACHE_MAX_SIZE,
+    ttl_seconds=settings.GMAIL_SERVICE_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,34 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from ..core.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_gmail_executor() -> ThreadPoolExecutor:
+    """Process-wide pool running the blocking ``googleapiclient`` calls.
+
+    Sized by ``GMAIL_EXECUTOR_MAX_WORKERS``: each in-flight Gmail round-trip
+    occupies one worker thread instead of the event loop.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.GMAIL_EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="gmail-io"
+        )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_gmail_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_gmail_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
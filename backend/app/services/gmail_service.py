@@ -1,81 +1,742 @@
 import os
 import html
-from typing import List, Dict
-from google.oauth2.credentials import Credentials
+import base64
+import asyncio
+import threading
+import tempfile
+import time
+from typing import AsyncIterator, BinaryIO, Callable, List, Dict, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlparse
+import httplib2
+import httpx
+from google_auth_httplib2 import AuthorizedHttp, Request
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest, HttpRequest, MediaIoBaseUpload, build_http
 from loguru import logger
+from ..core.config import settings
+from ..core.metrics import GMAIL_REQUEST_SECONDS
+from .attachments import DOWNLOAD_TIMEOUT_SECONDS, Attachment, AttachmentStream, iter_mime_message
+from .bulk_send import backoff_delay, is_retryable
+from .gmail_executor import run_blocking
+from .message_store import MessageStore, get_message_store
+from .search_index import SearchIndex, get_search_index
+from .vector_index import VectorIndex, get_vector_index
+from .token_manager import token_manager
+from .header_index import THREAD_HEADERS, HeaderIndex, header_index, summarize_thread
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# Request arguments for ``messages.get`` per fetch mode. List views only need
+# the snippet and a few headers, so "metadata" skips the MIME bodies and trims
+# the response down to the fields ``_parse_message`` reads.
+LIST_HEADERS = ['Subject', 'From', 'Date']
+FETCH_MODES = {
+    "metadata": {
+        "format": "metadata",
+        "metadataHeaders": LIST_HEADERS,
+        "fields": "id,threadId,labelIds,snippet,historyId,internalDate,payload/headers"
+    },
+    "full": {"format": "full"}
+}
+THREAD_FETCH = {
+    "format": "metadata",
+    "metadataHeaders": THREAD_HEADERS,
+    "fields": "id,historyId,messages/id,messages/threadId,messages/labelIds,messages/snippet,"
+              "messages/internalDate,messages/payload/headers"
+}
+
+# Part structure of a message without any body data, for listing
+# attachments; slash paths apply to every element of nested ``parts``.
+PART_FIELDS = ["partId", "mimeType", "filename", "body/attachmentId", "body/size"]
+ATTACHMENT_FIELDS = ",".join(
+    f"payload/{'parts/' * depth}{field}" for depth in range(5) for field in PART_FIELDS
+)
+
 class GmailService:
-    def __init__(self, user_credentials: Dict):
+    def __init__(
+        self,
+        user_credentials: Dict,
+        message_store: Optional[MessageStore] = None,
+        header_index: HeaderIndex = header_index,
+        search_index: Optional[SearchIndex] = None,
+        vector_index: Optional[VectorIndex] = None
+    ):
         credentials_info = user_credentials.get('credentials', {})
         required_fields = ['client_id', 'client_secret', 'refresh_token', 'token_uri', 'token', 'scopes']
         if not all(field in credentials_info for field in required_fields):
             raise ValueError("Missing required credentials fields")
-        self.credentials = Credentials(
-            token=credentials_info.get('token'),
-            refresh_token=credentials_info.get('refresh_token'),
-            token_uri=credentials_info.get('token_uri'),
-            client_id=credentials_info.get('client_id'),
-            client_secret=credentials_info.get('client_secret'),
-            scopes=credentials_info.get('scopes')
+        self.user_email = user_credentials.get('email') or user_credentials.get('sub')
+        # Shared per user across requests so refreshed access tokens are reused.
+        self.credentials = token_manager.credentials_for(
+            self.user_email, credentials_info, credential_id=user_credentials.get('cid')
         )
-        self.service = build('gmail', 'v1', credentials=self.credentials)
+        client_options = {"api_endpoint": settings.GMAIL_API_ENDPOINT} if settings.GMAIL_API_ENDPOINT else None
+        self.service = build('gmail', 'v1', credentials=self.credentials, client_options=client_options)
+        self._local = threading.local()
+        self.message_store = message_store or get_message_store()
+        # Created on first use: the constructor runs in FastAPI's threadpool,
+        # where asyncio.Lock() has no event loop on Python 3.9.
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self.header_index = header_index
+        self.search_index = search_index or get_search_index()
+        self.vector_index = vector_index or get_vector_index()
+
+    def _http(self) -> AuthorizedHttp:
+        # httplib2 connections are not thread-safe, so every executor thread
+        # gets its own authorized transport.
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=build_http())
+        return http
+
+    async def _execute(self, request: HttpRequest) -> Dict:
+        """Run a single API request on the Gmail executor."""
+        return await self._timed(getattr(request, "methodId", None) or "unknown", lambda: request.execute(http=self._http()))
+
+    async def _timed(self, method: str, fn: Callable[[], Dict]) -> Dict:
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await run_blocking(fn)
+        except HttpError as e:
+            status = str(e.resp.status)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            GMAIL_REQUEST_SECONDS.observe(time.perf_counter() - start, method, status)
 
     async def get_recent_emails(self, limit: int = 10) -> List[Dict]:
         try:
-            results = self.service.users().messages().list(
-                userId='me',
-                maxResults=limit,
-                labelIds=['INBOX']
-            ).execute()
-            messages = results.get("messages", [])
-            emails = []
-            for message in messages:
-                msg_data = self.service.users().messages().get(
-                    userId='me', id=message['id'], format="full"
-                ).execute()
-                snippet = msg_data.get("snippet", "No preview available")
-                headers = msg_data.get("payload", {}).get("headers", [])
-                subject = next(
-                    (header.get("value", "No Subject") for header in headers if header.get("name", "").lower() == "subject"),
-                    "No Subject"
-                )
-                sender = next(
-                    (header.get("value", "Unknown") for header in headers if header.get("name", "").lower() == "from"),
-                    "Unknown"
-                )
-                date = next(
-                    (header.get("value", "") for header in headers if header.get("name", "").lower() == "date"),
-                    ""
-                )
-                emails.append({
-                    "snippet": html.unescape(snippet),
-                    "subject": html.unescape(subject),
-                    "sender": html.unescape(sender),
-                    "date": html.unescape(date)
-                })
-            return emails
+            if self.message_store is None:
+                return await self._fetch_recent_emails(limit)
+            if self._sync_lock is None:
+                self._sync_lock = asyncio.Lock()
+            async with self._sync_lock:
+                window_start = await self._sync_message_store(limit)
+            return self.message_store.recent(self.user_email, limit, since=window_start)
         except Exception as e:
             logger.error(f"Error fetching recent emails: {e}")
             raise e
 
-    async def send_email(self, to: str, subject: str, body: str) -> Dict:
-        message = self._create_message(to, subject, body)
-        sent_message = self.service.users().messages().send(
-            userId="me", body=message
-        ).execute()
-        return sent_message
-
-    def _create_message(self, to: str, subject: str, body: str) -> Dict:
-        from email.mime.multipart import MIMEMultipart
-        from email.mime.text import MIMEText
-        import base64
-
-        mime_message = MIMEMultipart()
-        mime_message.attach(MIMEText(body, "html"))
-        mime_message["To"] = to
-        mime_message["Subject"] = subject
-        encoded_message = base64.urlsafe_b64encode(mime_message.as_bytes()).decode()
-        return {"raw": encoded_message} 
\ No newline at end of file
+    async def _fetch_recent_emails(self, limit: int) -> List[Dict]:
+        results = await self._execute(self.service.users().messages().list(
+            userId='me',
+            maxResults=limit,
+            labelIds=['INBOX']
+        ))
+        messages = results.get("messages", [])
+        message_ids = [message['id'] for message in messages]
+        fetched = await self._get_messages(message_ids, **self._list_fetch)
+        await self._index(fetched)
+        return [self._parse_message(msg_data) for msg_data in fetched]
+
+    async def get_emails_page(self, page_size: int, page_token: Optional[str] = None) -> Dict:
+        """One page of INBOX messages plus the cursor for the next one."""
+        chunks, next_page_token = await self.open_emails_page(page_size, page_token)
+        emails = [email async for chunk in chunks for email in chunk]
+        return {"emails": emails, "nextPageToken": next_page_token}
+
+    async def open_emails_page(
+        self, page_size: int, page_token: Optional[str] = None
+    ) -> Tuple[AsyncIterator[List[Dict]], Optional[str]]:
+        """The messages of one INBOX page, in chunks, and the next cursor.
+
+        The first page is read from the message store through
+        ``get_recent_emails``, so it costs a ``history.list`` delta plus a
+        ``messages.list`` for the cursor alone; it arrives as one chunk.
+        Later pages are listed from the API and stream batch by batch.
+        """
+        if page_token is None and self.message_store is not None:
+            emails, next_page_token = await asyncio.gather(
+                self.get_recent_emails(page_size), self._next_page_token(page_size)
+            )
+
+            async def chunks() -> AsyncIterator[List[Dict]]:
+                yield emails
+
+            return chunks(), next_page_token
+        message_ids, next_page_token = await self.list_email_ids(page_size, page_token)
+        return self.iter_emails(message_ids), next_page_token
+
+    async def _next_page_token(self, page_size: int) -> Optional[str]:
+        results = await self._execute(self.service.users().messages().list(
+            userId='me', maxResults=page_size, labelIds=['INBOX'], fields='nextPageToken'
+        ))
+        return results.get("nextPageToken")
+
+    async def list_email_ids(self, page_size: int, page_token: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        results = await self._execute(self.service.users().messages().list(
+            userId='me',
+            maxResults=page_size,
+            labelIds=['INBOX'],
+            pageToken=page_token
+        ))
+        return [message['id'] for message in results.get("messages", [])], results.get("nextPageToken")
+
+    async def iter_emails(self, message_ids: List[str]) -> AsyncIterator[List[Dict]]:
+        """Yield the messages for ``message_ids`` in order, one batch at a time.
+
+        Messages already in the message store are not fetched again; only one
+        ``GMAIL_BATCH_SIZE`` chunk is held in memory at a time.
+        """
+        store, user = self.message_store, self.user_email
+        # Rows may only be added while history deltas keep their labels fresh.
+        track = store is not None and store.get_sync_state(user) is not None
+        batch_size = max(1, settings.GMAIL_BATCH_SIZE)
+        for start in range(0, len(message_ids), batch_size):
+            chunk = message_ids[start:start + batch_size]
+            cached = store.get_messages(user, chunk) if store is not None else {}
+            fetched = await self._get_messages([m for m in chunk if m not in cached], **self._list_fetch)
+            await self._index(fetched)
+            if track:
+                store.upsert_messages(user, [self._to_store_row(msg_data) for msg_data in fetched])
+            emails = {**cached, **{msg_data["id"]: self._parse_message(msg_data) for msg_data in fetched}}
+            yield [emails[message_id] for message_id in chunk if message_id in emails]
+
+    async def _sync_message_store(self, limit: int) -> int:
+        """Bring the local message store up to date for a read of ``limit``.
+
+        Applies ``history.list`` deltas since the stored ``historyId`` and only
+        lists the inbox again when the cached window is too short for
+        ``limit``. Returns the window start to read from.
+        """
+        store, user = self.message_store, self.user_email
+        state = store.get_sync_state(user)
+        if state and not await self._apply_history(state["history_id"]):
+            logger.info(f"History for {user} expired, resyncing message store")
+            store.reset(user)
+            state = None
+
+        if state is not None:
+            window_start = state["window_start"]
+            if window_start == 0 or len(store.recent(user, limit, since=window_start)) >= limit:
+                return window_start
+
+        return await self._fill_window(limit, initial=state is None)
+
+    async def _collect_history(self, start_history_id: int) -> Optional[Dict]:
+        """Page through ``history.list`` and fold the records into one delta.
+
+        Returns ``added`` and ``relabeled`` (id -> current labels), ``deleted``
+        ids and the latest ``history_id``, or None when Gmail no longer has
+        history that far back.
+        """
+        added: Dict[str, List[str]] = {}
+        deleted = set()
+        relabeled: Dict[str, List[str]] = {}
+        page_token = None
+        while True:
+            try:
+                response = await self._execute(self.service.users().history().list(
+                    userId='me', startHistoryId=start_history_id, pageToken=page_token
+                ))
+            except HttpError as e:
+                if e.resp.status == 404:
+                    return None
+                raise
+            for record in response.get("history", []):
+                for item in record.get("messagesAdded", []):
+                    message = item["message"]
+                    added[message["id"]] = message.get("labelIds", [])
+                    deleted.discard(message["id"])
+                for item in record.get("messagesDeleted", []):
+                    message_id = item["message"]["id"]
+                    deleted.add(message_id)
+                    added.pop(message_id, None)
+                    relabeled.pop(message_id, None)
+                for item in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+                    message = item["message"]
+                    if message["id"] in added:
+                        added[message["id"]] = message.get("labelIds", [])
+                    else:
+                        relabeled[message["id"]] = message.get("labelIds", [])
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        return {"added": added, "deleted": deleted, "relabeled": relabeled, "history_id": int(response["historyId"])}
+
+    async def _apply_history(self, start_history_id: int) -> bool:
+        """Apply mailbox changes since ``start_history_id`` to the store.
+
+        Returns False when Gmail no longer has history that far back.
+        """
+        store, user = self.message_store, self.user_email
+        changes = await self._collect_history(start_history_id)
+        if changes is None:
+            return False
+        added, relabeled = changes["added"], changes["relabeled"]
+
+        store.delete_messages(user, changes["deleted"])
+        await self._unindex(changes["deleted"])
+        cached = store.has_messages(user, relabeled)
+        for message_id in cached:
+            store.set_labels(user, message_id, relabeled[message_id])
+        # Messages moved into the inbox that we never saw need a full fetch.
+        to_fetch = list(added) + [m for m, labels in relabeled.items() if m not in cached and "INBOX" in labels]
+        if to_fetch:
+            fetched = await self._get_messages(to_fetch, **self._list_fetch)
+            await self._index(fetched)
+            store.upsert_messages(user, [self._to_store_row(msg_data) for msg_data in fetched])
+        store.set_sync_state(user, history_id=changes["history_id"])
+        return True
+
+    async def get_history_changes(self, start_history_id: int) -> Optional[Dict]:
+        """Inbox changes since ``start_history_id`` in a client-friendly shape.
+
+        New INBOX messages come back parsed like ``get_recent_emails`` rows;
+        returns None when the history has expired and a full reload is needed.
+        """
+        changes = await self._collect_history(start_history_id)
+        if changes is None:
+            return None
+        new_ids = [m for m, labels in changes["added"].items() if "INBOX" in labels]
+        fetched = await self._get_messages(new_ids, **self._list_fetch)
+        await self._index(fetched)
+        await self._unindex(changes["deleted"])
+        added = [self._parse_message(msg_data) for msg_data in fetched]
+        return {
+            "historyId": changes["history_id"],
+            "added": added,
+            "deleted": sorted(changes["deleted"]),
+            "labelsChanged": [{"id": m, "labelIds": labels} for m, labels in changes["relabeled"].items()]
+        }
+
+    async def get_history_id(self) -> int:
+        profile = await self._execute(self.service.users().getProfile(userId='me'))
+        return int(profile["historyId"])
+
+    async def watch(self, topic_name: str, label_ids: Sequence[str] = ("INBOX",)) -> Dict:
+        """Ask Gmail to publish mailbox changes to the Pub/Sub ``topic_name``.
+
+        Returns Gmail's ``historyId`` and ``expiration`` (ms since epoch); the
+        watch has to be renewed before it expires.
+        """
+        return await self._execute(self.service.users().watch(
+            userId='me', body={"topicName": topic_name, "labelIds": list(label_ids)}
+        ))
+
+    async def _fill_window(self, limit: int, initial: bool) -> int:
+        store, user = self.message_store, self.user_email
+        if initial:
+            # Take the history checkpoint before listing so that no change
+            # made during the full fetch can be missed.
+            profile = await self._execute(self.service.users().getProfile(userId='me'))
+        results = await self._execute(self.service.users().messages().list(
+            userId='me',
+            maxResults=limit,
+            labelIds=['INBOX']
+        ))
+        message_ids = [message['id'] for message in results.get("messages", [])]
+
+        cached = store.has_messages(user, message_ids)
+        missing = [m for m in message_ids if m not in cached]
+        fetched = await self._get_messages(missing, **self._list_fetch)
+        await self._index(fetched)
+        store.upsert_messages(user, [self._to_store_row(msg_data) for msg_data in fetched])
+
+        exhausted = len(message_ids) < limit and not results.get("nextPageToken")
+        window_start = 0
+        if message_ids and not exhausted:
+            window_start = store.get_internal_date(user, message_ids[-1]) or 0
+        store.set_sync_state(
+            user,
+            history_id=int(profile["historyId"]) if initial else None,
+            window_start=window_start
+        )
+        return window_start
+
+    @property
+    def _list_fetch(self) -> Dict:
+        return FETCH_MODES[settings.GMAIL_LIST_FETCH_FORMAT]
+
+    async def get_email(self, message_id: str) -> Dict:
+        """Fetch one message with its decoded body, for detail views."""
+        msg_data = await self._execute(self.service.users().messages().get(
+            userId='me', id=message_id, **FETCH_MODES["full"]
+        ))
+        await self._index([msg_data])
+        return {**self._parse_message(msg_data), "body": self._extract_body(msg_data.get("payload", {}))}
+
+    async def list_attachments(self, message_id: str) -> List[Dict]:
+        """Attachments of a message, read from its part structure only; no
+        body or attachment data is transferred."""
+        msg_data = await self._execute(self.service.users().messages().get(
+            userId='me', id=message_id, format="full", fields=ATTACHMENT_FIELDS
+        ))
+        return [
+            {
+                "partId": part.get("partId"),
+                "filename": part["filename"],
+                "mimeType": part.get("mimeType") or "application/octet-stream",
+                "size": part["body"].get("size", 0),
+                "attachmentId": part["body"]["attachmentId"]
+            }
+            for part in self._iter_parts(msg_data.get("payload", {}))
+            if part.get("filename") and part.get("body", {}).get("attachmentId")
+        ]
+
+    async def get_attachment(self, message_id: str, part_id: str) -> Optional[Dict]:
+        return next((a for a in await self.list_attachments(message_id) if a["partId"] == part_id), None)
+
+    async def open_attachment(self, message_id: str, attachment_id: str) -> AttachmentStream:
+        """Start an ``attachments.get`` download and return its decoded stream.
+
+        ``googleapiclient`` would read the whole base64 response into memory,
+        so the request it builds is sent with httpx instead and decoded
+        incrementally. Errors are raised as ``HttpError`` before any data is
+        returned.
+        """
+        uri = self.service.users().messages().attachments().get(
+            userId='me', messageId=message_id, id=attachment_id, fields="data"
+        ).uri
+        client = httpx.AsyncClient(timeout=DOWNLOAD_TIMEOUT_SECONDS)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            for refresh in (False, True):
+                headers = await run_blocking(self._authorize, uri, refresh)
+                response = await client.send(client.build_request("GET", uri, headers=headers), stream=True)
+                if response.status_code != 401 or refresh:
+                    break
+                await response.aclose()
+            if response.status_code >= 400:
+                status = str(response.status_code)
+                content = await response.aread()
+                await response.aclose()
+                raise HttpError(httplib2.Response({"status": response.status_code}), content, uri=uri)
+        except BaseException:
+            await client.aclose()
+            status = "error" if status == "ok" else status
+            raise
+        finally:
+            GMAIL_REQUEST_SECONDS.observe(time.perf_counter() - start, "gmail.users.messages.attachments.get", status)
+        return AttachmentStream(response, client, settings.GMAIL_ATTACHMENT_CHUNK_BYTES)
+
+    def _authorize(self, uri: str, refresh: bool = False) -> Dict[str, str]:
+        """Authorization headers for a request sent outside ``googleapiclient``."""
+        request = Request(self._http().http)
+        if refresh:
+            self.credentials.refresh(request)
+        headers: Dict[str, str] = {}
+        self.credentials.before_request(request, "GET", uri, headers)
+        return headers
+
+    async def search_emails(self, query: str, limit: int = 20) -> List[Dict]:
+        """Messages matching ``query`` in the local full-text index, best first.
+
+        The index holds the messages this service has fetched; a user with
+        nothing indexed yet gets the newest ``SEARCH_INDEX_BACKFILL_MESSAGES``
+        indexed first.
+        """
+        if self.search_index is None:
+            raise RuntimeError("Search index is disabled")
+        await self._backfill(self.search_index)
+        return await run_blocking(self.search_index.search, self.user_email, query, limit)
+
+    async def find_relevant_emails(self, question: str, limit: int = 5) -> List[Dict]:
+        """Messages closest in meaning to ``question`` in the vector index,
+        each with its cosine ``score``; backfilled like ``search_emails``."""
+        if self.vector_index is None:
+            raise RuntimeError("Vector index is disabled")
+        await self._backfill(self.vector_index)
+        return await run_blocking(self.vector_index.search, self.user_email, question, limit)
+
+    async def _backfill(self, index) -> None:
+        if settings.SEARCH_INDEX_BACKFILL_MESSAGES and not await run_blocking(index.count, self.user_email):
+            await self.index_mailbox(settings.SEARCH_INDEX_BACKFILL_MESSAGES)
+
+    @property
+    def _indexes(self) -> List:
+        return [index for index in (self.search_index, self.vector_index) if index is not None]
+
+    async def index_mailbox(self, max_messages: int) -> int:
+        """Index the newest ``max_messages`` INBOX messages that are not
+        indexed yet; returns how many were listed.
+
+        With ``SEARCH_INDEX_BODIES`` the messages are fetched in full so
+        their bodies are searchable, not just their snippets.
+        """
+        fetch = FETCH_MODES["full"] if self._index_bodies else self._list_fetch
+        listed, page_token = 0, None
+        while listed < max_messages:
+            message_ids, page_token = await self.list_email_ids(min(500, max_messages - listed), page_token)
+            indexed = await run_blocking(self._indexed, message_ids)
+            await self._index(await self._get_messages([m for m in message_ids if m not in indexed], **fetch))
+            listed += len(message_ids)
+            if not page_token or not message_ids:
+                break
+        return listed
+
+    def _indexed(self, message_ids: List[str]) -> set:
+        """Ids already present in every enabled index (with their body in
+        the search index when ``SEARCH_INDEX_BODIES`` is on)."""
+        indexed = set(message_ids)
+        for index in self._indexes:
+            if index is self.search_index and self._index_bodies:
+                indexed &= index.has_messages(self.user_email, message_ids, with_body=True)
+            else:
+                indexed &= index.has_messages(self.user_email, message_ids)
+        return indexed
+
+    @property
+    def _index_bodies(self) -> bool:
+        return self.search_index is not None and settings.SEARCH_INDEX_BODIES
+
+    async def _index(self, messages: List[Dict]) -> None:
+        """Add fetched ``messages.get`` responses to the search and vector indexes.
+
+        Body decoding, FTS5 inserts and embedding block, so like the Gmail
+        calls they run on the Gmail executor instead of the event loop.
+        """
+        if self._indexes and messages:
+            await run_blocking(self._add_to_indexes, messages)
+
+    def _add_to_indexes(self, messages: List[Dict]) -> None:
+        rows = [
+            {**self._to_store_row(msg_data), "body": self._indexed_body(msg_data.get("payload", {}))}
+            for msg_data in messages
+        ]
+        for index in self._indexes:
+            index.add(self.user_email, rows)
+
+    async def _unindex(self, message_ids) -> None:
+        if message_ids and self._indexes:
+            await run_blocking(self._remove_from_indexes, list(message_ids))
+
+    def _remove_from_indexes(self, message_ids: List[str]) -> None:
+        for index in self._indexes:
+            index.remove(self.user_email, message_ids)
+
+    @staticmethod
+    def _iter_parts(payload: Dict):
+        """Every MIME part of a message payload, breadth first."""
+        parts = [payload]
+        while parts:
+            part = parts.pop(0)
+            parts.extend(part.get("parts", []))
+            yield part
+
+    @classmethod
+    def _indexed_body(cls, payload: Dict) -> Optional[str]:
+        """The body of a ``full`` format payload; None for metadata fetches,
+        whose payload only carries headers, so the index keeps the snippet."""
+        if "body" not in payload and "parts" not in payload:
+            return None
+        return cls._extract_body(payload)
+
+    @classmethod
+    def _extract_body(cls, payload: Dict) -> str:
+        """Return the text/plain body, falling back to text/html."""
+        bodies: Dict[str, str] = {}
+        for part in cls._iter_parts(payload):
+            mime_type = part.get("mimeType", "")
+            data = part.get("body", {}).get("data")
+            if data and mime_type in ("text/plain", "text/html") and mime_type not in bodies:
+                bodies[mime_type] = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)).decode("utf-8", errors="replace")
+        return bodies.get("text/plain") or bodies.get("text/html", "")
+
+    def _new_batch(self, callback) -> BatchHttpRequest:
+        if settings.GMAIL_API_ENDPOINT:
+            # The discovery document hardcodes the public batch URI, so point
+            # batches at the overridden endpoint explicitly.
+            return BatchHttpRequest(callback=callback, batch_uri=urljoin(settings.GMAIL_API_ENDPOINT, "batch"))
+        return self.service.new_batch_http_request(callback=callback)
+
+    async def _get_messages(self, message_ids: List[str], **get_kwargs) -> List[Dict]:
+        """Fetch many messages through the Gmail batch endpoint."""
+        return await self._batch_get(
+            lambda message_id: self.service.users().messages().get(userId='me', id=message_id, **get_kwargs),
+            message_ids
+        )
+
+    async def _batch_get(self, make_request: Callable[[str], HttpRequest], ids: List[str]) -> List[Dict]:
+        """Run ``make_request(id)`` for every id through the batch endpoint.
+
+        One HTTP round-trip is made per ``GMAIL_BATCH_SIZE`` ids instead of one
+        per resource, and up to ``GMAIL_BATCH_CONCURRENCY`` batches of this
+        service run at once on the executor. Results
+        keep the order of ``ids``; entries that fail inside a batch are retried
+        with plain calls under the same bound, backing off while Gmail
+        throttles them, and resources that no longer exist are left out.
+        """
+        results: Dict[str, Dict] = {}
+        failed: Dict[str, Exception] = {}
+
+        def on_response(request_id: str, response: Optional[Dict], exception: Optional[Exception]):
+            if isinstance(exception, HttpError) and exception.resp.status == 404:
+                return
+            if exception is not None:
+                logger.warning(f"Batched fetch of {request_id} failed: {exception}")
+                failed[request_id] = exception
+            else:
+                results[request_id] = response
+
+        unique_ids = list(dict.fromkeys(ids))
+        batch_size = max(1, settings.GMAIL_BATCH_SIZE)
+        batches = []
+        for start in range(0, len(unique_ids), batch_size):
+            batch = self._new_batch(on_response)
+            for resource_id in unique_ids[start:start + batch_size]:
+                batch.add(make_request(resource_id), request_id=resource_id)
+            batches.append(batch)
+        if self._batch_slots is None:
+            self._batch_slots = asyncio.Semaphore(max(1, settings.GMAIL_BATCH_CONCURRENCY))
+
+        async def execute(batch: BatchHttpRequest) -> None:
+            async with self._batch_slots:
+                await self._timed("batch", lambda: batch.execute(http=self._http()))
+
+        await asyncio.gather(*(execute(batch) for batch in batches))
+
+        async def retry(resource_id: str, error: Exception) -> Optional[Dict]:
+            # Other failures get one plain call; throttling is waited out.
+            attempts = 0
+            while True:
+                if is_retryable(error):
+                    if attempts >= settings.GMAIL_FETCH_MAX_RETRIES:
+                        raise error
+                    await asyncio.sleep(backoff_delay(error, attempts + 1, settings.GMAIL_FETCH_BACKOFF_SECONDS))
+                elif attempts:
+                    raise error
+                attempts += 1
+                async with self._batch_slots:
+                    try:
+                        return await self._execute(make_request(resource_id))
+                    except HttpError as e:
+                        if e.resp.status == 404:
+                            return None
+                        error = e
+
+        if failed:
+            retried = await asyncio.gather(*(retry(resource_id, error) for resource_id, error in failed.items()))
+            results.update(zip(failed, retried))
+
+        return [results[resource_id] for resource_id in ids if results.get(resource_id) is not None]
+
+    async def list_threads(self, page_size: int = 20, page_token: Optional[str] = None) -> Dict:
+        """One page of INBOX threads with their messages' headers.
+
+        Threads already in the header index at the same ``historyId`` are
+        served from it; the rest are fetched with batched ``threads.get``
+        calls in ``metadata`` format.
+        """
+        response = await self._execute(self.service.users().threads().list(
+            userId='me', maxResults=page_size, labelIds=['INBOX'], pageToken=page_token
+        ))
+        listed = response.get("threads", [])
+        threads = {t["id"]: self.header_index.get(self.user_email, t["id"], t.get("historyId")) for t in listed}
+        stale = [thread_id for thread_id, thread in threads.items() if thread is None]
+        for thread_data in await self._get_threads(stale):
+            threads[thread_data["id"]] = self.header_index.put(self.user_email, thread_data)
+        return {
+            "threads": [summarize_thread(threads[t["id"]]) for t in listed if threads.get(t["id"])],
+            "nextPageToken": response.get("nextPageToken")
+        }
+
+    async def get_thread(self, thread_id: str) -> Dict:
+        """A thread with the parsed headers of every message, oldest first.
+
+        The indexed copy is served only when a ``fields=historyId`` lookup
+        shows the thread has not changed since it was fetched.
+        """
+        current = await self._execute(self.service.users().threads().get(
+            userId='me', id=thread_id, format='minimal', fields='historyId'
+        ))
+        thread = self.header_index.get(self.user_email, thread_id, current.get("historyId"))
+        if thread is None:
+            thread_data = await self._execute(self.service.users().threads().get(
+                userId='me', id=thread_id, **THREAD_FETCH
+            ))
+            thread = self.header_index.put(self.user_email, thread_data)
+        return {**summarize_thread(thread), "messages": thread["messages"]}
+
+    async def _get_threads(self, thread_ids: List[str]) -> List[Dict]:
+        return await self._batch_get(
+            lambda thread_id: self.service.users().threads().get(userId='me', id=thread_id, **THREAD_FETCH),
+            thread_ids
+        )
+
+    @staticmethod
+    def _parse_message(msg_data: Dict) -> Dict:
+        snippet = msg_data.get("snippet", "No preview available")
+        headers = msg_data.get("payload", {}).get("headers", [])
+        subject = next(
+            (header.get("value", "No Subject") for header in headers if header.get("name", "").lower() == "subject"),
+            "No Subject"
+        )
+        sender = next(
+            (header.get("value", "Unknown") for header in headers if header.get("name", "").lower() == "from"),
+            "Unknown"
+        )
+        date = next(
+            (header.get("value", "") for header in headers if header.get("name", "").lower() == "date"),
+            ""
+        )
+        return {
+            "id": msg_data.get("id"),
+            "threadId": msg_data.get("threadId"),
+            "snippet": html.unescape(snippet),
+            "subject": html.unescape(subject),
+            "sender": html.unescape(sender),
+            "date": html.unescape(date)
+        }
+
+    @classmethod
+    def _to_store_row(cls, msg_data: Dict) -> Dict:
+        return {
+            **cls._parse_message(msg_data),
+            "labelIds": msg_data.get("labelIds", []),
+            "internalDate": msg_data.get("internalDate"),
+            "historyId": msg_data.get("historyId")
+        }
+
+    async def send_email(
+        self,
+        to: Union[str, Sequence[str]],
+        subject: str,
+        body: str,
+        cc: Optional[Sequence[str]] = None,
+        bcc: Optional[Sequence[str]] = None,
+        attachments: Sequence[Attachment] = ()
+    ) -> Dict:
+        with self._create_message(to, subject, body, cc=cc, bcc=bcc, attachments=attachments) as message:
+            size = message.tell()
+            message.seek(0)
+            messages = self.service.users().messages()
+            if size <= settings.GMAIL_SEND_INLINE_MAX_BYTES:
+                request = messages.send(userId="me", body={"raw": base64.urlsafe_b64encode(message.read()).decode()})
+            else:
+                # The upload endpoint takes the message as is, in chunks, so
+                # neither it nor its base64 form is ever held in memory.
+                request = self._upload_request(messages.send(userId="me", media_body=MediaIoBaseUpload(
+                    message, mimetype="message/rfc822", chunksize=settings.GMAIL_UPLOAD_CHUNK_BYTES, resumable=True
+                )))
+            return await self._execute(request)
+
+    def _upload_request(self, request: HttpRequest) -> HttpRequest:
+        if settings.GMAIL_API_ENDPOINT:
+            # googleapiclient only swaps the host of upload URIs for an
+            # overridden endpoint; take its scheme too.
+            scheme = urlparse(settings.GMAIL_API_ENDPOINT).scheme
+            request.uri = urlparse(request.uri)._replace(scheme=scheme).geturl()
+        return request
+
+    def _create_message(
+        self,
+        to: Union[str, Sequence[str]],
+        subject: str,
+        body: str,
+        cc: Optional[Sequence[str]] = None,
+        bcc: Optional[Sequence[str]] = None,
+        attachments: Sequence[Attachment] = ()
+    ) -> BinaryIO:
+        """The MIME message in a temporary file positioned at its end; it stays
+        in memory up to ``GMAIL_SEND_INLINE_MAX_BYTES``."""
+        message = tempfile.SpooledTemporaryFile(max_size=settings.GMAIL_SEND_INLINE_MAX_BYTES)
+        for chunk in iter_mime_message(to, subject, body, cc=cc, bcc=bcc, attachments=attachments):
+            message.write(chunk)
+        return message
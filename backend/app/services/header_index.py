@@ -0,0 +1,105 @@
+import html
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from ..core.config import settings
+
+# Headers kept per message; enough to render a conversation and to thread
+# replies without the message bodies.
+THREAD_HEADERS = ['From', 'To', 'Date', 'Subject', 'Message-ID', 'References']
+_HEADER_KEYS = {
+    'from': 'sender',
+    'to': 'to',
+    'date': 'date',
+    'subject': 'subject',
+    'message-id': 'messageId',
+    'references': 'references'
+}
+
+
+def parse_headers(msg_data: Dict) -> Dict:
+    """Index entry for one ``format=metadata`` message resource."""
+    entry = {
+        "id": msg_data.get("id"),
+        "threadId": msg_data.get("threadId"),
+        "snippet": html.unescape(msg_data.get("snippet", "")),
+        "labelIds": msg_data.get("labelIds", []),
+        "internalDate": int(msg_data.get("internalDate") or 0),
+        "sender": "Unknown",
+        "to": "",
+        "date": "",
+        "subject": "No Subject",
+        "messageId": None,
+        "references": []
+    }
+    for header in msg_data.get("payload", {}).get("headers", []):
+        key = _HEADER_KEYS.get(header.get("name", "").lower())
+        if key is None:
+            continue
+        value = html.unescape(header.get("value", ""))
+        entry[key] = value.split() if key == "references" else value
+    return entry
+
+
+def summarize_thread(thread: Dict) -> Dict:
+    """List-view row for an indexed thread."""
+    messages = thread["messages"]
+    first, last = messages[0], messages[-1]
+    participants = list(dict.fromkeys(message["sender"] for message in messages))
+    return {
+        "id": thread["id"],
+        "historyId": thread["historyId"],
+        "subject": first["subject"],
+        "snippet": last["snippet"],
+        "participants": participants,
+        "messageCount": len(messages),
+        "date": last["date"],
+        "unread": any("UNREAD" in message["labelIds"] for message in messages)
+    }
+
+
+class HeaderIndex:
+    """Process-wide LRU of parsed thread headers, partitioned by user.
+
+    Threads are stored with the ``historyId`` they were fetched at, so a
+    listing only has to re-fetch threads whose ``historyId`` changed and a
+    thread view can be rendered without fetching its messages again.
+    """
+
+    def __init__(self, max_threads: int = 5000):
+        self.max_threads = max_threads
+        self._threads: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user: str, thread_id: str, history_id: Optional[str] = None) -> Optional[Dict]:
+        """The indexed thread, or None when missing or older than ``history_id``."""
+        with self._lock:
+            thread = self._threads.get((user, thread_id))
+            if thread is None or (history_id is not None and int(thread["historyId"]) < int(history_id)):
+                return None
+            self._threads.move_to_end((user, thread_id))
+            return thread
+
+    def put(self, user: str, thread_data: Dict) -> Dict:
+        messages = sorted(
+            (parse_headers(msg_data) for msg_data in thread_data.get("messages", [])),
+            key=lambda message: message["internalDate"]
+        )
+        thread = {"id": thread_data["id"], "historyId": str(thread_data.get("historyId", "0")), "messages": messages}
+        with self._lock:
+            self._threads[(user, thread["id"])] = thread
+            self._threads.move_to_end((user, thread["id"]))
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        return thread
+
+    def discard(self, user: str, thread_id: str) -> None:
+        with self._lock:
+            self._threads.pop((user, thread_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._threads.clear()
+
+
+header_index = HeaderIndex(max_threads=settings.HEADER_INDEX_MAX_THREADS)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import httpx
+from loguru import logger
+from ..core.config import settings
+
+# Raises when the dependency is unavailable.
+Check = Callable[[], Awaitable[None]]
+
+
+def http_check(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    healthy: Callable[[int], bool] = lambda status: status < 500
+) -> Check:
+    """A check that GETs ``url`` and accepts the status codes ``healthy`` allows."""
+    async def check() -> None:
+        response = await client.get(url, headers=headers)
+        if not healthy(response.status_code):
+            raise RuntimeError(f"HTTP {response.status_code} from {url}")
+    return check
+
+
+class HealthProber:
+    """Checks downstream dependencies in the background and caches the result.
+
+    Every ``interval_seconds`` all checks run concurrently, each bounded by
+    ``timeout_seconds``. ``snapshot`` only reads the last results, so health
+    endpoints cost nothing downstream however often they are polled. A result
+    older than ``stale_after_seconds`` (three intervals by default) no longer
+    counts as healthy.
+    """
+
+    def __init__(
+        self,
+        checks: Dict[str, Check],
+        interval_seconds: float = 30,
+        timeout_seconds: float = 5,
+        stale_after_seconds: Optional[float] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.checks = checks
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stale_after_seconds = stale_after_seconds or 3 * interval_seconds
+        self._http_client = http_client
+        self._clock = clock
+        self._results: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_check(self, name: str, check: Check) -> None:
+        start = self._clock()
+        try:
+            await asyncio.wait_for(check(), self.timeout_seconds)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        if error is not None and self._results.get(name, {}).get("error") != error:
+            logger.warning(f"Health check {name} failed: {error}")
+        self._results[name] = {"checked_at": self._clock(), "latency": self._clock() - start, "error": error}
+
+    async def run_once(self) -> None:
+        await asyncio.gather(*(self._run_check(name, check) for name, check in self.checks.items()))
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self.checks and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+    def snapshot(self) -> Dict:
+        """Overall status plus, per check, its status, age and latency.
+
+        The overall status is ``healthy`` when every check passed recently,
+        ``starting`` until each check has run once, ``stale`` when a result
+        is too old and ``unhealthy`` when a check failed.
+        """
+        now = self._clock()
+        checks = {}
+        for name in self.checks:
+            result = self._results.get(name)
+            if result is None:
+                checks[name] = {"status": "pending"}
+                continue
+            age = now - result["checked_at"]
+            check = {
+                "status": "error" if result["error"] else "stale" if age > self.stale_after_seconds else "ok",
+                "age_seconds": round(age, 3),
+                "latency_ms": round(result["latency"] * 1000, 1)
+            }
+            if result["error"]:
+                check["error"] = result["error"]
+            checks[name] = check
+        statuses = {check["status"] for check in checks.values()}
+        if "error" in statuses:
+            status = "unhealthy"
+        elif "pending" in statuses:
+            status = "starting"
+        elif "stale" in statuses:
+            status = "stale"
+        else:
+            status = "healthy"
+        return {"status": status, "checks": checks}
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot()["status"] == "healthy"
+
+
+def create_health_prober() -> HealthProber:
+    """Prober for Groq, Gmail discovery and the Google token endpoint.
+
+    None of the checks spends quota: Groq is asked for its model list, the
+    token endpoint only has to answer (a GET is refused with a 4xx).
+    """
+    if not settings.HEALTH_PROBE_ENABLED:
+        return HealthProber({})
+    client = httpx.AsyncClient(timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+    checks = {
+        "groq_api": http_check(
+            client,
+            settings.HEALTH_GROQ_URL,
+            headers={"Authorization": f"Bearer {settings.GROQ_API_KEY}"},
+            healthy=lambda status: status == 200
+        ),
+        "gmail_discovery": http_check(client, settings.HEALTH_GMAIL_DISCOVERY_URL, healthy=lambda status: status == 200),
+        "google_token_endpoint": http_check(client, settings.HEALTH_TOKEN_ENDPOINT_URL)
+    }
+    return HealthProber(
+        checks,
+        interval_seconds=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+        timeout_seconds=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+        http_client=client
+    )
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+from loguru import logger
+from ..core.config import settings
+
+
+class _UserState:
+    def __init__(self, gmail_service):
+        self.service = gmail_service
+        self.history_id: Optional[int] = None
+        self.watch_expires_at = 0.0
+        self.subscribers: List[asyncio.Queue] = []
+        self.lock = asyncio.Lock()
+        self.syncing = False
+        self.dirty = False
+
+
+class InboxPushHub:
+    """Turns Gmail push notifications into inbox updates for connected clients.
+
+    ``subscribe`` registers a ``users.watch`` on ``topic_name`` for the user
+    (renewed ``renew_before_seconds`` before it expires) and yields events.
+    ``notify`` is fed by the Pub/Sub webhook: it applies the history delta
+    since the user's last ``historyId`` once, in the background, and fans
+    the result out to every subscriber of that user. Notifications that
+    arrive while a sync is running are coalesced into one follow-up sync.
+    """
+
+    def __init__(
+        self,
+        topic_name: str,
+        renew_before_seconds: float = 86400,
+        heartbeat_seconds: float = 30,
+        queue_size: int = 100,
+        clock: Callable[[], float] = time.time
+    ):
+        self.topic_name = topic_name
+        self.renew_before_seconds = renew_before_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.queue_size = queue_size
+        self._clock = clock
+        self._users: Dict[str, _UserState] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters = {"notifications": 0, "ignored": 0, "syncs": 0, "events": 0, "dropped": 0, "resyncs": 0}
+
+    async def register(self, gmail_service) -> _UserState:
+        state = self._users.get(gmail_service.user_email)
+        if state is None:
+            state = self._users[gmail_service.user_email] = _UserState(gmail_service)
+        # The newest service carries the freshest credentials.
+        state.service = gmail_service
+        async with state.lock:
+            if state.watch_expires_at - self._clock() < self.renew_before_seconds:
+                response = await gmail_service.watch(self.topic_name)
+                state.watch_expires_at = int(response["expiration"]) / 1000
+                if state.history_id is None:
+                    state.history_id = int(response["historyId"])
+        return state
+
+    async def subscribe(self, gmail_service) -> AsyncIterator[Dict]:
+        """Yield ``subscribed`` then ``inbox``/``resync`` events, with ``ping``
+        heartbeats (which also renew the watch) while the mailbox is quiet."""
+        user = gmail_service.user_email
+        state = await self.register(gmail_service)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        state.subscribers.append(queue)
+        try:
+            yield {"event": "subscribed", "data": {"historyId": state.history_id}}
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    await self.register(gmail_service)
+                    yield {"event": "ping", "data": {"historyId": state.history_id}}
+        finally:
+            state.subscribers.remove(queue)
+            if not state.subscribers and self._users.get(user) is state:
+                # Gmail lets an unused watch lapse on its own.
+                del self._users[user]
+
+    async def notify(self, email: str, history_id: int) -> bool:
+        """Handle one Pub/Sub notification; False when nobody is listening."""
+        self.counters["notifications"] += 1
+        state = self._users.get(email)
+        if state is None or (state.history_id is not None and history_id <= state.history_id):
+            self.counters["ignored"] += 1
+            return False
+        if state.syncing:
+            state.dirty = True
+            return True
+        state.syncing = True
+        task = asyncio.create_task(self._sync(state))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def drain(self) -> None:
+        """Wait for in-flight syncs (used by tests and on shutdown)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _sync(self, state: _UserState) -> None:
+        async with state.lock:
+            while True:
+                state.dirty = False
+                self.counters["syncs"] += 1
+                try:
+                    changes = await state.service.get_history_changes(state.history_id)
+                    if changes is None:
+                        self.counters["resyncs"] += 1
+                        state.history_id = await state.service.get_history_id()
+                        self._publish(state, {"event": "resync", "data": {"historyId": state.history_id}})
+                    else:
+                        state.history_id = changes["historyId"]
+                        if changes["added"] or changes["deleted"] or changes["labelsChanged"]:
+                            self._publish(state, {"event": "inbox", "data": changes})
+                except Exception as e:
+                    logger.error(f"Failed to apply push notification for {state.service.user_email}: {e}")
+                if not state.dirty:
+                    state.syncing = False
+                    break
+
+    def _publish(self, state: _UserState, event: Dict) -> None:
+        for queue in state.subscribers:
+            self.counters["events"] += 1
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A client that cannot keep up reloads instead of getting a gap.
+                self.counters["dropped"] += queue.qsize()
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"event": "resync", "data": {"historyId": state.history_id}})
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.counters,
+            "users": len(self._users),
+            "subscribers": sum(len(state.subscribers) for state in self._users.values())
+        }
+
+
+def create_inbox_push_hub() -> InboxPushHub:
+    return InboxPushHub(
+        settings.PUBSUB_TOPIC_NAME,
+        heartbeat_seconds=settings.PUSH_HEARTBEAT_SECONDS,
+        queue_size=settings.PUSH_SUBSCRIBER_QUEUE_SIZE
+    )
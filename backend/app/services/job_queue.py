@@ -0,0 +1,327 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+from loguru import logger
+from ..core.config import settings
+
+FINAL_STATES = {"succeeded", "failed", "cancelled"}
+
+Work = Callable[[], Awaitable[Any]]
+
+
+class QueueFullError(Exception):
+    """Raised by ``JobQueue.submit`` when a depth limit is reached."""
+
+
+class InMemoryJobStore:
+    """Job records kept in process memory; finished jobs expire after ``ttl_seconds``."""
+
+    def __init__(self, ttl_seconds: float = 3600, clock: Callable[[], float] = time.time):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def _expired(self, job: Dict) -> bool:
+        finished_at = job.get("finished_at")
+        return finished_at is not None and self._clock() - finished_at > self.ttl_seconds
+
+    async def save(self, job: Dict) -> None:
+        self._jobs[job["id"]] = dict(job)
+        self._jobs.move_to_end(job["id"])
+        # Records are saved on every state change, so the oldest ones come first.
+        while self._jobs and self._expired(next(iter(self._jobs.values()))):
+            self._jobs.popitem(last=False)
+
+    async def load(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None or self._expired(job):
+            return None
+        return dict(job)
+
+
+class RedisJobStore:
+    """Job records in Redis, so any API process can answer status polls.
+
+    ``client`` is anything with the ``redis.asyncio`` ``get``/``set`` API.
+    Only the public job record is stored; the queued work and the user's
+    credentials stay in the process that accepted the job.
+    """
+
+    def __init__(self, client, ttl_seconds: float = 3600, prefix: str = "email-agent:job:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def save(self, job: Dict) -> None:
+        await self.client.set(self.prefix + job["id"], json.dumps(job), ex=int(self.ttl_seconds))
+
+    async def load(self, job_id: str) -> Optional[Dict]:
+        raw = await self.client.get(self.prefix + job_id)
+        return json.loads(raw) if raw is not None else None
+
+
+def create_job_store():
+    """Build the store configured by ``JOB_QUEUE_BACKEND``."""
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("JOB_QUEUE_BACKEND=redis requires the 'redis' package") from e
+        return RedisJobStore(redis.from_url(settings.JOB_QUEUE_REDIS_URL), ttl_seconds=settings.JOB_RESULT_TTL_SECONDS)
+    return InMemoryJobStore(ttl_seconds=settings.JOB_RESULT_TTL_SECONDS)
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "avg": self.total / self.count if self.count else 0.0, "max": self.max}
+
+
+class JobQueue:
+    """Bounded in-process worker pool for long-running commands.
+
+    Queued jobs are kept per user and workers take them round-robin across
+    users, so one user submitting many commands cannot starve the others.
+    ``max_depth`` caps queued jobs overall and ``max_per_user`` per user,
+    and a job running longer than ``job_timeout`` seconds is cancelled and
+    marked failed. Every state change is written to ``store`` and pushed to
+    subscribers; a store error is logged and never stops a worker.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        workers: int = 4,
+        max_depth: int = 100,
+        max_per_user: int = 10,
+        poll_interval: float = 0.5,
+        job_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.store = store or InMemoryJobStore()
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_per_user = max_per_user
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self._clock = clock
+        self._pending: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        self._work: Dict[str, Work] = {}
+        self._jobs: Dict[str, Dict] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._watchers: Dict[str, List[asyncio.Queue]] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Condition] = None
+        self.counters = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "timed_out": 0}
+        self.queue_wait = _Timing()
+        self.run_time = _Timing()
+
+    @property
+    def depth(self) -> int:
+        return sum(len(jobs) for jobs in self._pending.values())
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._ready = asyncio.Condition()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, user: str, work: Work, **info) -> Dict:
+        """Queue ``work`` for ``user`` and return the new job record.
+
+        ``info`` is copied into the record (e.g. the command text).
+        """
+        self._ensure_workers()
+        if self.depth >= self.max_depth or len(self._pending.get(user, ())) >= self.max_per_user:
+            self.counters["rejected"] += 1
+            raise QueueFullError("Too many queued jobs, try again later")
+
+        job = {
+            **info,
+            "id": uuid.uuid4().hex,
+            "user": user,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": self._clock(),
+            "started_at": None,
+            "finished_at": None
+        }
+        self._jobs[job["id"]] = job
+        self._work[job["id"]] = work
+        self._pending.setdefault(user, deque()).append(job["id"])
+        self.counters["submitted"] += 1
+        await self._save(job)
+        async with self._ready:
+            self._ready.notify()
+        return dict(job)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else await self.store.load(job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict]:
+        """Yield the job record now and after every state change until it finishes."""
+        watcher: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(job_id, []).append(watcher)
+        try:
+            job = await self.get(job_id)
+            while job is not None:
+                yield job
+                if job["status"] in FINAL_STATES:
+                    return
+                latest = job
+                while latest is not None and latest["status"] == job["status"]:
+                    if job_id in self._jobs or not watcher.empty():
+                        latest = await watcher.get()
+                    else:
+                        # Accepted by another process: all we can see is the store.
+                        await asyncio.sleep(self.poll_interval)
+                        latest = await self.store.load(job_id)
+                job = latest
+        finally:
+            self._watchers[job_id].remove(watcher)
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Latest record after the job finishes or ``timeout`` seconds pass."""
+        job = None
+
+        async def follow():
+            nonlocal job
+            async for job in self.subscribe(job_id):
+                pass
+
+        try:
+            await asyncio.wait_for(follow(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self.store.load(job_id)
+        if job["status"] == "queued":
+            pending = self._pending[job["user"]]
+            pending.remove(job_id)
+            if not pending:
+                del self._pending[job["user"]]
+            await self._finish(job_id, "cancelled")
+        elif job_id in self._running:
+            self._running[job_id].cancel()
+            # The worker records the cancellation once the task unwinds.
+            await self._finished[job_id].wait()
+        return await self.get(job_id)
+
+    def _next_job_id(self) -> str:
+        user, pending = next(iter(self._pending.items()))
+        job_id = pending.popleft()
+        if pending:
+            self._pending.move_to_end(user)
+        else:
+            del self._pending[user]
+        return job_id
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: bool(self._pending))
+                job_id = self._next_job_id()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.exception(f"Worker could not run job {job_id}: {e}")
+
+    async def _run(self, job_id: str) -> None:
+        job = self._jobs[job_id]
+        started_at = self._clock()
+        self.queue_wait.add(started_at - job["created_at"])
+        await self._update(job_id, status="running", started_at=started_at)
+
+        task = asyncio.create_task(self._work.pop(job_id)())
+        self._running[job_id] = task
+        finished = self._finished[job_id] = asyncio.Event()
+        timed_out = False
+        try:
+            # asyncio.wait does not cancel ``task`` if this worker is cancelled.
+            try:
+                await asyncio.wait_for(asyncio.wait({task}), self.job_timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                task.cancel()
+                await asyncio.wait({task})
+            self.run_time.add(self._clock() - started_at)
+            if timed_out:
+                logger.warning(f"Job {job_id} timed out after {self.job_timeout}s")
+                self.counters["timed_out"] += 1
+                await self._finish(job_id, "failed", error=f"Timed out after {self.job_timeout} seconds")
+            elif task.cancelled():
+                await self._finish(job_id, "cancelled")
+            elif task.exception() is not None:
+                logger.warning(f"Job {job_id} failed: {task.exception()}")
+                await self._finish(job_id, "failed", error=str(task.exception()))
+            else:
+                await self._finish(job_id, "succeeded", result=task.result())
+        finally:
+            self._running.pop(job_id, None)
+            del self._finished[job_id]
+            finished.set()
+
+    async def _finish(self, job_id: str, status: str, **changes) -> None:
+        self.counters[status] += 1
+        self._work.pop(job_id, None)
+        await self._update(job_id, status=status, finished_at=self._clock(), **changes)
+        del self._jobs[job_id]
+
+    async def _update(self, job_id: str, **changes) -> None:
+        job = self._jobs[job_id]
+        job.update(changes)
+        await self._save(job)
+        for watcher in self._watchers.get(job_id, []):
+            watcher.put_nowait(dict(job))
+
+    async def _save(self, job: Dict) -> None:
+        # The in-process record stays authoritative: losing the store only
+        # hides the job from other processes.
+        try:
+            await self.store.save(job)
+        except Exception as e:
+            logger.error(f"Could not save job {job['id']} ({job['status']}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "queued": self.depth,
+            "running": len(self._running),
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "queue_wait_seconds": self.queue_wait.as_dict(),
+            "run_seconds": self.run_time.as_dict()
+        }
+
+    async def aclose(self) -> None:
+        tasks = self._worker_tasks + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._loop = None
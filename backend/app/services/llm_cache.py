@@ -0,0 +1,245 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..core.config import settings
+
+Embedder = Callable[[str], Sequence[float]]
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Case- and whitespace-insensitive form used for exact-match keys."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def prompt_key(namespace: str, text: str) -> str:
+    return hashlib.sha256(f"{namespace}\0{normalize_prompt(text)}".encode()).hexdigest()
+
+
+def similarity_namespace(namespace: str, prompt: str) -> str:
+    """Namespace searched by the similarity tier: the numbers in a prompt
+    must match exactly, so "last 5 emails" never reuses "last 50 emails"."""
+    return namespace + "\0" + " ".join(_NUMBER.findall(prompt))
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def most_similar(query: Sequence[float], candidates: List[Tuple[str, List[float]]]) -> Tuple[Optional[str], float]:
+    """Key and cosine similarity of the candidate closest to ``query``,
+    scored in one matrix product instead of a Python loop per candidate."""
+    if not candidates:
+        return None, 0.0
+    matrix = np.asarray([embedding for _, embedding in candidates], dtype=np.float64)
+    vector = np.asarray(query, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    scores = np.divide(matrix @ vector, norms, out=np.zeros(len(candidates)), where=norms > 0)
+    best = int(np.argmax(scores))
+    return candidates[best][0], float(scores[best])
+
+
+class InMemoryCacheBackend:
+    """LRU + TTL store of cached responses held in process memory."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (namespace, value, embedding, created_at)
+        self._entries: "OrderedDict[str, Tuple[str, Any, Optional[List[float]], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._clock() - entry[3] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, namespace: str, value: Any, embedding: Optional[Sequence[float]] = None) -> None:
+        with self._lock:
+            self._entries[key] = (namespace, value, list(embedding) if embedding is not None else None, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def embeddings(self, namespace: str) -> List[Tuple[str, List[float]]]:
+        now = self._clock()
+        with self._lock:
+            return [
+                (key, embedding) for key, (ns, _, embedding, created_at) in self._entries.items()
+                if ns == namespace and embedding is not None and now - created_at <= self.ttl_seconds
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Same contract as ``InMemoryCacheBackend``, persisted in a SQLite file."""
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl_seconds: float = 300, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    embedding TEXT,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS llm_cache_by_namespace ON llm_cache (namespace);
+                CREATE INDEX IF NOT EXISTS llm_cache_by_last_used ON llm_cache (last_used);
+            """)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, namespace: str, value: Any, embedding: Optional[Sequence[float]] = None) -> None:
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, json.dumps(value), json.dumps(list(embedding)) if embedding is not None else None, now, now)
+            )
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def embeddings(self, namespace: str) -> List[Tuple[str, List[float]]]:
+        cutoff = self._clock() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, embedding FROM llm_cache WHERE namespace = ? AND embedding IS NOT NULL AND created_at >= ?",
+                (namespace, cutoff)
+            ).fetchall()
+        return [(key, json.loads(embedding)) for key, embedding in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMResponseCache:
+    """Two-tier cache of LLM results.
+
+    The exact tier matches on a hash of the normalized prompt. When an
+    ``embedder`` is configured, a miss falls back to the most similar cached
+    prompt in the same namespace whose cosine similarity reaches
+    ``similarity_threshold`` and contains the same numbers. Namespaces keep
+    users' entries apart: cached outputs can contain mailbox content, so they
+    are never served across users.
+
+    ``lookup`` and ``store`` block (embedding, SQLite); async callers run
+    them off the event loop.
+    """
+
+    def __init__(self, backend, embedder: Optional[Embedder] = None, similarity_threshold: float = 0.95):
+        self.backend = backend
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+    def lookup(self, namespace: str, prompt: str) -> Optional[Any]:
+        value = self.backend.get(prompt_key(namespace, prompt))
+        if value is not None:
+            self._count("exact_hits")
+            return value
+        if self.embedder is not None:
+            query = self.embedder(normalize_prompt(prompt))
+            best_key, best_score = most_similar(query, self.backend.embeddings(similarity_namespace(namespace, prompt)))
+            if best_key is not None and best_score >= self.similarity_threshold:
+                value = self.backend.get(best_key)
+                if value is not None:
+                    self._count("semantic_hits")
+                    return value
+        self._count("misses")
+        return None
+
+    def store(self, namespace: str, prompt: str, value: Any) -> None:
+        embedding = self.embedder(normalize_prompt(prompt)) if self.embedder is not None else None
+        self.backend.set(prompt_key(namespace, prompt), similarity_namespace(namespace, prompt), value, embedding)
+
+    def skip(self) -> None:
+        """Record a result that was deliberately not cached (side effects)."""
+        self._count("uncacheable")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self.backend),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+
+def create_llm_cache(embedder: Optional[Embedder] = None) -> Optional[LLMResponseCache]:
+    """Build the cache configured by the ``LLM_CACHE_*`` settings."""
+    if settings.LLM_CACHE_BACKEND == "none":
+        return None
+    if embedder is None and settings.LLM_CACHE_EMBEDDER == "hashing":
+        from .vector_index import HashingEmbedder
+        embedder = HashingEmbedder(settings.VECTOR_INDEX_DIM).embed_query
+    if settings.LLM_CACHE_BACKEND == "sqlite":
+        directory = os.path.dirname(settings.LLM_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        backend = SQLiteCacheBackend(
+            settings.LLM_CACHE_PATH,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+        )
+    else:
+        backend = InMemoryCacheBackend(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+        )
+    return LLMResponseCache(backend, embedder=embedder, similarity_threshold=settings.LLM_CACHE_SIMILARITY_THRESHOLD)
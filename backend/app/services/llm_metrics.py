@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from loguru import logger
+from ..core.metrics import LLM_REQUEST_SECONDS, LLM_TOKENS, TOOL_SECONDS
+
+
+def _model_name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+    params = kwargs.get("invocation_params") or {}
+    return str(params.get("model_name") or params.get("model") or (serialized or {}).get("name") or "unknown")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records chat model and tool latencies, and token usage, per run.
+
+    One instance is shared process-wide; runs are matched by ``run_id`` so
+    concurrent requests do not mix their timings.
+    """
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, label: str) -> None:
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), label)
+
+    def _finish(self, run_id: UUID) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        return time.perf_counter() - run[0], run[1]
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, _model_name(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, _model_name(serialized, kwargs))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._finish(run_id)
+        if run is None:
+            return
+        elapsed, model = run
+        LLM_REQUEST_SECONDS.observe(elapsed, model, "ok")
+        prompt_tokens, completion_tokens = self._token_usage(response)
+        if prompt_tokens:
+            LLM_TOKENS.inc(model, "prompt", amount=prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.inc(model, "completion", amount=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._finish(run_id)
+        if run is not None:
+            LLM_REQUEST_SECONDS.observe(run[0], run[1], "error")
+            logger.warning(f"LLM call to {run[1]} failed after {run[0]:.2f}s: {error}")
+
+    @staticmethod
+    def _token_usage(response: LLMResult) -> Tuple[int, int]:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        # Streamed generations report usage on the message instead.
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += metadata.get("input_tokens", 0)
+                completion_tokens += metadata.get("output_tokens", 0)
+        return prompt_tokens, completion_tokens
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, (serialized or {}).get("name") or kwargs.get("name") or "unknown")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._finish(run_id)
+        if run is not None:
+            TOOL_SECONDS.observe(run[0], run[1], "ok")
+            logger.debug(f"Agent tool {run[1]} finished in {run[0]:.3f}s")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._finish(run_id)
+        if run is not None:
+            TOOL_SECONDS.observe(run[0], run[1], "error")
+            logger.warning(f"Agent tool {run[1]} failed after {run[0]:.3f}s: {error}")
+
+
+metrics_callback = MetricsCallbackHandler()
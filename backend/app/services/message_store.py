@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from ..core.config import settings
+
+# Fields returned to API callers, in the shape produced by
+# ``GmailService._parse_message``.
+MESSAGE_FIELDS = ("id", "threadId", "snippet", "subject", "sender", "date")
+
+
+class MessageStore:
+    """SQLite cache of parsed Gmail messages, partitioned by user.
+
+    Besides the messages it keeps, per user, the ``historyId`` the cache is
+    synced to and the ``window_start``: the ``internalDate`` from which every
+    INBOX message is known to be cached. Reads that fit inside the window can
+    be served locally once the history deltas have been applied.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    user TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    thread_id TEXT,
+                    history_id INTEGER,
+                    internal_date INTEGER NOT NULL DEFAULT 0,
+                    label_ids TEXT NOT NULL DEFAULT '[]',
+                    subject TEXT,
+                    sender TEXT,
+                    date TEXT,
+                    snippet TEXT,
+                    PRIMARY KEY (user, id)
+                );
+                CREATE INDEX IF NOT EXISTS messages_by_date ON messages (user, internal_date DESC);
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    user TEXT PRIMARY KEY,
+                    history_id INTEGER,
+                    window_start INTEGER
+                );
+            """)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_sync_state(self, user: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT history_id, window_start FROM sync_state WHERE user = ?", (user,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set_sync_state(self, user: str, history_id: Optional[int] = None, window_start: Optional[int] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sync_state (user, history_id, window_start) VALUES (?, ?, ?)
+                ON CONFLICT(user) DO UPDATE SET
+                    history_id = COALESCE(excluded.history_id, history_id),
+                    window_start = COALESCE(excluded.window_start, window_start)
+                """,
+                (user, history_id, window_start)
+            )
+
+    def reset(self, user: str) -> None:
+        """Forget everything cached for ``user`` (e.g. after a history gap)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE user = ?", (user,))
+            self._conn.execute("DELETE FROM sync_state WHERE user = ?", (user,))
+
+    def upsert_messages(self, user: str, messages: Iterable[Dict]) -> None:
+        rows = [
+            (
+                user, m["id"], m.get("threadId"), int(m.get("historyId") or 0), int(m.get("internalDate") or 0),
+                json.dumps(m.get("labelIds") or []), m.get("subject"), m.get("sender"), m.get("date"), m.get("snippet")
+            )
+            for m in messages
+        ]
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO messages
+                    (user, id, thread_id, history_id, internal_date, label_ids, subject, sender, date, snippet)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+
+    def delete_messages(self, user: str, message_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM messages WHERE user = ? AND id = ?", [(user, message_id) for message_id in message_ids]
+            )
+
+    def set_labels(self, user: str, message_id: str, label_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE messages SET label_ids = ? WHERE user = ? AND id = ?",
+                (json.dumps(label_ids), user, message_id)
+            )
+
+    def has_messages(self, user: str, message_ids: Iterable[str]) -> set:
+        ids = list(message_ids)
+        found = set()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT id FROM messages WHERE user = ? AND id IN ({placeholders})", (user, *chunk)
+                ))
+        return found
+
+    def get_messages(self, user: str, message_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Cached messages among ``message_ids``, keyed by id."""
+        ids = list(message_ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._conn.execute(
+                    f"SELECT id, thread_id, snippet, subject, sender, date FROM messages "
+                    f"WHERE user = ? AND id IN ({placeholders})",
+                    (user, *chunk)
+                ):
+                    found[row[0]] = dict(zip(MESSAGE_FIELDS, row))
+        return found
+
+    def get_internal_date(self, user: str, message_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT internal_date FROM messages WHERE user = ? AND id = ?", (user, message_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def recent(self, user: str, limit: int, label: str = "INBOX", since: int = 0) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT messages.id, thread_id, snippet, subject, sender, date
+                FROM messages, json_each(messages.label_ids) AS label
+                WHERE user = ? AND label.value = ? AND internal_date >= ?
+                ORDER BY internal_date DESC, messages.id DESC
+                LIMIT ?
+                """,
+                (user, label, since, limit)
+            ).fetchall()
+        return [dict(zip(MESSAGE_FIELDS, row)) for row in rows]
+
+
+@lru_cache
+def get_message_store() -> Optional[MessageStore]:
+    """Process-wide store, or ``None`` when ``MESSAGE_STORE_PATH`` is unset."""
+    if not settings.MESSAGE_STORE_PATH:
+        return None
+    directory = os.path.dirname(settings.MESSAGE_STORE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return MessageStore(settings.MESSAGE_STORE_PATH)
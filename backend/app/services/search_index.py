@@ -0,0 +1,238 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from ..core.config import settings
+
+# Query prefixes mapped to the indexed columns they restrict to.
+FIELD_PREFIXES = {"from": "sender", "subject": "subject"}
+# Columns searched by terms without a prefix (never ``owner``).
+CONTENT_COLUMNS = "{subject sender text}"
+# bm25 weights of subject, sender, text and owner: a hit in the subject ranks
+# highest; the owner token only scopes the match.
+RANK_WEIGHTS = (4.0, 2.0, 1.0, 0.0)
+
+_QUERY_TERM = re.compile(r'(-)?(?:(\w+):)?("[^"]*"?|\S+)')
+_WORD = re.compile(r"\w+")
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+
+def _fts_string(words: List[str]) -> str:
+    return '"' + " ".join(words) + '"'
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Translate a search box query into an FTS5 ``MATCH`` expression.
+
+    Words are ANDed and prefix-matched (``invo`` finds "invoice");
+    ``"quoted text"`` is an exact phrase, ``from:`` and ``subject:``
+    restrict a term to that field and ``-term`` excludes it. Everything is
+    quoted, so user input can never be an FTS5 syntax error. Returns None
+    when the query has no searchable words.
+    """
+    include, exclude = [], []
+    for negated, field, text in _QUERY_TERM.findall(query):
+        column = FIELD_PREFIXES.get(field.lower())
+        if field and column is None:
+            # "re:budget" is a word, not a field filter.
+            text = f"{field}:{text}"
+        words = _WORD.findall(text)
+        if not words:
+            continue
+        expression = _fts_string(words) + ("" if text.startswith('"') else "*")
+        expression = f"{column or CONTENT_COLUMNS} : {expression}"
+        (exclude if negated else include).append(expression)
+    if not include:
+        return None
+    return " AND ".join(include) + "".join(f" NOT {expression}" for expression in exclude)
+
+
+def _plain_text(body: str) -> str:
+    return _SPACE.sub(" ", _TAG.sub(" ", body)).strip()
+
+
+def owner_token(user: str) -> str:
+    """Single FTS5 token identifying ``user``'s rows inside ``MATCH``."""
+    return hashlib.sha256(user.encode()).hexdigest()[:32]
+
+
+class SearchIndex:
+    """Per-user full-text index of messages in SQLite FTS5.
+
+    Subject, sender and text (the body when the message was fetched in
+    ``full`` format, the snippet otherwise) are indexed. Messages are added
+    as ``GmailService`` fetches them, so the index covers what the user has
+    seen; adding a message again only rewrites its index entry when
+    something changed, and a snippet never replaces an already indexed body.
+    Every row carries its user's ``owner_token`` and queries match on it, so
+    one user's search never ranks another user's rows.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(search_docs)")]
+            if columns and "owner" not in columns:
+                # Derived data: an index without owner tokens is dropped
+                # and backfilled again rather than migrated.
+                self._conn.executescript("""
+                    DROP TABLE IF EXISTS search_fts;
+                    DROP TABLE search_docs;
+                """)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS search_docs (
+                    rowid INTEGER PRIMARY KEY,
+                    user TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    thread_id TEXT,
+                    internal_date INTEGER NOT NULL DEFAULT 0,
+                    date TEXT,
+                    snippet TEXT,
+                    subject TEXT,
+                    sender TEXT,
+                    text TEXT,
+                    has_body INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE (user, id)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                    subject, sender, text, owner,
+                    content='search_docs', content_rowid='rowid',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS search_docs_insert AFTER INSERT ON search_docs BEGIN
+                    INSERT INTO search_fts (rowid, subject, sender, text, owner)
+                    VALUES (new.rowid, new.subject, new.sender, new.text, new.owner);
+                END;
+                CREATE TRIGGER IF NOT EXISTS search_docs_delete AFTER DELETE ON search_docs BEGIN
+                    INSERT INTO search_fts (search_fts, rowid, subject, sender, text, owner)
+                    VALUES ('delete', old.rowid, old.subject, old.sender, old.text, old.owner);
+                END;
+                CREATE TRIGGER IF NOT EXISTS search_docs_update AFTER UPDATE ON search_docs BEGIN
+                    INSERT INTO search_fts (search_fts, rowid, subject, sender, text, owner)
+                    VALUES ('delete', old.rowid, old.subject, old.sender, old.text, old.owner);
+                    INSERT INTO search_fts (rowid, subject, sender, text, owner)
+                    VALUES (new.rowid, new.subject, new.sender, new.text, new.owner);
+                END;
+            """)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, user: str, messages: Iterable[Dict]) -> None:
+        """Index parsed messages (``GmailService`` store rows with a ``body``,
+        which is None when the message was fetched without it)."""
+        owner = owner_token(user)
+        rows = []
+        for m in messages:
+            body = _plain_text(m.get("body") or "")
+            rows.append((
+                user, owner, m["id"], m.get("threadId"), int(m.get("internalDate") or 0), m.get("date"),
+                m.get("snippet"), m.get("subject"), m.get("sender"), body or m.get("snippet") or "",
+                int(m.get("body") is not None)
+            ))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO search_docs
+                        (user, owner, id, thread_id, internal_date, date, snippet, subject, sender, text, has_body)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (user, id) DO UPDATE SET
+                        thread_id = excluded.thread_id,
+                        internal_date = MAX(internal_date, excluded.internal_date),
+                        date = excluded.date,
+                        snippet = excluded.snippet,
+                        subject = excluded.subject,
+                        sender = excluded.sender,
+                        text = CASE WHEN excluded.has_body >= has_body THEN excluded.text ELSE text END,
+                        has_body = MAX(has_body, excluded.has_body)
+                    WHERE excluded.subject IS NOT subject
+                        OR excluded.sender IS NOT sender
+                        OR excluded.snippet IS NOT snippet
+                        OR excluded.has_body > has_body
+                        OR (excluded.has_body = has_body AND excluded.text IS NOT text)
+                    """,
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, user: str, message_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM search_docs WHERE user = ? AND id = ?", [(user, message_id) for message_id in message_ids]
+            )
+
+    def has_messages(self, user: str, message_ids: Iterable[str], with_body: bool = False) -> set:
+        """Ids among ``message_ids`` that are indexed (with their body, if asked)."""
+        ids = list(message_ids)
+        found = set()
+        body_filter = " AND has_body = 1" if with_body else ""
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT id FROM search_docs WHERE user = ? AND id IN ({placeholders}){body_filter}",
+                    (user, *chunk)
+                ))
+        return found
+
+    def count(self, user: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_docs WHERE user = ?", (user,)).fetchone()[0]
+
+    def search(self, user: str, query: str, limit: int = 20) -> List[Dict]:
+        """Best matches for ``query``, most relevant first.
+
+        Rows have the ``get_recent_emails`` fields plus ``match``, the
+        matching passage with hits in ``[brackets]``.
+        """
+        match_query = build_match_query(query)
+        if match_query is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT d.id, d.thread_id, d.snippet, d.subject, d.sender, d.date,
+                       snippet(search_fts, 2, '[', ']', '…', 16)
+                FROM search_fts JOIN search_docs AS d ON d.rowid = search_fts.rowid
+                WHERE search_fts MATCH ? AND d.user = ?
+                ORDER BY bm25(search_fts, {", ".join(map(str, RANK_WEIGHTS))}), d.internal_date DESC
+                LIMIT ?
+                """,
+                (f'owner : "{owner_token(user)}" AND ({match_query})', user, limit)
+            ).fetchall()
+        return [
+            {"id": row[0], "threadId": row[1], "snippet": row[2], "subject": row[3], "sender": row[4],
+             "date": row[5], "match": row[6]}
+            for row in rows
+        ]
+
+
+@lru_cache
+def get_search_index() -> Optional[SearchIndex]:
+    """Process-wide index configured by ``SEARCH_INDEX_*``, or None when disabled."""
+    if settings.SEARCH_INDEX_BACKEND == "none":
+        return None
+    if settings.SEARCH_INDEX_BACKEND == "memory":
+        return SearchIndex()
+    directory = os.path.dirname(settings.SEARCH_INDEX_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return SearchIndex(settings.SEARCH_INDEX_PATH)
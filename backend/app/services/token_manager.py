@@ -0,0 +1,162 @@
+import datetime
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from google.oauth2.credentials import Credentials
+from loguru import logger
+from ..core.config import settings
+from .credential_store import get_credential_store
+
+
+class ManagedCredentials(Credentials):
+    """``Credentials`` whose refreshes go through a ``TokenManager``.
+
+    One instance is shared by every ``GmailService`` and executor thread of a
+    user, so a refreshed access token outlives the request that obtained it.
+    """
+
+    def __init__(self, *args, manager: "TokenManager", **kwargs):
+        super().__init__(*args, **kwargs)
+        self._manager = manager
+        self._refresh_lock = threading.Lock()
+        self.refreshed_at: Optional[float] = None
+        self.credential_id: Optional[str] = None
+
+    def before_request(self, request, method, url, headers):
+        if self._manager.expiring_soon(self):
+            self.refresh(request)
+        super().before_request(request, method, url, headers)
+
+    def refresh(self, request):
+        self._manager.refresh(self, request)
+
+    def _refresh_now(self, request) -> None:
+        super().refresh(request)
+
+
+def _parse_expiry(value) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        expiry = value
+    else:
+        expiry = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    # google-auth compares against naive UTC datetimes.
+    if expiry.tzinfo is not None:
+        expiry = expiry.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return expiry
+
+
+class TokenManager:
+    """Process-wide per-user OAuth credentials with single-flight refresh.
+
+    ``credentials_for`` hands out one shared ``ManagedCredentials`` per user
+    and refresh token. Concurrent refreshes for the same user wait on one
+    lock and reuse the token the first caller obtained; a refresh is also
+    started ``refresh_margin_seconds`` before the known expiry so requests
+    rarely hit a 401 at all.
+    """
+
+    def __init__(
+        self,
+        refresh_margin_seconds: float = 300,
+        coalesce_seconds: float = 5,
+        max_size: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+        on_refresh: Optional[Callable[[ManagedCredentials], None]] = None
+    ):
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self.max_size = max_size
+        self._clock = clock
+        self._on_refresh = on_refresh
+        self._credentials: "OrderedDict[Tuple[str, str], ManagedCredentials]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(user: str, credentials_info: Dict) -> Tuple[str, str]:
+        secret = f"{credentials_info.get('client_id')}\0{credentials_info.get('refresh_token')}"
+        return user, hashlib.sha256(secret.encode()).hexdigest()
+
+    def credentials_for(self, user: str, credentials_info: Dict, credential_id: Optional[str] = None) -> ManagedCredentials:
+        key = self._key(user, credentials_info)
+        with self._lock:
+            credentials = self._credentials.get(key)
+            if credentials is None:
+                credentials = ManagedCredentials(
+                    token=credentials_info.get('token'),
+                    refresh_token=credentials_info.get('refresh_token'),
+                    token_uri=credentials_info.get('token_uri'),
+                    client_id=credentials_info.get('client_id'),
+                    client_secret=credentials_info.get('client_secret'),
+                    scopes=credentials_info.get('scopes'),
+                    expiry=_parse_expiry(credentials_info.get('expiry')),
+                    manager=self
+                )
+                self._credentials[key] = credentials
+                while len(self._credentials) > self.max_size:
+                    self._credentials.popitem(last=False)
+            self._credentials.move_to_end(key)
+            if credential_id:
+                credentials.credential_id = credential_id
+            return credentials
+
+    def expiring_soon(self, credentials: Credentials) -> bool:
+        if credentials.expiry is None:
+            return False
+        remaining = (credentials.expiry - datetime.datetime.utcnow()).total_seconds()
+        return remaining <= self.refresh_margin_seconds
+
+    def refresh(self, credentials: ManagedCredentials, request) -> None:
+        stale_token = credentials.token
+        with credentials._refresh_lock:
+            recently = (
+                credentials.refreshed_at is not None
+                and self._clock() - credentials.refreshed_at < self.coalesce_seconds
+            )
+            if credentials.token != stale_token or recently:
+                # Another request refreshed while this one was waiting or
+                # failing with the old token: reuse its result.
+                with self._lock:
+                    self.coalesced += 1
+                return
+            credentials._refresh_now(request)
+            credentials.refreshed_at = self._clock()
+            with self._lock:
+                self.refreshes += 1
+        logger.info(f"Refreshed OAuth access token, valid until {credentials.expiry}")
+        if self._on_refresh is not None:
+            self._on_refresh(credentials)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"users": len(self._credentials), "refreshes": self.refreshes, "coalesced": self.coalesced}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._credentials.clear()
+            self.refreshes = self.coalesced = 0
+
+
+def persist_refreshed_credentials(credentials: ManagedCredentials) -> None:
+    """Write refreshed tokens back to the credential store for ``cid`` tokens."""
+    if not credentials.credential_id:
+        return
+    store = get_credential_store()
+    stored = store.get(credentials.credential_id)
+    if stored is not None:
+        store.update(credentials.credential_id, {
+            **stored,
+            "token": credentials.token,
+            "expiry": credentials.expiry.isoformat() if credentials.expiry else None
+        })
+
+
+token_manager = TokenManager(
+    refresh_margin_seconds=settings.OAUTH_REFRESH_MARGIN_SECONDS,
+    on_refresh=persist_refreshed_credentials
+)
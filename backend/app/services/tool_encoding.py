@@ -0,0 +1,81 @@
+import json
+import re
+from email.utils import parseaddr
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain_core.agents import AgentAction
+from langchain_core.messages import BaseMessage
+from ..core.config import settings
+
+ELLIPSIS = "…"
+# Tools returning ``{"emails": [...]}`` rows, rendered as a table in compact mode.
+EMAIL_LIST_TOOLS = ("fetch_emails", "search_emails", "find_relevant_emails")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def normalize_sender(sender: str) -> str:
+    """``"Alice <Alice@Example.com>"`` -> ``"alice@example.com"``."""
+    _, address = parseaddr(sender or "")
+    return address.lower() if "@" in address else clean_field(sender)
+
+
+def clean_field(text: Any) -> str:
+    """One table cell: single-line, no column separators."""
+    return re.sub(r"\s+", " ", str(text or "")).replace("|", "/").strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` at a word boundary so it fits ``max_tokens``."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, max_tokens * 4 - 1)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:-") + ELLIPSIS
+
+
+def encode_email_table(emails: Sequence[Dict[str, Any]], snippet_tokens: int = 24) -> str:
+    """Render ``fetch_emails`` rows as a numbered pipe-separated table.
+
+    The row number is the short id the model can refer back to ("the second
+    one"); senders are reduced to their address and snippets are cut to
+    ``snippet_tokens``.
+    """
+    if not emails:
+        return "emails: 0"
+    lines = [f"emails: {len(emails)} (id|from|subject|snippet)"]
+    for index, email in enumerate(emails, start=1):
+        lines.append("|".join((
+            str(index),
+            normalize_sender(email.get("from", "")),
+            clean_field(email.get("subject", "")),
+            truncate_to_tokens(clean_field(email.get("snippet", "")), snippet_tokens)
+        )))
+    return "\n".join(lines)
+
+
+def encode_tool_output(tool: str, observation: Any, output_format: Optional[str] = None) -> str:
+    """The text the agent sees for one tool result.
+
+    ``json`` is what LangChain sends by default; ``compact`` renders email
+    lists as a table and everything else as JSON without padding.
+    """
+    output_format = output_format or settings.TOOL_OUTPUT_FORMAT
+    if isinstance(observation, str):
+        return observation
+    if output_format == "compact":
+        if tool in EMAIL_LIST_TOOLS and isinstance(observation, dict) and "emails" in observation:
+            return encode_email_table(observation["emails"], settings.TOOL_SNIPPET_MAX_TOKENS)
+        return json.dumps(observation, ensure_ascii=False, separators=(",", ":"), default=str)
+    return json.dumps(observation, ensure_ascii=False, default=str)
+
+
+def format_tool_steps(intermediate_steps: Sequence[Tuple[AgentAction, Any]]) -> List[BaseMessage]:
+    """``format_to_openai_tool_messages`` with observations run through the encoder."""
+    return format_to_openai_tool_messages([
+        (action, encode_tool_output(action.tool, observation)) for action, observation in intermediate_steps
+    ])
@@ -0,0 +1,292 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from ..core.config import settings
+
+# Characters of a message that are embedded: subject, sender and text.
+MAX_EMBED_CHARS = 2000
+# Rows scored per matrix product, bounding the temporary score matrix.
+SEARCH_BLOCK_ROWS = 32768
+
+_WORD = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by did do does for from had has have he her his how i if in is it its me my "
+    "of on or our she so that the their them they this to was we were what when where which who why will "
+    "with you your about any can could would should re fwd".split()
+)
+
+
+def message_text(message: Dict) -> str:
+    """The text embedded for a parsed message."""
+    text = "\n".join(filter(None, (
+        message.get("subject"), message.get("sender"), message.get("body") or message.get("snippet")
+    )))
+    return text[:MAX_EMBED_CHARS]
+
+
+class HashingEmbedder(Embeddings):
+    """Deterministic bag-of-words embeddings that need no model or network.
+
+    Words (minus stopwords, with a plural ``s`` stripped) and adjacent word
+    pairs are hashed into ``dim`` signed buckets and the vector is
+    L2-normalized, so cosine similarity rewards shared vocabulary. It is
+    the default and what tests use; any LangChain ``Embeddings`` can be
+    passed to ``VectorIndex`` instead for real semantic matching.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _bucket(feature: str) -> int:
+        return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+
+    def _features(self, text: str) -> List[str]:
+        words = []
+        for word in _WORD.findall(text.lower()):
+            if word in STOPWORDS or (len(word) < 2 and not word.isdigit()):
+                continue
+            words.append(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word)
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = np.fromiter(map(self._bucket, self._features(text)), dtype=np.uint64)
+            vectors[row] = np.bincount(
+                (buckets % self.dim).astype(np.intp),
+                weights=np.where(buckets >> np.uint64(63), 1.0, -1.0),
+                minlength=self.dim
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_many(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_many([text])[0].tolist()
+
+
+class _UserVectors:
+    """One user's matrix of L2-normalized rows and the row <-> id mapping."""
+
+    def __init__(self, matrix: np.ndarray, ids: List[Optional[str]]):
+        self.matrix = matrix
+        self.ids = ids
+        self.rows = {message_id: row for row, message_id in enumerate(ids) if message_id is not None}
+        self.free = [row for row, message_id in enumerate(ids) if message_id is None]
+
+
+class VectorIndex:
+    """Per-user embedding index over parsed messages with cosine top-k search.
+
+    Each user's vectors are float32 rows of one matrix: a ``np.memmap`` file
+    under ``directory`` (process memory when None), grown by doubling, so a
+    search pages in only the matrix and never deserializes vectors. Rows are
+    L2-normalized, making cosine similarity a matrix product, computed in
+    blocks of ``SEARCH_BLOCK_ROWS`` for a batch of queries at once. Row
+    metadata lives in SQLite next to the matrices. Adding a message again
+    only re-embeds it when its text changed; removed rows are reused.
+    """
+
+    def __init__(self, embedder: Optional[Embeddings] = None, directory: Optional[str] = None, initial_capacity: int = 1024):
+        self.embedder = embedder or HashingEmbedder(settings.VECTOR_INDEX_DIM)
+        self.directory = directory
+        self.initial_capacity = initial_capacity
+        self.dim = getattr(self.embedder, "dim", None) or len(self.embedder.embed_query("dimension probe"))
+        self._users: Dict[str, _UserVectors] = {}
+        self._lock = threading.RLock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "vectors.db") if directory else ":memory:",
+            check_same_thread=False,
+            isolation_level=None
+        )
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS vector_rows (
+                    user TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    thread_id TEXT,
+                    subject TEXT,
+                    sender TEXT,
+                    date TEXT,
+                    snippet TEXT,
+                    PRIMARY KEY (user, id)
+                );
+            """)
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        embed_many = getattr(self.embedder, "embed_many", None)
+        if embed_many is not None:
+            return embed_many(texts)
+        vectors = np.asarray(self.embedder.embed_documents(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _path(self, user: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(user.encode()).hexdigest()[:32] + ".f32")
+
+    def _allocate(self, user: str, capacity: int, old: Optional[np.ndarray] = None) -> np.ndarray:
+        if not self.directory:
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            if old is not None:
+                matrix[:len(old)] = old
+            return matrix
+        path = self._path(user)
+        if old is not None:
+            old.flush()
+        with open(path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _user(self, user: str) -> _UserVectors:
+        vectors = self._users.get(user)
+        if vectors is None:
+            rows = self._conn.execute("SELECT row, id FROM vector_rows WHERE user = ?", (user,)).fetchall()
+            size = max((row for row, _ in rows), default=-1) + 1
+            ids: List[Optional[str]] = [None] * size
+            for row, message_id in rows:
+                ids[row] = message_id
+            matrix = self._allocate(user, max(self.initial_capacity, size))
+            vectors = self._users[user] = _UserVectors(matrix, ids)
+        return vectors
+
+    def add(self, user: str, messages: Iterable[Dict]) -> int:
+        """Embed and store parsed messages; returns how many were (re-)embedded."""
+        texts = {}
+        for message in messages:
+            text = message_text(message)
+            texts[message["id"]] = (message, text, hashlib.sha1(text.encode()).hexdigest())
+        if not texts:
+            return 0
+        with self._lock:
+            placeholders = ",".join("?" * len(texts))
+            known = dict(self._conn.execute(
+                f"SELECT id, digest FROM vector_rows WHERE user = ? AND id IN ({placeholders})", (user, *texts)
+            ).fetchall())
+        changed = [entry for message_id, entry in texts.items() if known.get(message_id) != entry[2]]
+        if not changed:
+            return 0
+        embeddings = self._embed([text for _, text, _ in changed])
+
+        with self._lock:
+            vectors = self._user(user)
+            records = []
+            for (message, _, digest), embedding in zip(changed, embeddings):
+                row = vectors.rows.get(message["id"])
+                if row is None:
+                    row = vectors.free.pop() if vectors.free else len(vectors.ids)
+                    if row == len(vectors.ids):
+                        vectors.ids.append(None)
+                    if row >= len(vectors.matrix):
+                        vectors.matrix = self._allocate(user, max(2 * len(vectors.matrix), row + 1), vectors.matrix)
+                    vectors.ids[row] = message["id"]
+                    vectors.rows[message["id"]] = row
+                vectors.matrix[row] = embedding
+                records.append((
+                    user, message["id"], row, digest, message.get("threadId"), message.get("subject"),
+                    message.get("sender"), message.get("date"), message.get("snippet")
+                ))
+            self._conn.executemany("INSERT OR REPLACE INTO vector_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+        return len(changed)
+
+    def remove(self, user: str, message_ids: Iterable[str]) -> None:
+        with self._lock:
+            vectors = self._user(user)
+            for message_id in message_ids:
+                row = vectors.rows.pop(message_id, None)
+                if row is None:
+                    continue
+                vectors.matrix[row] = 0
+                vectors.ids[row] = None
+                vectors.free.append(row)
+                self._conn.execute("DELETE FROM vector_rows WHERE user = ? AND id = ?", (user, message_id))
+
+    def has_messages(self, user: str, message_ids: Iterable[str]) -> set:
+        with self._lock:
+            rows = self._user(user).rows
+            return {message_id for message_id in message_ids if message_id in rows}
+
+    def count(self, user: str) -> int:
+        with self._lock:
+            return len(self._user(user).rows)
+
+    def search(self, user: str, query: str, k: int = 5, min_score: float = 0.0) -> List[Dict]:
+        return self.search_many(user, [query], k, min_score)[0]
+
+    def search_many(self, user: str, queries: Sequence[str], k: int = 5, min_score: float = 0.0) -> List[List[Dict]]:
+        """Top ``k`` messages by cosine similarity for each query, best first.
+
+        Rows have the ``get_recent_emails`` fields plus ``score``; matches
+        scoring at or below ``min_score`` are left out.
+        """
+        if not queries:
+            return []
+        query_vectors = self._embed(queries)
+        with self._lock:
+            vectors = self._user(user)
+            size = len(vectors.ids)
+            best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+            best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+            for start in range(0, size, SEARCH_BLOCK_ROWS):
+                scores = query_vectors @ np.asarray(vectors.matrix[start:min(size, start + SEARCH_BLOCK_ROWS)]).T
+                take = min(k, scores.shape[1])
+                top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+                best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+                best_rows = np.concatenate([best_rows, top + start], axis=1)
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            hits = []
+            for scores, rows in zip(best_scores, best_rows):
+                order = np.lexsort((rows, -scores))
+                hits.append([
+                    (vectors.ids[rows[i]], float(scores[i])) for i in order
+                    if scores[i] > min_score and vectors.ids[rows[i]] is not None
+                ])
+            found = {message_id for query_hits in hits for message_id, _ in query_hits}
+            metadata = {}
+            if found:
+                placeholders = ",".join("?" * len(found))
+                for row in self._conn.execute(
+                    f"SELECT id, thread_id, snippet, subject, sender, date FROM vector_rows "
+                    f"WHERE user = ? AND id IN ({placeholders})",
+                    (user, *found)
+                ):
+                    metadata[row[0]] = {"id": row[0], "threadId": row[1], "snippet": row[2], "subject": row[3],
+                                        "sender": row[4], "date": row[5]}
+        return [
+            [{**metadata[message_id], "score": round(score, 4)} for message_id, score in query_hits]
+            for query_hits in hits
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            for vectors in self._users.values():
+                if isinstance(vectors.matrix, np.memmap):
+                    vectors.matrix.flush()
+            self._users.clear()
+            self._conn.close()
+
+
+@lru_cache
+def get_vector_index() -> Optional[VectorIndex]:
+    """Process-wide index configured by ``VECTOR_INDEX_*``, or None when disabled."""
+    if settings.VECTOR_INDEX_BACKEND == "none":
+        return None
+    if settings.VECTOR_INDEX_BACKEND == "memory":
+        return VectorIndex()
+    return VectorIndex(directory=settings.VECTOR_INDEX_DIR)
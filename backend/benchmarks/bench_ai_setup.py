@@ -0,0 +1,92 @@
+"""Benchmark per-command setup overhead of AIService with a fake LLM.
+
+"before" rebuilds everything per command the way the service used to (new
+ChatGroq client, prompt, tool-calling agent and executor); "after" reuses
+the app-scoped AIService and only binds the Gmail tools.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_ai_setup [--commands 200]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from langchain.agents import AgentExecutor, create_openai_tools_agent  # noqa: E402
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder  # noqa: E402
+from langchain_groq import ChatGroq  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.ai_service import COMMAND_SYSTEM_PROMPT, AIService  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+
+class NullGmailService:
+    async def get_recent_emails(self, limit=10):
+        return []
+
+    async def send_email(self, to, subject, body):
+        return {"id": "sent"}
+
+
+def legacy_setup(gmail_service, llm):
+    """Per-command construction done by the previous interpret_command."""
+    ChatGroq(
+        api_key=settings.GROQ_API_KEY,
+        model_name=settings.GROQ_MODEL_NAME,
+        temperature=settings.GROQ_TEMPERATURE,
+        max_tokens=settings.GROQ_MAX_TOKENS
+    )
+    service = AIService.__new__(AIService)
+    tools = service._create_tools(gmail_service)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", COMMAND_SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad")
+    ])
+    agent = create_openai_tools_agent(llm, tools, prompt)
+    return AgentExecutor(agent=agent, tools=tools)
+
+
+def per_command(fn, commands: int) -> float:
+    start = time.perf_counter()
+    for _ in range(commands):
+        fn()
+    return (time.perf_counter() - start) / commands
+
+
+async def run_commands(make_executor, commands: int) -> float:
+    start = time.perf_counter()
+    for _ in range(commands):
+        await make_executor().ainvoke({"input": "show my emails", "chat_history": []})
+    return (time.perf_counter() - start) / commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=200)
+    args = parser.parse_args()
+
+    llm = FakeChatModel.from_responses(["Done."])
+    gmail_service = NullGmailService()
+    shared = AIService(llm=llm)
+
+    def current_setup():
+        return shared._create_agent_executor(gmail_service)
+
+    before = per_command(lambda: legacy_setup(gmail_service, llm), args.commands)
+    after = per_command(current_setup, args.commands)
+    print(f"setup per command:      before {before * 1e3:8.3f} ms   after {after * 1e3:8.3f} ms   ({before / after:.1f}x)")
+
+    before = asyncio.run(run_commands(lambda: legacy_setup(gmail_service, llm), args.commands))
+    after = asyncio.run(run_commands(current_setup, args.commands))
+    print(f"full command (fake LLM): before {before * 1e3:8.3f} ms   after {after * 1e3:8.3f} ms   ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark peak memory of attachment downloads and sends, streamed vs naive.
+
+A fake Gmail server runs in a child process, so ``tracemalloc`` only sees the
+client. Downloads compare ``attachments().get().execute()`` plus one
+base64 decode with ``open_attachment``; sends compare building the whole
+message with ``MIMEMultipart.as_bytes`` and posting it as ``raw`` with
+``send_email``, which encodes into a spooled file and uploads it in
+resumable chunks.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_attachments [--sizes 1 10 25]
+"""
+import argparse
+import asyncio
+import base64
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.core.config import settings  # noqa: E402
+from app.services.attachments import Attachment  # noqa: E402
+from app.services.gmail_service import GmailService  # noqa: E402
+from conftest import make_user  # noqa: E402
+from fake_gmail import FakeGmailServer  # noqa: E402
+
+MESSAGE_ID = "msg000001"
+
+
+def serve(sizes_mb, urls, stop):
+    with FakeGmailServer(message_count=1) as server:
+        ids = [
+            server.add_attachment(MESSAGE_ID, f"file{size}.bin", os.urandom(size * 1024 * 1024))["body"]["attachmentId"]
+            for size in sizes_mb
+        ]
+        urls.put((server.url, ids))
+        stop.wait()
+
+
+async def measure(fn):
+    """Seconds taken and peak traced MB above the starting point."""
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    await fn()
+    elapsed = time.perf_counter() - start
+    return elapsed, (tracemalloc.get_traced_memory()[1] - base) / 1e6
+
+
+async def run(sizes_mb):
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(sizes_mb, urls, stop), daemon=True)
+    server.start()
+    url, attachment_ids = urls.get()
+    settings.GMAIL_API_ENDPOINT = url
+    service = GmailService(make_user())
+    attachments = service.service.users().messages().attachments()
+    tracemalloc.start()
+
+    print(f"{'size MB':>7}  {'path':<6}  {'naive s':>8}  {'naive MB':>9}  {'stream s':>8}  {'stream MB':>9}")
+    for size, attachment_id in zip(sizes_mb, attachment_ids):
+        async def naive_download():
+            response = await service._execute(attachments.get(userId="me", messageId=MESSAGE_ID, id=attachment_id))
+            data = response["data"]
+            base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+        async def streamed_download():
+            async for _ in await service.open_attachment(MESSAGE_ID, attachment_id):
+                pass
+
+        data = os.urandom(size * 1024 * 1024)
+
+        async def naive_send():
+            message = MIMEMultipart()
+            message.attach(MIMEText("<p>Attached</p>", "html"))
+            message.attach(MIMEApplication(data, Name="file.bin"))
+            message["To"], message["Subject"] = "bob@example.com", "File"
+            raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
+            await service._execute(service.service.users().messages().send(userId="me", body={"raw": raw}))
+
+        async def streamed_send():
+            await service.send_email("bob@example.com", "File", "<p>Attached</p>", attachments=[Attachment("file.bin", data)])
+
+        for path, naive, streamed in (("get", naive_download, streamed_download), ("send", naive_send, streamed_send)):
+            naive_s, naive_mb = await measure(naive)
+            stream_s, stream_mb = await measure(streamed)
+            print(f"{size:>7}  {path:<6}  {naive_s:>8.2f}  {naive_mb:>9.1f}  {stream_s:>8.2f}  {stream_mb:>9.1f}")
+
+    tracemalloc.stop()
+    stop.set()
+    server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 25], help="attachment sizes in MB")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes))
+
+
+if __name__ == "__main__":
+    main()
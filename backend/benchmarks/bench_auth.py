@@ -0,0 +1,63 @@
+"""Benchmark per-request authentication overhead of ``get_current_user``.
+
+Compares a token carrying the full Google credential set with and without
+the verified-token cache, and a short token that references server-side
+credentials by opaque id.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_auth [--requests 20000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.api.deps import get_current_user  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_access_token, verified_token_cache  # noqa: E402
+from app.services.credential_store import CredentialStore  # noqa: E402
+import app.api.deps as deps  # noqa: E402
+from conftest import make_user  # noqa: E402
+
+
+async def per_request(token: str, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await get_current_user(token)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    user = make_user()
+    full_token = create_access_token(user)
+    store = CredentialStore(":memory:", settings.SECRET_KEY)
+    deps.get_credential_store = lambda: store
+    short_token = create_access_token({"sub": user["sub"], "email": user["email"], "cid": store.put(user["email"], user["credentials"])})
+
+    max_size = verified_token_cache.max_size
+    verified_token_cache.max_size = 0
+    uncached = asyncio.run(per_request(full_token, args.requests))
+    verified_token_cache.max_size = max_size
+    cached = asyncio.run(per_request(full_token, args.requests))
+    verified_token_cache.max_size = 0
+    short_uncached = asyncio.run(per_request(short_token, args.requests))
+    verified_token_cache.max_size = max_size
+    short_cached = asyncio.run(per_request(short_token, args.requests))
+
+    print(f"{'token':<34} {'bytes':>6} {'us/request':>11}")
+    print(f"{'full credentials, no cache':<34} {len(full_token):>6} {uncached * 1e6:>11.1f}")
+    print(f"{'full credentials, cached':<34} {len(full_token):>6} {cached * 1e6:>11.1f}")
+    print(f"{'opaque credential id, no cache':<34} {len(short_token):>6} {short_uncached * 1e6:>11.1f}")
+    print(f"{'opaque credential id, cached':<34} {len(short_token):>6} {short_cached * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark bulk sending against a local fake Gmail server.
+
+Compares one-at-a-time ``send_email`` calls with ``BulkSender`` at several
+concurrency levels (rate limit lifted), then shows the throughput the
+configured per-user token bucket allows, with a share of sends answered
+429/503 to exercise the retry path.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_bulk_send [--messages 200] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.core.config import settings  # noqa: E402
+from app.models.email import EmailBase  # noqa: E402
+from app.services.bulk_send import BulkSender, TokenBucket  # noqa: E402
+from app.services.gmail_service import GmailService  # noqa: E402
+from conftest import make_user  # noqa: E402
+from fake_gmail import FakeGmailServer  # noqa: E402
+
+CONCURRENCY = (1, 4, 8, 16)
+
+
+def make_messages(count: int):
+    return [
+        EmailBase(to=[f"to{i}@example.com"], cc=["cc@example.com"], subject=f"Subject {i}", body="Hello")
+        for i in range(count)
+    ]
+
+
+async def sequential(service: GmailService, messages):
+    for message in messages:
+        await service.send_email(to=message.to, subject=message.subject, body=message.body, cc=message.cc)
+
+
+async def bulk(service: GmailService, messages, concurrency: int, limiter: TokenBucket):
+    return await BulkSender(service, limiter=limiter, concurrency=concurrency, backoff_seconds=0.05).send(messages)
+
+
+def report(label: str, count: int, elapsed: float) -> None:
+    print(f"{label:<34} {elapsed:7.2f} s   {count / elapsed:8.1f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round-trip latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="share of sends answered 429/503")
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    unlimited = TokenBucket(rate=1e9, capacity=1e9)
+    with FakeGmailServer(latency=args.latency) as server:
+        settings.GMAIL_API_ENDPOINT = server.url
+        service = GmailService(make_user())
+
+        start = time.perf_counter()
+        asyncio.run(sequential(service, messages))
+        report("sequential send_email", len(messages), time.perf_counter() - start)
+
+        for concurrency in CONCURRENCY:
+            start = time.perf_counter()
+            asyncio.run(bulk(service, messages, concurrency, unlimited))
+            report(f"BulkSender concurrency={concurrency}", len(messages), time.perf_counter() - start)
+
+        burst = settings.GMAIL_SEND_BURST
+        count = burst + int(settings.GMAIL_SEND_RATE_PER_SECOND * 5)
+        failures = int(count * args.error_rate)
+        server.send_failures = [429, 503] * (failures // 2) + [429] * (failures % 2)
+        limiter = TokenBucket(settings.GMAIL_SEND_RATE_PER_SECOND, burst)
+        start = time.perf_counter()
+        results = asyncio.run(bulk(service, messages[:count], settings.GMAIL_SEND_CONCURRENCY, limiter))
+        elapsed = time.perf_counter() - start
+        retries = sum(r["attempts"] - 1 for r in results)
+        sent = sum(1 for r in results if r["status"] == "sent")
+        report(f"rate-limited ({settings.GMAIL_SEND_RATE_PER_SECOND:g}/s, burst {burst})", count, elapsed)
+        print(f"  {sent}/{count} sent, {retries} retries after {failures} injected 429/503 responses")
+
+
+if __name__ == "__main__":
+    main()
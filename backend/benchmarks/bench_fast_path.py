@@ -0,0 +1,55 @@
+"""Benchmark the deterministic command fast path against the LLM agent.
+
+Runs every command of ``tests/command_corpus.py`` through AIService with a
+fake model that sleeps ``--llm-latency`` seconds per call, once with
+``COMMAND_FAST_PATH_ENABLED`` off and once with it on, and reports mean
+latency and the number of model calls.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_fast_path [--rounds 5] [--llm-latency 0.3]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.core.config import settings  # noqa: E402
+from app.services.ai_service import AIService  # noqa: E402
+from command_corpus import FAST_PATH_CORPUS  # noqa: E402
+from conftest import RecordingGmailService  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+
+async def run_corpus(enabled: bool, rounds: int, latency: float):
+    settings.COMMAND_FAST_PATH_ENABLED = enabled
+    llm = FakeChatModel.from_responses(["Done."], latency=latency)
+    service = AIService(llm=llm, response_cache=None)
+    gmail_service = RecordingGmailService()
+    commands = [command for command, _ in FAST_PATH_CORPUS] * rounds
+    start = time.perf_counter()
+    for command in commands:
+        await service.interpret_command(command, gmail_service)
+    return (time.perf_counter() - start) / len(commands), llm.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    matched = sum(1 for _, expected in FAST_PATH_CORPUS if expected is not None)
+    print(f"corpus: {len(FAST_PATH_CORPUS)} commands, {matched} handled by the fast path")
+
+    before, before_calls = asyncio.run(run_corpus(False, args.rounds, args.llm_latency))
+    after, after_calls = asyncio.run(run_corpus(True, args.rounds, args.llm_latency))
+    print(f"mean latency: before {before * 1e3:8.2f} ms   after {after * 1e3:8.2f} ms   ({before / after:.1f}x)")
+    print(f"LLM calls:    before {before_calls:8d}      after {after_calls:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark bytes transferred and parse time for each message fetch mode.
+
+Fetches the same inbox page with ``format=full`` and with the metadata mode
+used by list views, against a local fake Gmail server.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_fetch_modes [--limit 50] [--body-size 20000]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.core.config import settings  # noqa: E402
+from app.services.gmail_service import FETCH_MODES, GmailService  # noqa: E402
+from conftest import make_user  # noqa: E402
+from fake_gmail import FakeGmailServer, render_message  # noqa: E402
+
+
+def parse_time(server: FakeGmailServer, ids, mode: str, repeat: int) -> float:
+    """Time JSON decoding plus ``_parse_message`` for the raw payloads of a mode."""
+    query = parse_qs(urlencode(FETCH_MODES[mode], doseq=True))
+    payloads = [json.dumps(render_message(server.find_message(i), query)) for i in ids]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            GmailService._parse_message(json.loads(payload))
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--body-size", type=int, default=20000, help="bytes of text per MIME part")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with FakeGmailServer(message_count=args.limit, body_size=args.body_size) as server:
+        settings.GMAIL_API_ENDPOINT = server.url
+        service = GmailService(make_user())
+        ids = [m["id"] for m in server.messages[:args.limit]]
+
+        print(f"{args.limit} messages, {args.body_size} bytes per body part")
+        print(f"{'mode':>9} {'bytes':>12} {'bytes/msg':>10} {'fetch ms':>9} {'parse ms':>9}")
+        for mode in ("full", "metadata"):
+            before = server.bytes_sent
+            start = time.perf_counter()
+            asyncio.run(service._get_messages(ids, **FETCH_MODES[mode]))
+            fetch = time.perf_counter() - start
+            transferred = server.bytes_sent - before
+            parse = parse_time(server, ids, mode, args.repeat)
+            print(f"{mode:>9} {transferred:>12} {transferred // args.limit:>10} {fetch * 1e3:>9.1f} {parse * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark ``GmailService.get_recent_emails`` against a local fake Gmail server.
+
+Compares the old one-``get``-per-message loop with the batched fetch path.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_recent_emails [--latency 0.02]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.core.config import settings  # noqa: E402
+from app.services.gmail_service import GmailService  # noqa: E402
+from conftest import make_user  # noqa: E402
+from fake_gmail import FakeGmailServer  # noqa: E402
+
+LIMITS = (10, 50, 200)
+
+
+def sequential_fetch(service: GmailService, limit: int):
+    """The pre-batching N+1 implementation, kept here as the baseline."""
+    results = service.service.users().messages().list(userId='me', maxResults=limit, labelIds=['INBOX']).execute()
+    return [
+        service._parse_message(
+            service.service.users().messages().get(userId='me', id=message['id'], format="full").execute()
+        )
+        for message in results.get("messages", [])
+    ]
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated round-trip latency in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with FakeGmailServer(message_count=max(LIMITS), latency=args.latency) as server:
+        settings.GMAIL_API_ENDPOINT = server.url
+        # Measure the Gmail fetch path itself, not the local message store.
+        settings.MESSAGE_STORE_PATH = ""
+        service = GmailService(make_user())
+
+        print(f"latency per round-trip: {args.latency * 1000:.0f} ms, batch size: {settings.GMAIL_BATCH_SIZE}")
+        print(f"{'limit':>6} {'sequential ms':>14} {'round-trips':>12} {'batched ms':>11} {'round-trips':>12} {'speedup':>8}")
+        for limit in LIMITS:
+            before = server.round_trips
+            seq = timed(lambda: sequential_fetch(service, limit), args.repeat)
+            seq_trips = (server.round_trips - before) // args.repeat
+
+            before = server.round_trips
+            batched = timed(lambda: asyncio.run(service.get_recent_emails(limit)), args.repeat)
+            batched_trips = (server.round_trips - before) // args.repeat
+
+            print(f"{limit:>6} {seq * 1000:>14.1f} {seq_trips:>12} {batched * 1000:>11.1f} {batched_trips:>12} {seq / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
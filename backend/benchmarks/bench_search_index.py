@@ -0,0 +1,131 @@
+"""Benchmark the full-text search index at mailbox scale.
+
+Indexes synthetic mailboxes (subject, sender and a body of ``--body-words``
+words drawn from a Zipf-like vocabulary) into a SQLite file, then times a
+mix of queries: rare and common words, prefixes, phrases, ``from:`` and
+exclusions. A linear scan in Python over the same messages is the baseline,
+and the token column compares handing the agent the top 10 results with
+putting the whole mailbox in its prompt.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_search_index [--sizes 10000 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.search_index import SearchIndex  # noqa: E402
+from app.services.tool_encoding import encode_email_table, estimate_tokens  # noqa: E402
+
+USER = "bench@example.com"
+QUERIES = {
+    "rare word": lambda rng, vocab: vocab[rng.randrange(len(vocab) // 2, len(vocab))],
+    "common word": lambda rng, vocab: vocab[rng.randrange(20)],
+    "two words": lambda rng, vocab: f"{vocab[rng.randrange(200)]} {vocab[rng.randrange(200, 2000)]}",
+    "prefix": lambda rng, vocab: vocab[rng.randrange(100, 2000)][:4],
+    "phrase": lambda rng, vocab: f'"{vocab[rng.randrange(50)]} {vocab[rng.randrange(50)]}"',
+    "from:": lambda rng, vocab: f"from:user{rng.randrange(500)}",
+    "exclusion": lambda rng, vocab: f"{vocab[rng.randrange(100)]} -{vocab[rng.randrange(100)]}",
+}
+
+
+def make_vocabulary(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+
+def make_mailbox(count: int, vocab, body_words: int, rng: random.Random):
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    for start in range(0, count, 1000):
+        size = min(1000, count - start)
+        words = rng.choices(vocab, weights=weights, k=size * (body_words + 6))
+        batch = []
+        for i in range(size):
+            chunk = words[i * (body_words + 6):(i + 1) * (body_words + 6)]
+            index = start + i
+            sender = rng.randrange(500)
+            batch.append({
+                "id": f"m{index:07d}",
+                "threadId": f"t{index // 3:07d}",
+                "internalDate": 1700000000000 + index * 1000,
+                "subject": " ".join(chunk[:6]).capitalize(),
+                "sender": f"User {sender} <user{sender}@example.com>",
+                "snippet": " ".join(chunk[6:26]),
+                "body": " ".join(chunk[6:])
+            })
+        yield batch
+
+
+def scan(mailbox, query: str):
+    """What filtering without an index costs: lowercase substring AND over every message."""
+    terms = [t.strip('"').lower() for t in query.split() if not t.startswith("-") and not t.startswith("from:")]
+    return [m for m in mailbox if all(t in (m["subject"] + " " + m["body"]).lower() for t in terms)][:10]
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(size: int, queries: int, body_words: int, seed: int):
+    rng = random.Random(seed)
+    vocab = make_vocabulary(20000, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        index = SearchIndex(os.path.join(directory, "search.db"))
+        mailbox = []
+        start = time.perf_counter()
+        for batch in make_mailbox(size, vocab, body_words, rng):
+            index.add(USER, batch)
+            mailbox.extend(batch)
+        elapsed = time.perf_counter() - start
+        db_mb = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6
+        print(f"\n{size} messages: indexed in {elapsed:.1f}s ({size / elapsed:,.0f} msg/s, {db_mb:.0f} MB on disk)")
+
+        prompt_tokens = estimate_tokens(encode_email_table(
+            [{"from": m["sender"], "subject": m["subject"], "snippet": m["snippet"]} for m in mailbox]
+        ))
+        print(f"{'query':<12}  {'p50 ms':>7}  {'p95 ms':>7}  {'hits':>5}  {'scan ms':>8}  {'top10 tok':>9}  {'mailbox tok':>11}")
+        for name, make_query in QUERIES.items():
+            timings, hits, tokens = [], [], []
+            for _ in range(queries):
+                query = make_query(rng, vocab)
+                start = time.perf_counter()
+                results = index.search(USER, query, 10)
+                timings.append((time.perf_counter() - start) * 1e3)
+                hits.append(len(results))
+                tokens.append(estimate_tokens(encode_email_table(
+                    [{"from": m["sender"], "subject": m["subject"], "snippet": m["match"]} for m in results]
+                )))
+            start = time.perf_counter()
+            for _ in range(3):
+                scan(mailbox, make_query(rng, vocab))
+            scan_ms = (time.perf_counter() - start) / 3 * 1e3
+            print(
+                f"{name:<12}  {percentile(timings, 0.5):>7.2f}  {percentile(timings, 0.95):>7.2f}  "
+                f"{statistics.mean(hits):>5.1f}  {scan_ms:>8.1f}  {statistics.mean(tokens):>9.0f}  {prompt_tokens:>11,}"
+            )
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--body-words", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.body_words, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Report agent prompt tokens per command with JSON and compact tool outputs.
+
+Runs commands that make the agent call ``fetch_emails`` through AIService
+with a scripted model, once with ``TOOL_OUTPUT_FORMAT=json`` (LangChain's
+default serialization) and once with ``compact``, and sums the tokens of
+every prompt the model receives. Emails have display-name senders and
+full-length (~200 character) snippets like Gmail's. Tokens are counted with
+tiktoken's cl100k encoding when it is installed, otherwise estimated at four
+characters per token; tool schemas are the same in both runs and left out.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_tool_tokens [--limits 5 10 25 50]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.core.config import settings  # noqa: E402
+from app.services.ai_service import AIService  # noqa: E402
+from app.services.tool_encoding import estimate_tokens  # noqa: E402
+from conftest import RecordingGmailService  # noqa: E402
+from fake_llm import FakeChatModel, tool_call  # noqa: E402
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+    COUNTER = "tiktoken cl100k_base"
+except ImportError:
+    count_tokens = estimate_tokens
+    COUNTER = "estimate (4 chars/token)"
+
+
+class InboxGmailService(RecordingGmailService):
+    async def get_recent_emails(self, limit=10):
+        return [
+            {
+                "sender": f"Person Number{i} via Team Updates <person.number{i}@Example-Corp.com>",
+                "subject": f"Re: Quarterly planning follow-up #{i} - action items for next week",
+                "snippet": (
+                    f"Hi team, following up on item {i} from yesterday's meeting: we still need owners for the "
+                    "migration, the vendor review and the budget draft. Please reply by Thursday with your "
+                    "availability and any blockers you"
+                )
+            }
+            for i in range(1, limit + 1)
+        ]
+
+
+def prompt_tokens(prompts) -> int:
+    total = 0
+    for messages in prompts:
+        for message in messages:
+            total += count_tokens(message.content or "")
+            tool_calls = message.additional_kwargs.get("tool_calls")
+            if tool_calls:
+                total += count_tokens(json.dumps(tool_calls))
+    return total
+
+
+async def run_command(output_format: str, limit: int) -> int:
+    settings.TOOL_OUTPUT_FORMAT = output_format
+    llm = FakeChatModel.from_responses([tool_call("fetch_emails", limit=limit), "Summary."], cycle=False)
+    service = AIService(llm=llm, response_cache=None, memory=None)
+    await service.interpret_command(f"summarize the important ones among my last {limit} emails", InboxGmailService())
+    return prompt_tokens(llm.prompts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limits", type=int, nargs="+", default=[5, 10, 25, 50])
+    args = parser.parse_args()
+
+    print(f"token counter: {COUNTER}; snippet budget {settings.TOOL_SNIPPET_MAX_TOKENS} tokens")
+    print(f"{'emails':>6}  {'json':>8}  {'compact':>8}  {'saved':>6}")
+    for limit in args.limits:
+        before = asyncio.run(run_command("json", limit))
+        after = asyncio.run(run_command("compact", limit))
+        print(f"{limit:>6}  {before:>8}  {after:>8}  {1 - after / before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
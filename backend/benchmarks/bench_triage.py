@@ -0,0 +1,68 @@
+"""Benchmark inbox triage wall time against inbox size.
+
+Triages inboxes of growing size with a fake model that sleeps
+``--llm-latency`` seconds per call, comparing one email per call run
+sequentially (the naive loop) with batched, concurrent calls, and shows the
+cost of re-triaging the same inbox once results are cached.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_triage [--sizes 10 50 100] [--llm-latency 0.2]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from app.services.ai_service import AIService  # noqa: E402
+from app.services.llm_cache import InMemoryCacheBackend  # noqa: E402
+from fake_llm import FunctionChatModel, triage_reply  # noqa: E402
+
+
+def make_inbox(size: int):
+    return [
+        {"id": f"m{i}", "subject": f"Item {i}", "sender": f"Sender {i} <s{i}@example.com>", "snippet": f"snippet {i}"}
+        for i in range(size)
+    ]
+
+
+async def run(size: int, latency: float, batch_size: int, concurrency: int):
+    llm = FunctionChatModel(respond=triage_reply, latency=latency)
+    triage = AIService(llm=llm, response_cache=None, memory=None).email_triage
+    triage.batch_size, triage.concurrency = batch_size, concurrency
+    triage.cache = InMemoryCacheBackend(max_entries=size, ttl_seconds=3600)
+    inbox = make_inbox(size)
+
+    start = time.perf_counter()
+    await triage.triage(inbox, user="bench")
+    first = time.perf_counter() - start
+    calls = llm.calls
+
+    start = time.perf_counter()
+    await triage.triage(inbox, user="bench")
+    return first, calls, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'emails':>6}  {'naive s':>8}  {'calls':>5}  {'batched s':>9}  {'calls':>5}  {'speedup':>7}  {'cached ms':>9}")
+    for size in args.sizes:
+        naive, naive_calls, _ = asyncio.run(run(size, args.llm_latency, 1, 1))
+        batched, batched_calls, cached = asyncio.run(run(size, args.llm_latency, args.batch_size, args.concurrency))
+        print(
+            f"{size:>6}  {naive:>8.2f}  {naive_calls:>5}  {batched:>9.2f}  {batched_calls:>5}  "
+            f"{naive / batched:>6.1f}x  {cached * 1e3:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
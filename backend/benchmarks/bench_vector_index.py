@@ -0,0 +1,129 @@
+"""Benchmark the memory-mapped vector index: query latency and memory.
+
+Embeds synthetic mailboxes with the default hashing embedder into a
+``VectorIndex`` on disk, then reopens it the way a fresh process would and
+times single and batched top-k queries. The memory columns show the size of
+the vector matrix and metadata on disk and how much the process RSS grows
+when the matrix is paged in. The per-vector Python cosine used by the LLM
+cache is the baseline.
+
+Usage (from ``backend/``):
+    GROQ_API_KEY=x SECRET_KEY=x python -m benchmarks.bench_vector_index [--sizes 10000 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.llm_cache import cosine_similarity  # noqa: E402
+from app.services.vector_index import HashingEmbedder, VectorIndex, message_text  # noqa: E402
+
+USER = "bench@example.com"
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (Linux), in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def make_mailbox(count: int, body_words: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(20000)})
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    words = rng.choices(vocab, weights=weights, k=count * (body_words + 5))
+    mailbox = []
+    for index in range(count):
+        chunk = words[index * (body_words + 5):(index + 1) * (body_words + 5)]
+        mailbox.append({
+            "id": f"m{index:07d}",
+            "subject": " ".join(chunk[:5]),
+            "sender": f"user{index % 500}@example.com",
+            "snippet": " ".join(chunk[5:25]),
+            "body": " ".join(chunk[5:])
+        })
+    return mailbox, vocab
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(size: int, queries: int, batch: int, body_words: int, dim: int, seed: int):
+    rng = random.Random(seed)
+    mailbox, vocab = make_mailbox(size, body_words, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(embedder=HashingEmbedder(dim), directory=directory)
+        start = time.perf_counter()
+        for offset in range(0, size, 1000):
+            index.add(USER, mailbox[offset:offset + 1000])
+        elapsed = time.perf_counter() - start
+        index.close()
+        disk = {name: os.path.getsize(os.path.join(directory, name)) / 1e6 for name in os.listdir(directory)}
+        matrix_mb = sum(mb for name, mb in disk.items() if name.endswith(".f32"))
+        print(
+            f"\n{size} messages, dim {dim}: embedded and stored in {elapsed:.1f}s ({size / elapsed:,.0f} msg/s); "
+            f"matrix file {matrix_mb:.1f} MB ({size * dim * 4 / 1e6:.1f} MB of vectors), "
+            f"metadata {disk.get('vectors.db', 0):.1f} MB"
+        )
+
+        before = rss_mb()
+        index = VectorIndex(embedder=HashingEmbedder(dim), directory=directory)
+        questions = [" ".join(rng.choices(vocab[:3000], k=rng.randint(3, 8))) for _ in range(queries)]
+        index.search(USER, questions[0], 10)
+        paged_in = rss_mb() - before
+
+        timings = []
+        for question in questions:
+            start = time.perf_counter()
+            index.search(USER, question, 10)
+            timings.append((time.perf_counter() - start) * 1e3)
+        start = time.perf_counter()
+        for offset in range(0, queries, batch):
+            index.search_many(USER, questions[offset:offset + batch], 10)
+        batched = (time.perf_counter() - start) * 1e3 / queries
+
+        # Pure-Python cosine over every vector, as the LLM cache does it.
+        sample = min(size, 5000)
+        vectors = [row.tolist() for row in index._user(USER).matrix[:sample]]
+        query = HashingEmbedder(dim).embed_query(message_text({"subject": questions[0]}))
+        start = time.perf_counter()
+        for vector in vectors:
+            cosine_similarity(query, vector)
+        naive = (time.perf_counter() - start) * 1e3 * size / sample
+        index.close()
+
+    print(f"{'query':<14}  {'p50 ms':>7}  {'p95 ms':>7}  {'mean ms':>7}")
+    print(f"{'single':<14}  {percentile(timings, 0.5):>7.2f}  {percentile(timings, 0.95):>7.2f}  {statistics.mean(timings):>7.2f}")
+    print(f"{f'batch of {batch}':<14}  {'':>7}  {'':>7}  {batched:>7.2f}")
+    print(f"{'python cosine':<14}  {'':>7}  {'':>7}  {naive:>7.0f}")
+    print(f"RSS grew {paged_in:.0f} MB when the index was opened and first searched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--body-words", type=int, default=60)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.batch, args.body_words, args.dim, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Commands with the action the fast path should produce (None = needs the LLM)."""
+
+FAST_PATH_CORPUS = [
+    ("show my last 5 emails", {"type": "fetch_emails", "params": {"limit": 5}}),
+    ("Show me my latest 3 messages.", {"type": "fetch_emails", "params": {"limit": 3}}),
+    ("fetch 20 emails", {"type": "fetch_emails", "params": {"limit": 20}}),
+    ("get my recent emails", {"type": "fetch_emails", "params": {"limit": 10}}),
+    ("list the last ten messages", {"type": "fetch_emails", "params": {"limit": 10}}),
+    ("check my inbox", {"type": "fetch_emails", "params": {"limit": 10}}),
+    ("Please read my 7 most recent emails", {"type": "fetch_emails", "params": {"limit": 7}}),
+    ("display my newest five mails please", {"type": "fetch_emails", "params": {"limit": 5}}),
+    ("open my last email", {"type": "fetch_emails", "params": {"limit": 1}}),
+    ("show me the latest message", {"type": "fetch_emails", "params": {"limit": 1}}),
+    (
+        "send an email to bob@example.com with subject: Lunch and body: See you at noon",
+        {"type": "send_email", "params": {"to": "bob@example.com", "subject": "Lunch", "body": "See you at noon"}},
+    ),
+    (
+        'Send email to alice.smith@corp.example.org subject "Q3 report" body "Attached is the report."',
+        {"type": "send_email", "params": {
+            "to": "alice.smith@corp.example.org", "subject": "Q3 report", "body": "Attached is the report."
+        }},
+    ),
+    (
+        "email carol@example.com with the subject: Re: budget, and message: Approved, thanks!",
+        {"type": "send_email", "params": {"to": "carol@example.com", "subject": "Re: budget", "body": "Approved, thanks!"}},
+    ),
+    (
+        "email a@b.com with subject: Lunch textbook review and body: hi",
+        {"type": "send_email", "params": {"to": "a@b.com", "subject": "Lunch textbook review", "body": "hi"}},
+    ),
+    (
+        "email a@b.com with subject \"Your text message\" and body: call me",
+        {"type": "send_email", "params": {"to": "a@b.com", "subject": "Your text message", "body": "call me"}},
+    ),
+    ("check my email!", None),
+    ("send an email to bob@example.com with subject Lunch and body See you at noon", None),
+    ("email a@b.com with subject Lunch textbook review and body hi", None),
+    ("email a@b.com with subject Your text message and body call me", None),
+    ("email a@b.com with subject: Your text message and body: call me", None),
+    ("show my last 5 emails from john", None),
+    ("summarize my last 10 emails", None),
+    ("send an email to bob@example.com about the meeting", None),
+    ("send bob a thank you note", None),
+    ("reply to the second one", None),
+    ("show my last 500 emails", None),
+    ("what did the landlord say about the deposit?", None),
+    ("delete all my emails", None),
+    ("get 0 emails", None),
+]
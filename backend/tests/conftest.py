@@ -1,6 +1,131 @@
+import json
+import os
 import sys
 from pathlib import Path
 
 # Add the backend directory to Python path
 backend_dir = Path(__file__).parent.parent
-sys.path.append(str(backend_dir)) 
\ No newline at end of file
+sys.path.append(str(backend_dir))
+
+# Tests opt into the SQLite message store explicitly (see the
+# ``message_store`` fixture) instead of writing to config/messages.db, and
+# keep server-side credentials and the search and vector indexes in memory.
+os.environ["MESSAGE_STORE_PATH"] = ""
+os.environ["CREDENTIAL_STORE_PATH"] = ""
+os.environ["SEARCH_INDEX_BACKEND"] = "memory"
+os.environ["VECTOR_INDEX_BACKEND"] = "memory"
+# No background health checks against the real Groq and Google endpoints.
+os.environ["HEALTH_PROBE_ENABLED"] = "false"
+
+import pytest
+
+from fake_gmail import FakeGmailServer
+
+
+def make_user(email: str = "dummy@example.com", token: str = "dummy_token") -> dict:
+    """JWT payload shape produced by ``auth_callback``."""
+    return {
+        "sub": email,
+        "email": email,
+        "credentials": {
+            "client_id": "dummy_client_id",
+            "client_secret": "dummy_secret",
+            "refresh_token": "dummy_refresh_token",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "token": token,
+            "scopes": ["https://www.googleapis.com/auth/gmail.modify"]
+        }
+    }
+
+
+def parse_sse(text: str):
+    """Decode a Server-Sent Events body into ``(event, data)`` pairs."""
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class FakeClock:
+    """Manually advanced time source; ``sleep`` records the wait and advances it."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RecordingGmailService:
+    """Stand-in for GmailService that records sends instead of calling Gmail."""
+
+    def __init__(self, email: str = "dummy@example.com"):
+        self.email = self.user_email = email
+        self.sent = []
+
+    async def get_recent_emails(self, limit=10):
+        return [{"subject": f"Hello {self.email}", "sender": "a@example.com", "snippet": "hi"}] * limit
+
+    async def search_emails(self, query, limit=10):
+        return [{"subject": f"About {query}", "sender": "a@example.com", "snippet": "hi", "match": f"[{query}]"}][:limit]
+
+    async def find_relevant_emails(self, question, limit=5):
+        return [{"subject": "Deposit", "sender": "landlord@example.com", "snippet": "about the deposit", "score": 0.5}]
+
+    async def send_email(self, to, subject, body, cc=None, bcc=None):
+        self.sent.append((to, subject, body))
+        return {"id": f"sent-{len(self.sent)}"}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_gmail(monkeypatch):
+    """Start a fake Gmail server and point ``GmailService`` at it."""
+    from app.core.config import settings
+
+    with FakeGmailServer(message_count=25) as server:
+        monkeypatch.setattr(settings, "GMAIL_API_ENDPOINT", server.url)
+        yield server
+
+
+@pytest.fixture
+def message_store(tmp_path):
+    from app.services.message_store import MessageStore
+
+    store = MessageStore(str(tmp_path / "messages.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_services():
+    from app.api.deps import get_ai_service, get_health_prober, get_job_queue
+    from app.core.security import verified_token_cache
+    from app.services.credential_store import get_credential_store
+    from app.services.token_manager import token_manager
+    from app.services.gmail_cache import gmail_service_cache
+    from app.services.header_index import header_index
+    from app.services.search_index import get_search_index
+    from app.services.vector_index import get_vector_index
+
+    yield
+    gmail_service_cache.clear()
+    get_ai_service.cache_clear()
+    get_job_queue.cache_clear()
+    get_health_prober.cache_clear()
+    verified_token_cache.clear()
+    get_credential_store.cache_clear()
+    token_manager.clear()
+    header_index.clear()
+    get_search_index.cache_clear()
+    get_vector_index.cache_clear()
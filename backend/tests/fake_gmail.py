@@ -0,0 +1,465 @@
+"""In-process fake of the Gmail REST API used by tests and benchmarks.
+
+The server speaks just enough of the Gmail v1 wire format for
+``googleapiclient`` to talk to it when ``settings.GMAIL_API_ENDPOINT`` points
+at ``FakeGmailServer.url``. Every HTTP round-trip sleeps for ``latency``
+seconds so that the cost of extra round-trips shows up in timings.
+"""
+import base64
+import json
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/gmail/v1/users/me"
+UPLOAD_PREFIX = "/upload/gmail/v1/users/me"
+
+
+def _b64(data: str) -> str:
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def make_message(index: int, body_size: int = 2000) -> Dict:
+    """Build a Gmail ``format=full`` message resource."""
+    body = (f"Body of message {index}. " * (body_size // 20 + 1))[:body_size]
+    headers = [
+        {"name": "From", "value": f"Sender {index} <sender{index}@example.com>"},
+        {"name": "To", "value": "dummy@example.com"},
+        {"name": "Subject", "value": f"Subject {index}"},
+        {"name": "Date", "value": "Mon, 20 Nov 2023 10:00:00 +0000"},
+        {"name": "Message-ID", "value": f"<msg{index}@example.com>"},
+    ]
+    if index % 3:
+        # Replies to the previous message of the same thread.
+        first = index - index % 3
+        references = " ".join(f"<msg{i}@example.com>" for i in range(first, index))
+        headers += [
+            {"name": "In-Reply-To", "value": f"<msg{index - 1}@example.com>"},
+            {"name": "References", "value": references},
+        ]
+    return {
+        "id": f"msg{index:06d}",
+        "threadId": f"thread{index // 3:06d}",
+        "labelIds": ["INBOX"],
+        "snippet": f"Snippet for message {index} &amp; more",
+        "historyId": str(1000 + index),
+        "internalDate": str(1700000000000 + index * 1000),
+        "sizeEstimate": body_size,
+        "payload": {
+            "partId": "",
+            "mimeType": "multipart/alternative",
+            "headers": headers,
+            "parts": [
+                {"partId": "0", "mimeType": "text/plain", "filename": "",
+                 "body": {"size": body_size, "data": _b64(body)}},
+                {"partId": "1", "mimeType": "text/html", "filename": "",
+                 "body": {"size": body_size, "data": _b64(f"<p>{body}</p>")}},
+            ],
+        },
+    }
+
+
+def apply_fields(resource, fields: str):
+    """Apply a partial-response mask such as ``id,payload/headers``."""
+    if isinstance(resource, list):
+        return [apply_fields(item, fields) for item in resource]
+    tree: Dict = {}
+    for path in fields.split(","):
+        node = tree
+        for key in path.strip().split("/"):
+            node = node.setdefault(key, {})
+    return _prune(resource, tree)
+
+
+def _prune(resource, tree: Dict):
+    if not tree or not isinstance(resource, (dict, list)):
+        return resource
+    if isinstance(resource, list):
+        return [_prune(item, tree) for item in resource]
+    return {key: _prune(resource[key], sub) for key, sub in tree.items() if key in resource}
+
+
+def render_message(message: Dict, query: Dict[str, List[str]]) -> Dict:
+    """Shape a stored message according to ``format``/``metadataHeaders``/``fields``."""
+    fmt = query.get("format", ["full"])[0]
+    if fmt == "metadata":
+        wanted = {h.lower() for h in query.get("metadataHeaders", [])}
+        headers = [h for h in message["payload"]["headers"] if not wanted or h["name"].lower() in wanted]
+        message = {key: value for key, value in message.items() if key != "payload"}
+        message["payload"] = {"mimeType": "multipart/alternative", "headers": headers}
+    elif fmt == "minimal":
+        message = {key: value for key, value in message.items() if key != "payload"}
+    if "fields" in query:
+        message = apply_fields(message, query["fields"][0])
+    return message
+
+
+class FakeGmailServer:
+    """Threaded HTTP server holding an in-memory mailbox."""
+
+    def __init__(self, message_count: int = 0, latency: float = 0.0, body_size: int = 2000):
+        self.latency = latency
+        # Newest message first, like the real INBOX listing.
+        self.messages: List[Dict] = [make_message(i, body_size) for i in range(message_count, 0, -1)]
+        self.body_size = body_size
+        self.history_id = 1000 + message_count
+        # history.list only answers for start ids at or after this floor.
+        self.history_floor = self.history_id
+        self.history: List[Dict] = []
+        self.sent: List[Dict] = []
+        # Attachment data by attachment id, and resumable uploads in progress.
+        self.attachments: Dict[str, bytes] = {}
+        self.uploads: Dict[str, bytearray] = {}
+        self.upload_chunks = 0
+        # Statuses returned (in order) by the next messages.send calls.
+        self.send_failures: List[int] = []
+        self.request_log: List[Tuple[str, str]] = []
+        self.batched_requests: List[Tuple[str, str]] = []
+        self.bytes_sent = 0
+        # OAuth: when ``valid_tokens`` is a set, API calls need one of those
+        # bearer tokens and get a 401 otherwise; POST /token issues new ones.
+        self.valid_tokens: Optional[set] = None
+        self.token_lifetime = 3600
+        self.token_refreshes = 0
+        self.unauthorized = 0
+        # users.watch registration and the callback standing in for Pub/Sub.
+        self.watch: Optional[Dict] = None
+        self.on_notify: Optional[Callable[[Dict], None]] = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/"
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.request_log)
+
+    def start(self) -> "FakeGmailServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeGmailServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def find_message(self, message_id: str) -> Optional[Dict]:
+        return next((m for m in self.messages if m["id"] == message_id), None)
+
+    # -- mailbox mutations, recorded in the history log ---------------------
+
+    def _record(self, kind: str, message: Dict, **extra) -> None:
+        self.history_id += 1
+        message["historyId"] = str(self.history_id)
+        ref = {"id": message["id"], "threadId": message["threadId"], "labelIds": list(message["labelIds"])}
+        self.history.append({"id": str(self.history_id), "messages": [ref], kind: [{"message": ref, **extra}]})
+        if self.watch is not None and self.on_notify is not None:
+            self.on_notify({"emailAddress": "dummy@example.com", "historyId": self.history_id})
+
+    def add_message(self, index: int, label_ids: Optional[List[str]] = None) -> Dict:
+        with self._lock:
+            message = make_message(index, self.body_size)
+            message["labelIds"] = label_ids or ["INBOX"]
+            message["internalDate"] = str(int(self.messages[0]["internalDate"]) + 1000 if self.messages else 0)
+            self.messages.insert(0, message)
+            self._record("messagesAdded", message)
+            return message
+
+    def add_attachment(self, message_id: str, filename: str, data: bytes, mime_type: str = "application/pdf") -> Dict:
+        """Attach ``data`` as a new top-level part, stored apart like Gmail does."""
+        with self._lock:
+            message = self.find_message(message_id)
+            attachment_id = f"att{len(self.attachments) + 1:04d}"
+            self.attachments[attachment_id] = data
+            parts = message["payload"]["parts"]
+            part = {
+                "partId": str(len(parts)),
+                "mimeType": mime_type,
+                "filename": filename,
+                "headers": [{"name": "Content-Disposition", "value": f'attachment; filename="{filename}"'}],
+                "body": {"attachmentId": attachment_id, "size": len(data)},
+            }
+            parts.append(part)
+            message["payload"]["mimeType"] = "multipart/mixed"
+            return part
+
+    def delete_message(self, message_id: str) -> None:
+        with self._lock:
+            message = self.find_message(message_id)
+            self.messages.remove(message)
+            self._record("messagesDeleted", message)
+
+    def modify_labels(self, message_id: str, add: List[str] = (), remove: List[str] = ()) -> None:
+        with self._lock:
+            message = self.find_message(message_id)
+            if add:
+                message["labelIds"] = message["labelIds"] + [label for label in add if label not in message["labelIds"]]
+                self._record("labelsAdded", message, labelIds=list(add))
+            if remove:
+                message["labelIds"] = [label for label in message["labelIds"] if label not in remove]
+                self._record("labelsRemoved", message, labelIds=list(remove))
+
+    def expire_history(self) -> None:
+        """Drop all history so older start ids get a 404, as Gmail does."""
+        with self._lock:
+            self.history = []
+            self.history_floor = self.history_id
+
+    # -- request dispatch --------------------------------------------------
+
+    def refresh_token(self, body: bytes) -> Tuple[int, Dict]:
+        form = parse_qs(body.decode())
+        if form.get("grant_type") != ["refresh_token"] or not form.get("refresh_token"):
+            return 400, {"error": "invalid_grant"}
+        with self._lock:
+            self.token_refreshes += 1
+            token = f"fresh-token-{self.token_refreshes}"
+            if self.valid_tokens is not None:
+                self.valid_tokens.add(token)
+        return 200, {"access_token": token, "expires_in": self.token_lifetime, "token_type": "Bearer"}
+
+    def authorized(self, authorization: Optional[str]) -> bool:
+        if self.valid_tokens is None:
+            return True
+        scheme, _, token = (authorization or "").partition(" ")
+        return scheme.lower() == "bearer" and token in self.valid_tokens
+
+    def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        route = parsed.path
+        if not route.startswith(API_PREFIX):
+            return 404, {"error": {"code": 404, "message": f"Unknown path {route}"}}
+        route = route[len(API_PREFIX):]
+
+        if method == "GET" and route == "/profile":
+            return 200, {
+                "emailAddress": "dummy@example.com",
+                "messagesTotal": len(self.messages),
+                "historyId": str(self.history_id),
+            }
+        if method == "POST" and route == "/watch":
+            self.watch = json.loads(body or b"{}")
+            expiration = int(time.time() * 1000) + 7 * 24 * 3600 * 1000
+            return 200, {"historyId": str(self.history_id), "expiration": str(expiration)}
+        if method == "POST" and route == "/stop":
+            self.watch = None
+            return 204, {}
+        if method == "GET" and route == "/history":
+            return self._list_history(query)
+        if method == "GET" and route == "/messages":
+            return 200, self._list_messages(query)
+        if method == "GET" and route == "/threads":
+            return 200, self._list_threads(query)
+        match = re.fullmatch(r"/threads/([^/]+)", route)
+        if method == "GET" and match:
+            members = [m for m in reversed(self.messages) if m["threadId"] == match.group(1)]
+            if not members:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            thread = {
+                "id": match.group(1),
+                "historyId": max((m["historyId"] for m in members), key=int),
+                "messages": [render_message(m, {k: v for k, v in query.items() if k != "fields"}) for m in members],
+            }
+            if "fields" in query:
+                thread = apply_fields(thread, query["fields"][0])
+            return 200, thread
+        match = re.fullmatch(r"/messages/([^/]+)", route)
+        if method == "GET" and match:
+            message = self.find_message(match.group(1))
+            if message is None:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            return 200, render_message(message, query)
+        match = re.fullmatch(r"/messages/([^/]+)/attachments/([^/]+)", route)
+        if method == "GET" and match:
+            data = self.attachments.get(match.group(2))
+            if self.find_message(match.group(1)) is None or data is None:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            # Gmail returns unpadded base64url.
+            attachment = {
+                "attachmentId": match.group(2),
+                "size": len(data),
+                "data": base64.urlsafe_b64encode(data).decode().rstrip("="),
+            }
+            return 200, apply_fields(attachment, query["fields"][0]) if "fields" in query else attachment
+        if method == "POST" and route == "/messages/send":
+            return self._send(json.loads(body or b"{}").get("raw"))
+        return 404, {"error": {"code": 404, "message": f"Unknown route {method} {route}"}}
+
+    def _send(self, raw: Optional[str]) -> Tuple[int, Dict]:
+        with self._lock:
+            if self.send_failures:
+                status = self.send_failures.pop(0)
+                return status, {"error": {"code": status, "message": "Injected send failure"}}
+            sent = {"id": f"sent{len(self.sent) + 1:06d}", "threadId": "sent", "raw": raw}
+            self.sent.append(sent)
+        return 200, {"id": sent["id"], "threadId": sent["threadId"], "labelIds": ["SENT"]}
+
+    def dispatch_upload(self, method: str, path: str, headers, body: bytes) -> Tuple[int, Dict, Dict[str, str]]:
+        """Resumable ``messages.send`` uploads: POST opens a session, PUTs add chunks."""
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        if parsed.path != UPLOAD_PREFIX + "/messages/send":
+            return 404, {"error": {"code": 404, "message": f"Unknown upload path {parsed.path}"}}, {}
+        if method == "POST" and query.get("uploadType") == ["resumable"]:
+            with self._lock:
+                upload_id = str(len(self.uploads) + 1)
+                self.uploads[upload_id] = bytearray()
+            return 200, {}, {"Location": f"{self.url.rstrip('/')}{parsed.path}?upload_id={upload_id}"}
+        if method == "PUT" and "upload_id" in query:
+            upload = self.uploads[query["upload_id"][0]]
+            first, _, total = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+|\*)", headers["Content-Range"]).groups()
+            with self._lock:
+                if int(first) != len(upload):
+                    return 400, {"error": {"code": 400, "message": "Chunk out of order"}}, {}
+                upload.extend(body)
+                self.upload_chunks += 1
+            if total != "*" and len(upload) == int(total):
+                status, payload = self._send(base64.urlsafe_b64encode(bytes(upload)).decode())
+                return status, payload, {}
+            return 308, {}, {"Range": f"bytes=0-{len(upload) - 1}"}
+        return 400, {"error": {"code": 400, "message": "Unsupported upload request"}}, {}
+
+    def _list_messages(self, query: Dict[str, List[str]]) -> Dict:
+        max_results = int(query.get("maxResults", ["100"])[0])
+        offset = int(query.get("pageToken", ["0"])[0])
+        label_ids = query.get("labelIds", [])
+        messages = [m for m in self.messages if all(label in m["labelIds"] for label in label_ids)]
+        page = messages[offset:offset + max_results]
+        response = {
+            "messages": [{"id": m["id"], "threadId": m["threadId"]} for m in page],
+            "resultSizeEstimate": len(messages),
+        }
+        if offset + max_results < len(messages):
+            response["nextPageToken"] = str(offset + max_results)
+        return response
+
+    def _list_threads(self, query: Dict[str, List[str]]) -> Dict:
+        max_results = int(query.get("maxResults", ["100"])[0])
+        offset = int(query.get("pageToken", ["0"])[0])
+        label_ids = query.get("labelIds", [])
+        threads: Dict[str, Dict] = {}
+        for message in self.messages:
+            if all(label in message["labelIds"] for label in label_ids):
+                thread = threads.setdefault(message["threadId"], {
+                    "id": message["threadId"], "snippet": message["snippet"], "historyId": message["historyId"]
+                })
+                thread["historyId"] = max(thread["historyId"], message["historyId"], key=int)
+        ordered = list(threads.values())
+        response = {"threads": ordered[offset:offset + max_results], "resultSizeEstimate": len(ordered)}
+        if offset + max_results < len(ordered):
+            response["nextPageToken"] = str(offset + max_results)
+        return response
+
+    def _list_history(self, query: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        start = int(query["startHistoryId"][0])
+        if start < self.history_floor:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+        max_results = int(query.get("maxResults", ["100"])[0])
+        offset = int(query.get("pageToken", ["0"])[0])
+        records = [record for record in self.history if int(record["id"]) > start]
+        page = records[offset:offset + max_results]
+        response = {"history": page, "historyId": str(self.history_id)}
+        if offset + max_results < len(records):
+            response["nextPageToken"] = str(offset + max_results)
+        return 200, response
+
+    def dispatch_batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        envelope = BytesParser(policy=HTTP).parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+        )
+        boundary = "batch_fake_gmail_boundary"
+        chunks = []
+        for part in envelope.iter_parts():
+            content_id = part["Content-ID"].strip("<>")
+            inner = part.get_payload(decode=False)
+            request_line, _, rest = inner.partition("\n")
+            method, path, _ = request_line.strip().split(" ", 2)
+            inner_body = rest.split("\n\n", 1)[1].encode() if "\n\n" in rest else b""
+            with self._lock:
+                self.batched_requests.append((method, path))
+            status, payload = self.dispatch(method, path, inner_body)
+            encoded = json.dumps(payload)
+            chunks.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(encoded)}\r\n\r\n"
+                f"{encoded}\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(chunks).encode()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with server._lock:
+                    server.request_log.append((method, self.path))
+                if server.latency:
+                    time.sleep(server.latency)
+                route = urlparse(self.path).path
+                extra_headers: Dict[str, str] = {}
+                if method == "POST" and route == "/token":
+                    status, payload = server.refresh_token(body)
+                    content_type, content = "application/json; charset=UTF-8", json.dumps(payload).encode()
+                elif not server.authorized(self.headers.get("Authorization")):
+                    with server._lock:
+                        server.unauthorized += 1
+                    status, payload = 401, {"error": {"code": 401, "message": "Invalid Credentials"}}
+                    content_type, content = "application/json; charset=UTF-8", json.dumps(payload).encode()
+                elif route.startswith(UPLOAD_PREFIX):
+                    status, payload, extra_headers = server.dispatch_upload(method, self.path, self.headers, body)
+                    content_type, content = "application/json; charset=UTF-8", json.dumps(payload).encode()
+                elif method == "POST" and route == "/batch":
+                    content_type, content = server.dispatch_batch(self.headers["Content-Type"], body)
+                    status = 200
+                else:
+                    status, payload = server.dispatch(method, self.path, body)
+                    content_type, content = "application/json; charset=UTF-8", json.dumps(payload).encode()
+                with server._lock:
+                    server.bytes_sent += len(content)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+        return Handler
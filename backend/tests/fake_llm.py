@@ -0,0 +1,96 @@
+"""Scripted chat models for exercising AIService without Groq."""
+import itertools
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, List, Union
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def tool_call(name: str, **args) -> AIMessage:
+    """An assistant turn asking the agent to run ``name`` with ``args``."""
+    call_id = f"call_{uuid.uuid4().hex[:8]}"
+    return AIMessage(
+        content="",
+        additional_kwargs={"tool_calls": [{
+            "id": call_id,
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(args)},
+        }]},
+    )
+
+
+class FakeChatModel(GenericFakeChatModel):
+    """Replays ``responses`` in order (cycling) and counts model calls.
+
+    ``latency`` seconds are slept per call to stand in for a hosted model;
+    the messages of every call are kept in ``prompts``.
+    """
+
+    calls: int = 0
+    latency: float = 0.0
+    prompts: list = []
+
+    @classmethod
+    def from_responses(
+        cls, responses: List[Union[AIMessage, str]], cycle: bool = True, latency: float = 0.0
+    ) -> "FakeChatModel":
+        messages = itertools.cycle(responses) if cycle else iter(responses)
+        return cls(messages=messages, latency=latency)
+
+    def _generate(self, messages, *args, **kwargs):
+        self.calls += 1
+        self.prompts.append(messages)
+        if self.latency:
+            time.sleep(self.latency)
+        return super()._generate(messages, *args, **kwargs)
+
+
+class FunctionChatModel(BaseChatModel):
+    """Answers every call with ``respond(messages)``.
+
+    Like ``FakeChatModel`` it sleeps ``latency`` seconds per call and counts
+    calls; ``max_active`` records the highest number of overlapping calls.
+    """
+
+    respond: Callable[[List[BaseMessage]], str]
+    latency: float = 0.0
+    calls: int = 0
+    active: int = 0
+    max_active: int = 0
+    lock: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "function"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            content = self.respond(messages)
+        finally:
+            with self.lock:
+                self.active -= 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+def triage_reply(messages: List[BaseMessage]) -> str:
+    """A well-formed triage answer for every row of the prompt's email table."""
+    rows = [line.split("|") for line in messages[-1].content.splitlines()[1:]]
+    return "\n".join(
+        f"{row[0]}|{'high' if 'urgent' in row[2].lower() else 'low'}|work|Summary of {row[2]}" for row in rows
+    )
@@ -0,0 +1,39 @@
+"""In-process stand-in for a Google Cloud Pub/Sub push subscription."""
+import base64
+import itertools
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List
+
+
+class LocalPubSub:
+    """Collects published messages and delivers them in the push wire format.
+
+    ``publish`` may be called from any thread (e.g. the fake Gmail server);
+    ``push_envelopes`` drains what is pending as the JSON bodies Pub/Sub would
+    POST to a push endpoint.
+    """
+
+    def __init__(self, subscription: str = "projects/test/subscriptions/gmail-push"):
+        self.subscription = subscription
+        self._ids = itertools.count(1)
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, topic: str, data: Dict) -> None:
+        message = {
+            "data": base64.b64encode(json.dumps(data).encode()).decode(),
+            "messageId": str(next(self._ids)),
+            "publishTime": datetime.now(timezone.utc).isoformat(),
+            "attributes": {"topic": topic},
+        }
+        with self._lock:
+            self._pending.append({"message": message, "subscription": self.subscription})
+            self.published += 1
+
+    def push_envelopes(self) -> List[Dict]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
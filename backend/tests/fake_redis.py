@@ -0,0 +1,30 @@
+"""Local stand-in for the subset of ``redis.asyncio`` used by RedisJobStore."""
+import time
+from typing import Dict, Optional, Tuple
+
+
+class FakeRedis:
+    """In-memory string keys with ``ex`` expiry; values come back as bytes like Redis."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+
+    async def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        self.commands += 1
+        if isinstance(value, str):
+            value = value.encode()
+        self._data[key] = (value, self._clock() + ex if ex else None)
+        return True
+
+    async def get(self, key: str) -> Optional[bytes]:
+        self.commands += 1
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and self._clock() >= expires_at:
+            del self._data[key]
+            return None
+        return value
@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.ai_service import AIService
+from conftest import RecordingGmailService
+from fake_llm import FakeChatModel, tool_call
+
+
+@pytest.mark.asyncio
+async def test_agent_is_built_once_and_tools_bound_per_user():
+    llm = FakeChatModel.from_responses([
+        tool_call("send_email", to="x@example.com", subject="Hi", body="Body"),
+        "Email sent.",
+    ])
+    service = AIService(llm=llm)
+    agent = service.agent
+    alice, bob = RecordingGmailService("alice"), RecordingGmailService("bob")
+
+    first = await service.interpret_command("email x", alice)
+    second = await service.interpret_command("email x", bob)
+
+    assert service.agent is agent
+    assert first["output"] == second["output"] == "Email sent."
+    assert alice.sent == [("x@example.com", "Hi", "Body")]
+    assert bob.sent == [("x@example.com", "Hi", "Body")]
+    assert llm.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_generate_draft_splits_subject_and_body():
+    service = AIService(llm=FakeChatModel.from_responses(["SUBJECT: Lunch\n---\nSee you at noon."]))
+
+    draft = await service.generate_draft("lunch tomorrow")
+
+    assert draft == {"subject": "Lunch", "body": "See you at noon."}
+
+
+@pytest.mark.asyncio
+async def test_generate_draft_rejects_malformed_output():
+    service = AIService(llm=FakeChatModel.from_responses(["no separator here"]))
+
+    with pytest.raises(ValueError):
+        await service.generate_draft("lunch tomorrow")
+
+
+def test_get_ai_service_is_app_scoped():
+    from app.api.deps import get_ai_service
+
+    assert get_ai_service() is get_ai_service()
@@ -0,0 +1,136 @@
+import base64
+import email
+import io
+import os
+
+import pytest
+from email.policy import default
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.main import app
+from app.services.attachments import Attachment, Base64UrlDecoder, iter_mime_message, json_data_chunks
+from app.services.gmail_service import GmailService
+from conftest import make_user
+
+
+def sent_message(server, index=-1):
+    return email.message_from_bytes(base64.urlsafe_b64decode(server.sent[index]["raw"]), policy=default)
+
+
+@pytest.mark.asyncio
+async def test_data_is_decoded_across_arbitrary_chunk_boundaries():
+    data = os.urandom(1000)
+    body = b'{"size": 1000, "data": "' + base64.urlsafe_b64encode(data).rstrip(b"=") + b'"}'
+
+    for size in (1, 3, 7, 64, len(body)):
+        async def chunks():
+            for start in range(0, len(body), size):
+                yield body[start:start + size]
+
+        decoder = Base64UrlDecoder()
+        decoded = b"".join([decoder.decode(piece) async for piece in json_data_chunks(chunks())]) + decoder.flush()
+        assert decoded == data
+
+    async def no_data():
+        yield b'{"size": 0}'
+
+    with pytest.raises(ValueError):
+        [piece async for piece in json_data_chunks(no_data())]
+
+
+def test_mime_encoder_streams_attachments_in_whole_lines():
+    data = os.urandom(200000)
+    chunks = list(iter_mime_message(
+        ["bob@example.com"], "Café notes", "<p>See attached</p>", cc=["carol@example.com"],
+        attachments=[Attachment("résumé.pdf", io.BytesIO(data), "application/pdf"), Attachment("empty.txt", b"", "text/plain")]
+    ))
+
+    assert max(map(len, chunks)) < 100000
+    message = email.message_from_bytes(b"".join(chunks), policy=default)
+    assert message["Subject"] == "Café notes" and message["Cc"] == "carol@example.com"
+    html, pdf, empty = message.iter_parts()
+    assert html.get_content() == "<p>See attached</p>"
+    assert (pdf.get_filename(), pdf.get_content_type(), pdf.get_content()) == ("résumé.pdf", "application/pdf", data)
+    assert all(len(line) <= 78 for line in b"".join(chunks).split(b"\n"))
+    assert empty.get_filename() == "empty.txt" and empty.get_content() == ""
+
+
+def test_attachments_are_listed_and_streamed(fake_gmail, monkeypatch):
+    data = os.urandom(300001)
+    fake_gmail.add_attachment("msg000004", "report.pdf", data)
+    fake_gmail.add_attachment("msg000004", "naïve.txt", b"plain text", "text/plain")
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+
+    listed = client.get("/api/v1/emails/messages/msg000004/attachments").json()
+    assert [(a["partId"], a["filename"], a["mimeType"], a["size"]) for a in listed] == [
+        ("2", "report.pdf", "application/pdf", 300001), ("3", "naïve.txt", "text/plain", 10)
+    ]
+    # Listing reads the part structure only, never attachment or body data.
+    assert fake_gmail.bytes_sent < 2000
+
+    response = client.get("/api/v1/emails/messages/msg000004/attachments/2")
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-disposition"] == 'attachment; filename="report.pdf"'
+    response = client.get("/api/v1/emails/messages/msg000004/attachments/3")
+    assert response.content == b"plain text"
+    assert response.headers["content-disposition"] == "attachment; filename*=utf-8''na%C3%AFve.txt"
+
+    assert client.get("/api/v1/emails/messages/msg000004/attachments/0").status_code == 404
+    assert client.get("/api/v1/emails/messages/missing/attachments/2").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_downloads_are_decoded_in_bounded_chunks(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_ATTACHMENT_CHUNK_BYTES", 4096)
+    data = os.urandom(100000)
+    attachment_id = fake_gmail.add_attachment("msg000001", "big.bin", data)["body"]["attachmentId"]
+    service = GmailService(make_user())
+
+    stream = await service.open_attachment("msg000001", attachment_id)
+    chunks = [chunk async for chunk in stream]
+
+    assert b"".join(chunks) == data
+    assert len(chunks) > 20 and max(map(len, chunks)) <= 4096 * 3 // 4
+    assert stream.response.is_closed
+
+
+def test_send_with_attachments_uploads_large_messages_in_chunks(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_SEND_INLINE_MAX_BYTES", 64 * 1024)
+    monkeypatch.setattr(settings, "GMAIL_UPLOAD_CHUNK_BYTES", 256 * 1024)
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+    small, large = b"tiny file", os.urandom(600000)
+
+    def send(data):
+        return client.post("/api/v1/emails/send", json={
+            "recipients": ["bob@example.com"], "subject": "Files", "body": "<p>Attached</p>",
+            "attachments": [{"filename": "data.bin", "content": base64.b64encode(data).decode()}]
+        })
+
+    assert send(small).status_code == 200
+    assert fake_gmail.upload_chunks == 0
+    assert send(large).status_code == 200
+    # 600 KB of attachment is about 800 KB of MIME: four 256 KiB chunks.
+    assert fake_gmail.upload_chunks == 4
+    for index, data in ((0, small), (1, large)):
+        html, attachment = sent_message(fake_gmail, index).iter_parts()
+        assert (attachment.get_filename(), attachment.get_content_type()) == ("data.bin", "application/octet-stream")
+        assert attachment.get_content() == data
+
+    response = client.post("/api/v1/emails/send", json={
+        "recipients": ["bob@example.com"], "subject": "Files", "body": "x",
+        "attachments": [{"filename": "a.bin", "content": "not base64!"}]
+    })
+    assert response.status_code == 422
+
+    for content_type in ("text/plain\r\nBcc: eve@example.com", "pdf", "text/plain; charset=utf-8"):
+        response = client.post("/api/v1/emails/send", json={
+            "recipients": ["bob@example.com"], "subject": "Files", "body": "x",
+            "attachments": [{"filename": "a.txt", "content_type": content_type, "content": "aGk="}]
+        })
+        assert response.status_code == 422
@@ -0,0 +1,100 @@
+import sqlite3
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.api.deps import get_current_user
+from app.core.security import VerifiedTokenCache, create_access_token, verified_token_cache, verify_token
+from app.services.credential_store import CredentialStore, get_credential_store
+from conftest import make_user
+
+
+def test_verify_token_reuses_verified_payloads():
+    token = create_access_token(make_user())
+
+    first = verify_token(token)
+    second = verify_token(token)
+
+    assert first == second
+    assert first["email"] == "dummy@example.com"
+    assert (verified_token_cache.hits, verified_token_cache.misses) == (1, 1)
+    # Callers get their own copy.
+    second["email"] = "changed"
+    assert verify_token(token)["email"] == "dummy@example.com"
+
+
+def test_tampered_tokens_are_rejected_and_not_cached():
+    token = create_access_token(make_user())
+    header, payload, signature = token.split(".")
+    tampered = f"{header}.{payload}.{signature[:-2]}AA"
+
+    assert verify_token(tampered) is None
+    assert verify_token(tampered) is None
+    assert verified_token_cache.hits == 0
+
+
+def test_cache_respects_exp():
+    now = [1000.0]
+    cache = VerifiedTokenCache(max_size=10, clock=lambda: now[0])
+    cache.set("token", {"sub": "a", "exp": 1060})
+
+    assert cache.get("token") == {"sub": "a", "exp": 1060}
+    now[0] = 1060
+    assert cache.get("token") is None
+
+
+def test_cache_skips_tokens_without_exp_and_is_bounded():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.set("forever", {"sub": "a"})
+    assert cache.get("forever") is None
+
+    exp = time.time() + 60
+    for token in ("t1", "t2", "t3"):
+        cache.set(token, {"sub": token, "exp": exp})
+    assert cache.get("t1") is None
+    assert cache.get("t3")["sub"] == "t3"
+
+
+def test_expired_tokens_are_rejected():
+    token = create_access_token(make_user(), expires_delta=timedelta(seconds=-1))
+    assert verify_token(token) is None
+
+
+def test_credential_store_encrypts_and_survives_restart(tmp_path):
+    path = str(tmp_path / "credentials.db")
+    credentials = make_user()["credentials"]
+    store = CredentialStore(path, secret="s3cret")
+    credential_id = store.put("dummy@example.com", credentials)
+    store.close()
+
+    raw = sqlite3.connect(path).execute("SELECT data FROM credentials").fetchone()[0]
+    assert b"dummy_refresh_token" not in raw
+
+    assert CredentialStore(path, secret="s3cret").get(credential_id) == credentials
+    assert CredentialStore(path, secret="rotated").get(credential_id) is None
+
+
+@pytest.mark.asyncio
+async def test_server_side_credentials_keep_tokens_small():
+    user = make_user()
+    full_token = create_access_token(user)
+    credential_id = get_credential_store().put(user["email"], user["credentials"])
+    short_token = create_access_token({"sub": user["sub"], "email": user["email"], "cid": credential_id})
+
+    assert len(short_token) < len(full_token) / 2
+    assert "credentials" not in jwt.get_unverified_claims(short_token)
+    resolved = await get_current_user(short_token)
+    assert resolved["credentials"] == user["credentials"]
+    assert resolved["email"] == user["email"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_credential_id_is_unauthorized():
+    token = create_access_token({"sub": "a@example.com", "email": "a@example.com", "cid": "missing"})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(token)
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,161 @@
+import base64
+import email
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.main import app
+from app.models.email import EmailBase
+from app.services.bulk_send import BulkSender, TokenBucket, is_retryable
+from app.services.gmail_service import GmailService
+from conftest import make_user
+
+
+def decode_sent(sent: dict) -> email.message.Message:
+    return email.message_from_bytes(base64.urlsafe_b64decode(sent["raw"]))
+
+
+def make_messages(count: int):
+    return [EmailBase(to=[f"to{i}@example.com"], subject=f"Subject {i}", body="Hello") for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_throttles(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        await bucket.acquire()
+
+    assert clock.sleeps == [0.5, 0.5]
+    assert clock.now == pytest.approx(1001.0)
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_delivers_all_messages(fake_gmail):
+    service = GmailService(make_user())
+    sender = BulkSender(service, limiter=TokenBucket(rate=1000, capacity=1000), concurrency=4)
+
+    results = await sender.send(make_messages(10))
+
+    assert [r["status"] for r in results] == ["sent"] * 10
+    assert [r["index"] for r in results] == list(range(10))
+    assert len({r["id"] for r in results}) == 10
+    assert sorted(decode_sent(s)["To"] for s in fake_gmail.sent) == sorted(f"to{i}@example.com" for i in range(10))
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_retries_throttled_and_server_errors(fake_gmail, clock):
+    fake_gmail.send_failures = [429, 503]
+    sender = BulkSender(
+        GmailService(make_user()),
+        limiter=TokenBucket(rate=1000, capacity=1000),
+        concurrency=1,
+        backoff_seconds=0.1,
+        sleep=clock.sleep
+    )
+
+    results = await sender.send(make_messages(2))
+
+    assert [r["status"] for r in results] == ["sent", "sent"]
+    assert results[0]["attempts"] == 3
+    assert results[1]["attempts"] == 1
+    assert len(clock.sleeps) == 2
+    assert 0.05 <= clock.sleeps[0] <= 0.1 and 0.1 <= clock.sleeps[1] <= 0.2
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_reports_permanent_failures_per_message(fake_gmail):
+    fake_gmail.send_failures = [400]
+    sender = BulkSender(GmailService(make_user()), limiter=TokenBucket(rate=1000, capacity=1000), concurrency=1)
+
+    results = await sender.send(make_messages(3))
+
+    assert [r["status"] for r in results] == ["failed", "sent", "sent"]
+    assert results[0]["attempts"] == 1
+    assert "400" in results[0]["error"]
+
+
+def test_only_throttled_sends_are_retryable():
+    def http_error(status, reason=None):
+        error = {"code": status, "message": "error", "errors": [{"reason": reason}] if reason else []}
+        return HttpError(httplib2.Response({"status": status}), json.dumps({"error": error}).encode())
+
+    assert is_retryable(http_error(429)) and is_retryable(http_error(503))
+    assert is_retryable(http_error(403, "userRateLimitExceeded"))
+    assert not is_retryable(http_error(403, "forbidden"))
+    assert not is_retryable(http_error(500)) and not is_retryable(http_error(502))
+    assert is_retryable(ConnectionRefusedError()) and not is_retryable(TimeoutError())
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_never_resends_after_ambiguous_server_errors(fake_gmail):
+    fake_gmail.send_failures = [500, 502]
+    sender = BulkSender(GmailService(make_user()), limiter=TokenBucket(rate=1000, capacity=1000), concurrency=1)
+
+    results = await sender.send(make_messages(3))
+
+    assert [r["status"] for r in results] == ["failed", "failed", "sent"]
+    assert [r["attempts"] for r in results] == [1, 1, 1]
+    assert all(r["error"].startswith("Unknown delivery state") for r in results[:2])
+    assert len(fake_gmail.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_gives_up_after_max_retries(fake_gmail, clock):
+    fake_gmail.send_failures = [503] * 3
+    sender = BulkSender(
+        GmailService(make_user()),
+        limiter=TokenBucket(rate=1000, capacity=1000),
+        max_retries=2,
+        sleep=clock.sleep
+    )
+
+    results = await sender.send(make_messages(1))
+
+    assert results[0]["status"] == "failed"
+    assert results[0]["attempts"] == 3
+    assert fake_gmail.sent == []
+
+
+def test_send_endpoints_include_every_recipient(fake_gmail, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/emails/send", json={
+        "recipients": ["a@example.com", "b@example.com"],
+        "subject": "Hi",
+        "body": "Body",
+        "cc": ["c@example.com"]
+    })
+    assert response.status_code == 200
+
+    response = client.post("/api/v1/emails/send/bulk", json={"messages": [
+        {"to": ["d@example.com"], "subject": "One", "body": "1", "bcc": ["e@example.com", "f@example.com"]},
+        {"to": ["g@example.com", "h@example.com"], "subject": "Two", "body": "2"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["sent"], data["failed"]) == (2, 0)
+
+    single, first, second = (decode_sent(s) for s in fake_gmail.sent[:1] + sorted(
+        fake_gmail.sent[1:], key=lambda s: decode_sent(s)["Subject"]
+    ))
+    assert (single["To"], single["Cc"]) == ("a@example.com, b@example.com", "c@example.com")
+    assert first["Bcc"] == "e@example.com, f@example.com"
+    assert second["To"] == "g@example.com, h@example.com"
+
+
+def test_bulk_endpoint_rejects_oversized_requests(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    monkeypatch.setattr(settings, "GMAIL_BULK_SEND_MAX_MESSAGES", 2)
+    payload = {"messages": [m.model_dump() for m in make_messages(3)]}
+
+    response = TestClient(app).post("/api/v1/emails/send/bulk", json=payload)
+
+    assert response.status_code == 413
@@ -0,0 +1,73 @@
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.command_parser import parse_command
+from command_corpus import FAST_PATH_CORPUS
+from conftest import RecordingGmailService
+from fake_llm import FakeChatModel
+
+
+@pytest.mark.parametrize("command, expected", FAST_PATH_CORPUS)
+def test_corpus(command, expected):
+    assert parse_command(command) == expected
+
+
+@pytest.mark.asyncio
+async def test_fetch_command_skips_the_llm():
+    llm = FakeChatModel.from_responses(["unused"])
+    service = AIService(llm=llm, response_cache=None)
+
+    result = await service.interpret_command("show my last 2 emails", RecordingGmailService())
+
+    assert llm.calls == 0
+    assert result["output"].startswith("Here are your 2 most recent emails:")
+    assert result["fast_path"] == {"type": "fetch_emails", "params": {"limit": 2}}
+
+
+@pytest.mark.asyncio
+async def test_send_command_calls_gmail_directly():
+    llm = FakeChatModel.from_responses(["unused"])
+    service = AIService(llm=llm, response_cache=None)
+    gmail_service = RecordingGmailService()
+
+    result = await service.interpret_command(
+        "send an email to bob@example.com with subject: Lunch and body: See you at noon", gmail_service
+    )
+
+    assert llm.calls == 0
+    assert gmail_service.sent == [("bob@example.com", "Lunch", "See you at noon")]
+    assert result["output"] == 'Email sent to bob@example.com with subject "Lunch".'
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_commands_fall_through_to_the_agent():
+    llm = FakeChatModel.from_responses(["Here is a summary."])
+    service = AIService(llm=llm, response_cache=None)
+
+    result = await service.interpret_command("summarize my last 10 emails", RecordingGmailService())
+
+    assert llm.calls == 1
+    assert result["output"] == "Here is a summary."
+
+
+@pytest.mark.asyncio
+async def test_fast_path_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "COMMAND_FAST_PATH_ENABLED", False)
+    llm = FakeChatModel.from_responses(["Agent answer."])
+    service = AIService(llm=llm, response_cache=None)
+
+    result = await service.interpret_command("show my last 2 emails", RecordingGmailService())
+
+    assert llm.calls == 1
+    assert result["output"] == "Agent answer."
+
+
+@pytest.mark.asyncio
+async def test_stream_command_fast_path_events():
+    service = AIService(llm=FakeChatModel.from_responses(["unused"]), response_cache=None)
+
+    events = [event async for event in service.stream_command("show my last 1 email", RecordingGmailService())]
+
+    assert [event["event"] for event in events] == ["tool_start", "tool_end", "final"]
+    assert events[0]["data"] == {"tool": "fetch_emails", "input": {"limit": 1}}
@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_ai_service, get_current_user, get_gmail_service
+from app.main import app
+from app.services.ai_service import AIService
+from conftest import RecordingGmailService, make_user, parse_sse
+from fake_llm import FakeChatModel, tool_call
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(responses):
+        gmail_service = RecordingGmailService()
+        ai_service = AIService(llm=FakeChatModel.from_responses(responses, cycle=False))
+        monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+        monkeypatch.setitem(app.dependency_overrides, get_gmail_service, lambda: gmail_service)
+        monkeypatch.setitem(app.dependency_overrides, get_ai_service, lambda: ai_service)
+        return TestClient(app), gmail_service
+
+    return install
+
+
+def test_stream_emits_tool_calls_tokens_and_final_output(client):
+    test_client, gmail_service = client([
+        tool_call("fetch_emails", limit=2),
+        "You have two new emails.",
+    ])
+
+    with test_client.stream("POST", "/api/emails/process-command/stream", json={"command": "anything new in my mail?"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.read().decode())
+
+    kinds = [kind for kind, _ in events]
+    assert kinds.index("tool_start") < kinds.index("tool_end") < kinds.index("token")
+    assert events[kinds.index("tool_start")][1] == {"tool": "fetch_emails", "input": {"limit": 2}}
+    assert "".join(data["content"] for kind, data in events if kind == "token") == "You have two new emails."
+    assert events[-1] == ("final", {"output": "You have two new emails."})
+
+
+def test_stream_reports_errors_as_events(client):
+    # The scripted model has no response left, so the first LLM call fails.
+    test_client, _ = client([])
+
+    response = test_client.post("/api/emails/process-command/stream", json={"command": "do it"})
+
+    events = parse_sse(response.text)
+    assert events[-1][0] == "error"
+
+
+def test_stream_validates_command(client):
+    test_client, _ = client(["unused"])
+
+    response = test_client.post("/api/emails/process-command/stream", json={"command": "  "})
+
+    assert response.status_code == 422
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from app.services.ai_service import AIService
+from app.services.conversation_memory import (
+    ConversationMemory,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+)
+from conftest import RecordingGmailService
+from fake_llm import FakeChatModel, tool_call
+
+
+class CountingGmailService(RecordingGmailService):
+    def __init__(self, email: str = "dummy@example.com"):
+        super().__init__(email)
+        self.fetches = []
+
+    async def get_recent_emails(self, limit=10):
+        self.fetches.append(limit)
+        return [
+            {"subject": f"Subject {i}", "sender": f"s{i}@example.com", "snippet": f"snippet {i}"}
+            for i in range(1, limit + 1)
+        ]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryConversationStore()
+    else:
+        store = SQLiteConversationStore(str(tmp_path / "conversations.db"))
+        yield store
+        store.close()
+
+
+@pytest.mark.asyncio
+async def test_turns_are_replayed_with_their_tool_results(store):
+    memory = ConversationMemory(store)
+    emails = {"emails": [{"from": "a@example.com", "subject": "Hi", "snippet": "hello"}]}
+
+    await memory.record("alice", "what's new?", "One email from a@example.com.", [("fetch_emails", {"limit": 1}, emails)])
+
+    human, call, result, answer = memory.history("alice")
+    assert isinstance(human, HumanMessage) and human.content == "what's new?"
+    assert call.additional_kwargs["tool_calls"][0]["function"]["name"] == "fetch_emails"
+    assert isinstance(result, ToolMessage) and result.tool_call_id == call.additional_kwargs["tool_calls"][0]["id"]
+    assert "a@example.com" in result.content
+    assert isinstance(answer, AIMessage) and answer.content == "One email from a@example.com."
+    assert memory.history("bob") == []
+
+
+@pytest.mark.asyncio
+async def test_oldest_turns_are_trimmed_to_the_token_budget(store):
+    memory = ConversationMemory(store, max_tokens=40)
+
+    for i in range(5):
+        await memory.record("alice", f"command {i} " + "x" * 40, f"answer {i}")
+
+    turns = memory.load("alice")["turns"]
+    assert [turn["output"] for turn in turns] == ["answer 3", "answer 4"]
+    assert memory.stats()["trimmed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_summarized_when_a_summarizer_is_set(store):
+    folded = []
+
+    async def summarizer(summary, turns):
+        folded.extend(turn["output"] for turn in turns)
+        return f"{summary} {' '.join(turn['output'] for turn in turns)}".strip()
+
+    memory = ConversationMemory(store, max_tokens=40, summarizer=summarizer)
+    for i in range(4):
+        await memory.record("alice", f"command {i} " + "x" * 40, f"answer {i}")
+    await memory.drain()
+
+    history = memory.history("alice")
+    assert isinstance(history[0], SystemMessage)
+    assert history[0].content.endswith("answer 0 answer 1")
+    assert folded == ["answer 0", "answer 1"]
+
+
+@pytest.mark.asyncio
+async def test_summaries_run_after_the_turn_is_recorded(store):
+    release = asyncio.Event()
+
+    async def summarizer(summary, turns):
+        await release.wait()
+        return "earlier turns"
+
+    memory = ConversationMemory(store, max_tokens=40, summarizer=summarizer)
+    for i in range(4):
+        await memory.record("alice", f"command {i} " + "x" * 40, f"answer {i}")
+
+    # The trimmed turns are saved before the summarizer answers.
+    assert [turn["output"] for turn in memory.load("alice")["turns"]] == ["answer 2", "answer 3"]
+    assert memory.load("alice")["summary"] == ""
+
+    release.set()
+    await memory.drain()
+    assert memory.load("alice")["summary"] == "earlier turns"
+    assert memory.stats()["summaries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_conversations_start_over(store, clock):
+    memory = ConversationMemory(store, ttl_seconds=60, clock=clock)
+    await memory.record("alice", "hello", "hi")
+
+    clock.now += 61
+
+    assert memory.history("alice") == []
+
+
+@pytest.mark.asyncio
+async def test_follow_up_sees_history_and_reuses_the_fetch():
+    llm = FakeChatModel.from_responses([
+        tool_call("fetch_emails", limit=5),
+        "You have 5 emails; the second is from s2@example.com.",
+        tool_call("fetch_emails", limit=2),
+        "The second one says: snippet 2.",
+    ], cycle=False)
+    service = AIService(llm=llm, response_cache=None, memory=ConversationMemory(InMemoryConversationStore()))
+    gmail_service = CountingGmailService()
+
+    await service.interpret_command("what's in my inbox?", gmail_service)
+    result = await service.interpret_command("what does the second one say?", gmail_service)
+
+    assert result["output"] == "The second one says: snippet 2."
+    # The follow-up prompt carries the first exchange, and the repeated
+    # fetch is answered from it instead of Gmail.
+    prompt = [message.content for message in llm.prompts[2]]
+    assert "what's in my inbox?" in prompt
+    assert any("s2@example.com" in content for content in prompt)
+    assert gmail_service.fetches == [5]
+    assert service.memory.stats()["reused"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_fetches_go_back_to_gmail(clock):
+    memory = ConversationMemory(InMemoryConversationStore(), reuse_seconds=60, clock=clock)
+    service = AIService(llm=FakeChatModel.from_responses(["unused"]), response_cache=None, memory=memory)
+    gmail_service = CountingGmailService()
+
+    await service.interpret_command("show my last 3 emails", gmail_service)
+    await service.interpret_command("show my last 2 emails", gmail_service)
+    clock.now += 61
+    await service.interpret_command("show my last 2 emails", gmail_service)
+    await service.interpret_command("show my last 4 emails", gmail_service)
+
+    assert gmail_service.fetches == [3, 2, 4]
@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_ai_service, get_current_user
+from app.main import app
+from app.services.ai_service import AIService, DraftStreamParser, parse_draft
+from conftest import make_user, parse_sse
+from fake_llm import FakeChatModel
+
+DRAFT = "SUBJECT: Quarterly review\n---\n\nHi team,\n\nLet's meet on Friday.\n\nBest,\nSam\n"
+
+
+def stream(chunks):
+    parser = DraftStreamParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return events, parser.close()
+
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, len(DRAFT)])
+def test_stream_matches_non_streaming_parse(size):
+    events, final = stream(split_every(DRAFT, size))
+
+    assert final == parse_draft(DRAFT)
+    assert events[0] == {"event": "subject", "data": {"subject": "Quarterly review"}}
+    assert [e["event"] for e in events[1:]] == ["body"] * (len(events) - 1)
+    assert "".join(e["data"]["content"] for e in events[1:]) == final["body"]
+
+
+@pytest.mark.parametrize("chunks", [
+    ["SUBJECT: Hi -", "-", "- body"],
+    ["SUBJECT: Hi -", "-- body"],
+    ["SUBJECT: Hi --", "- body"],
+    ["SUBJECT: Hi ", "---", " ", "body"],
+])
+def test_separator_split_across_chunks(chunks):
+    events, final = stream(chunks)
+
+    assert final == {"subject": "Hi", "body": "body"}
+    assert events == [
+        {"event": "subject", "data": {"subject": "Hi"}},
+        {"event": "body", "data": {"content": "body"}},
+    ]
+
+
+def test_subject_is_emitted_before_body_arrives():
+    parser = DraftStreamParser()
+
+    assert parser.feed("SUBJECT: Hello") == []
+    assert parser.feed("\n---") == [{"event": "subject", "data": {"subject": "Hello"}}]
+    assert parser.feed("\n") == []
+
+
+def test_missing_separator_raises_like_generate_draft():
+    parser = DraftStreamParser()
+    parser.feed("SUBJECT: no body")
+
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_draft_stream_endpoint(monkeypatch):
+    ai_service = AIService(llm=FakeChatModel.from_responses([DRAFT]))
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    monkeypatch.setitem(app.dependency_overrides, get_ai_service, lambda: ai_service)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/emails/draft/stream", json={"context": "review meeting"})
+
+    events = parse_sse(response.text)
+    assert events[0] == ("subject", {"subject": "Quarterly review"})
+    assert events[-1] == ("final", parse_draft(DRAFT))
+    assert client.post("/api/v1/emails/draft", json={"context": "review meeting"}).json() == events[-1][1]
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app.services.gmail_cache import GmailServiceCache
+from app.services.gmail_service import GmailService
+from conftest import make_user
+
+
+def make_cache(**kwargs):
+    built = []
+
+    def factory(user):
+        built.append(user["email"])
+        return object()
+
+    cache = GmailServiceCache(factory=factory, **kwargs)
+    return cache, built
+
+
+def test_reuses_service_for_same_user():
+    cache, built = make_cache()
+
+    first = cache.get(make_user("a@example.com"))
+    second = cache.get(make_user("a@example.com"))
+
+    assert first is second
+    assert built == ["a@example.com"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_new_credentials_get_new_service():
+    cache, built = make_cache()
+
+    first = cache.get(make_user("a@example.com", token="old"))
+    second = cache.get(make_user("a@example.com", token="new"))
+
+    assert first is not second
+    assert len(built) == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache, built = make_cache(ttl_seconds=60, clock=clock)
+
+    cache.get(make_user("a@example.com"))
+    clock.now += 61
+    cache.get(make_user("a@example.com"))
+
+    assert len(built) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, built = make_cache(max_size=2)
+
+    cache.get(make_user("a@example.com"))
+    cache.get(make_user("b@example.com"))
+    cache.get(make_user("a@example.com"))
+    cache.get(make_user("c@example.com"))
+    cache.get(make_user("a@example.com"))
+    cache.get(make_user("b@example.com"))
+
+    assert built == ["a@example.com", "b@example.com", "c@example.com", "b@example.com"]
+    assert cache.stats()["size"] == 2
+
+
+def test_routes_share_cached_service(fake_gmail, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user
+    from app.main import app
+    from app.services.gmail_cache import gmail_service_cache
+
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+
+    for _ in range(3):
+        assert client.get("/api/v1/emails/recent?limit=2").status_code == 200
+
+    assert gmail_service_cache.stats()["misses"] == 1
+    assert gmail_service_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_service_built_off_the_event_loop_can_sync(fake_gmail, message_store):
+    # Cache misses build the service in FastAPI's threadpool, which has no
+    # event loop; asyncio primitives must not be created there.
+    service = await asyncio.to_thread(GmailService, make_user(), message_store)
+
+    assert len(await service.get_recent_emails(5)) == 5
@@ -0,0 +1,62 @@
+"""Load test: Gmail I/O from concurrent users must not serialize on the event loop."""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import Request
+
+from app.api.deps import get_current_user
+from app.main import app
+from conftest import make_user
+
+LATENCY = 0.1
+
+
+def user_from_header(request: Request):
+    return make_user(email=request.headers["X-Test-User"])
+
+
+@pytest.fixture
+def slow_gmail(fake_gmail, monkeypatch):
+    fake_gmail.latency = LATENCY
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, user_from_header)
+    return fake_gmail
+
+
+async def fetch_recent(client: httpx.AsyncClient, user: str) -> httpx.Response:
+    return await client.get("/api/v1/emails/recent?limit=3", headers={"X-Test-User": user})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_users_overlap(slow_gmail):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        start = time.perf_counter()
+        response = await fetch_recent(client, "user0@example.com")
+        single = time.perf_counter() - start
+        assert response.status_code == 200
+
+        users = [f"user{i}@example.com" for i in range(1, 9)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(fetch_recent(client, user) for user in users))
+        concurrent = time.perf_counter() - start
+
+    assert all(r.status_code == 200 and len(r.json()) == 3 for r in responses)
+    # Serialized on the loop this would take len(users) * single.
+    assert concurrent < single * len(users) / 3
+
+
+@pytest.mark.asyncio
+async def test_health_check_not_blocked_by_gmail_call(slow_gmail):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        slow = asyncio.create_task(fetch_recent(client, "user@example.com"))
+        await asyncio.sleep(LATENCY / 4)
+
+        start = time.perf_counter()
+        health = await client.get("/health_check")
+        elapsed = time.perf_counter() - start
+
+        assert health.status_code == 200
+        assert not slow.done()
+        assert elapsed < LATENCY
+        assert (await slow).status_code == 200
@@ -0,0 +1,179 @@
+import threading
+import time
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.core.config import settings
+from app.services.gmail_service import GmailService
+from conftest import make_user
+
+
+@pytest.mark.asyncio
+async def test_get_recent_emails_uses_batch_requests(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_BATCH_SIZE", 10)
+    service = GmailService(make_user())
+
+    emails = await service.get_recent_emails(25)
+
+    assert [email["id"] for email in emails] == [m["id"] for m in fake_gmail.messages[:25]]
+    # One list call plus ceil(25 / 10) batch calls.
+    assert fake_gmail.round_trips == 4
+    assert [path for _, path in fake_gmail.request_log].count("/batch") == 3
+
+
+@pytest.mark.asyncio
+async def test_batches_in_flight_are_bounded(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "GMAIL_BATCH_CONCURRENCY", 2)
+    original_dispatch_batch = fake_gmail.dispatch_batch
+    lock, in_flight, peak = threading.Lock(), [0], [0]
+
+    def slow_dispatch_batch(content_type, body):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        try:
+            return original_dispatch_batch(content_type, body)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    fake_gmail.dispatch_batch = slow_dispatch_batch
+    service = GmailService(make_user())
+
+    emails = await service.get_recent_emails(20)
+
+    assert len(emails) == 20
+    assert [path for _, path in fake_gmail.request_log].count("/batch") == 10
+    assert peak[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_recent_emails_parses_headers(fake_gmail):
+    service = GmailService(make_user())
+
+    emails = await service.get_recent_emails(1)
+
+    assert emails == [{
+        "id": "msg000025",
+        "threadId": "thread000008",
+        "snippet": "Snippet for message 25 & more",
+        "subject": "Subject 25",
+        "sender": "Sender 25 <sender25@example.com>",
+        "date": "Mon, 20 Nov 2023 10:00:00 +0000",
+    }]
+
+
+@pytest.mark.asyncio
+async def test_get_messages_retries_failed_batch_entries(fake_gmail):
+    service = GmailService(make_user())
+    original_dispatch = fake_gmail.dispatch
+    attempts = []
+
+    def flaky_dispatch(method, path, body):
+        if "msg000024" in path and not attempts:
+            attempts.append(path)
+            return 500, {"error": {"code": 500, "message": "backend error"}}
+        return original_dispatch(method, path, body)
+
+    fake_gmail.dispatch = flaky_dispatch
+
+    messages = await service._get_messages(["msg000025", "msg000024", "msg000023"], format="full")
+
+    assert [m["id"] for m in messages] == ["msg000025", "msg000024", "msg000023"]
+    assert len(attempts) == 1
+
+
+@pytest.mark.asyncio
+async def test_throttled_batch_entries_back_off_until_they_succeed(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_FETCH_BACKOFF_SECONDS", 0.01)
+    service = GmailService(make_user())
+    original_dispatch = fake_gmail.dispatch
+    throttled = {"msg000024": 3, "msg000023": 9}
+    calls = []
+
+    def throttling_dispatch(method, path, body):
+        message_id = path.split("?")[0].rsplit("/", 1)[1]
+        calls.append((message_id, time.monotonic()))
+        if throttled.get(message_id):
+            throttled[message_id] -= 1
+            return 429, {"error": {"code": 429, "message": "rate limited"}}
+        return original_dispatch(method, path, body)
+
+    fake_gmail.dispatch = throttling_dispatch
+
+    messages = await service._get_messages(["msg000025", "msg000024"], format="full")
+
+    assert [m["id"] for m in messages] == ["msg000025", "msg000024"]
+    times = [at for message_id, at in calls if message_id == "msg000024"]
+    # The batch attempt, then three plain calls spaced further and further apart.
+    assert len(times) == 4
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert gaps[0] >= 0.005 and gaps[2] >= 0.02
+
+    with pytest.raises(HttpError) as raised:
+        await service._get_messages(["msg000023"], format="full")
+    assert raised.value.resp.status == 429
+    # One batch attempt plus GMAIL_FETCH_MAX_RETRIES plain calls.
+    assert [message_id for message_id, _ in calls].count("msg000023") == 1 + settings.GMAIL_FETCH_MAX_RETRIES
+
+
+@pytest.mark.asyncio
+async def test_get_recent_emails_empty_inbox(fake_gmail):
+    fake_gmail.messages = []
+    service = GmailService(make_user())
+
+    assert await service.get_recent_emails(10) == []
+    assert fake_gmail.round_trips == 1
+
+
+@pytest.mark.asyncio
+async def test_list_views_fetch_metadata_only(fake_gmail):
+    service = GmailService(make_user())
+
+    emails = await service.get_recent_emails(5)
+
+    assert {"subject", "sender", "date", "snippet"} <= set(emails[0])
+    assert len(fake_gmail.batched_requests) == 5
+    for _, path in fake_gmail.batched_requests:
+        assert "format=metadata" in path
+        assert "fields=" in path
+
+
+@pytest.mark.asyncio
+async def test_full_fetch_mode_can_be_configured(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_LIST_FETCH_FORMAT", "full")
+    service = GmailService(make_user())
+
+    emails = await service.get_recent_emails(2)
+
+    assert all("format=full" in path for _, path in fake_gmail.batched_requests)
+    assert emails[0]["subject"] == "Subject 25"
+
+
+@pytest.mark.asyncio
+async def test_get_email_decodes_body(fake_gmail):
+    service = GmailService(make_user())
+
+    email = await service.get_email("msg000003")
+
+    assert email["subject"] == "Subject 3"
+    assert email["body"].startswith("Body of message 3.")
+
+
+def test_message_endpoint(fake_gmail, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user
+    from app.main import app
+
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/emails/messages/msg000007")
+    assert response.status_code == 200
+    assert response.json()["id"] == "msg000007"
+    assert "Body of message 7." in response.json()["body"]
+
+    assert client.get("/api/v1/emails/messages/missing").status_code == 404
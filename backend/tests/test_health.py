@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_health_prober
+from app.main import app
+from app.services.health import HealthProber, http_check
+
+
+def make_check(calls, error=None, delay=0):
+    async def check():
+        calls.append(1)
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+    return check
+
+
+@pytest.mark.asyncio
+async def test_snapshot_reports_status_age_and_errors(clock):
+    ok_calls, failing_calls = [], []
+    prober = HealthProber(
+        {"groq_api": make_check(ok_calls), "gmail_discovery": make_check(failing_calls, error="HTTP 502")},
+        interval_seconds=10,
+        clock=clock
+    )
+    assert prober.snapshot()["status"] == "starting"
+    assert prober.snapshot()["checks"]["groq_api"] == {"status": "pending"}
+
+    await prober.run_once()
+    clock.now += 4
+    snapshot = prober.snapshot()
+
+    assert snapshot["status"] == "unhealthy"
+    assert snapshot["checks"]["groq_api"]["status"] == "ok"
+    assert snapshot["checks"]["groq_api"]["age_seconds"] == 4
+    assert snapshot["checks"]["gmail_discovery"]["error"] == "HTTP 502"
+    assert not prober.ready
+    # Reading the snapshot never runs a check.
+    assert len(ok_calls) == len(failing_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_and_stale_checks_are_not_ready(clock):
+    prober = HealthProber({"groq_api": make_check([], delay=1)}, timeout_seconds=0.01, clock=clock)
+    await prober.run_once()
+    assert prober.snapshot()["checks"]["groq_api"]["error"] == "timed out after 0.01s"
+
+    prober = HealthProber({"groq_api": make_check([])}, interval_seconds=10, clock=clock)
+    await prober.run_once()
+    assert prober.ready
+    clock.now += 31
+    assert prober.snapshot()["status"] == "stale"
+
+
+@pytest.mark.asyncio
+async def test_background_loop_refreshes_until_closed():
+    calls = []
+    prober = HealthProber({"groq_api": make_check(calls)}, interval_seconds=0.01)
+    prober.start()
+    await asyncio.sleep(0.1)
+    await prober.aclose()
+    seen = len(calls)
+
+    await asyncio.sleep(0.05)
+    assert seen >= 3
+    assert len(calls) == seen
+
+
+@pytest.mark.asyncio
+async def test_http_check_status_rules():
+    def handler(request):
+        return httpx.Response({"/models": 401, "/token": 405, "/down": 503}[request.url.path])
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://probe") as client:
+        with pytest.raises(RuntimeError, match="HTTP 401"):
+            await http_check(client, "https://probe/models", healthy=lambda status: status == 200)()
+        # Reachable is enough for the token endpoint, which refuses a GET.
+        await http_check(client, "https://probe/token")()
+        with pytest.raises(RuntimeError, match="HTTP 503"):
+            await http_check(client, "https://probe/down")()
+
+
+def test_health_endpoints_serve_the_snapshot(monkeypatch):
+    calls = []
+    prober = HealthProber({"groq_api": make_check(calls)})
+    monkeypatch.setitem(app.dependency_overrides, get_health_prober, lambda: prober)
+    client = TestClient(app)
+
+    assert client.get("/health/live").json()["status"] == "ok"
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+    asyncio.run(prober.run_once())
+    for path in ("/health", "/health/ready"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.json()["checks"]["groq_api"]["status"] == "ok"
+        assert "version" in response.json()
+    assert len(calls) == 1
+
+
+def test_disabled_prober_is_healthy():
+    client = TestClient(app)
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["checks"] == {}
@@ -0,0 +1,150 @@
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_inbox_push_hub
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.services.gmail_service import GmailService
+from app.services.inbox_push import InboxPushHub
+from conftest import make_user
+from fake_pubsub import LocalPubSub
+
+TOPIC = "projects/test/topics/gmail"
+WEBHOOK = "/api/v1/push/gmail"
+VERIFICATION_TOKEN = "secret"
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    monkeypatch.setattr(settings, "PUBSUB_VERIFICATION_TOKEN", VERIFICATION_TOKEN)
+    hub = InboxPushHub(TOPIC)
+    monkeypatch.setitem(app.dependency_overrides, get_inbox_push_hub, lambda: hub)
+    return hub
+
+
+@pytest.fixture
+def pubsub(fake_gmail):
+    pubsub = LocalPubSub()
+    fake_gmail.on_notify = lambda data: pubsub.publish(TOPIC, data)
+    return pubsub
+
+
+async def deliver(pubsub: LocalPubSub, hub: InboxPushHub) -> None:
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        for envelope in pubsub.push_envelopes():
+            response = await client.post(WEBHOOK, params={"token": VERIFICATION_TOKEN}, json=envelope)
+            assert response.status_code == 204
+    await hub.drain()
+
+
+@pytest.mark.asyncio
+async def test_new_mail_reaches_subscribers(fake_gmail, pubsub, hub):
+    events = hub.subscribe(GmailService(make_user()))
+    subscribed = await events.__anext__()
+    assert subscribed == {"event": "subscribed", "data": {"historyId": fake_gmail.history_id}}
+    assert fake_gmail.watch == {"topicName": TOPIC, "labelIds": ["INBOX"]}
+
+    fake_gmail.add_message(100)
+    fake_gmail.add_message(101, label_ids=["SPAM"])
+    fake_gmail.delete_message("msg000003")
+    await deliver(pubsub, hub)
+
+    event = await events.__anext__()
+    assert event["event"] == "inbox"
+    assert [m["id"] for m in event["data"]["added"]] == ["msg000100"]
+    assert event["data"]["added"][0]["subject"] == "Subject 100"
+    assert event["data"]["deleted"] == ["msg000003"]
+    assert event["data"]["historyId"] == fake_gmail.history_id
+    await events.aclose()
+    assert hub.stats()["users"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bursts_of_notifications_are_coalesced(fake_gmail, pubsub, hub):
+    events = hub.subscribe(GmailService(make_user()))
+    await events.__anext__()
+    for index in range(100, 105):
+        fake_gmail.add_message(index)
+
+    for envelope in pubsub.push_envelopes():
+        data = json.loads(base64.b64decode(envelope["message"]["data"]))
+        await hub.notify(data["emailAddress"], data["historyId"])
+    await hub.drain()
+
+    event = await events.__anext__()
+    assert sorted(m["id"] for m in event["data"]["added"]) == [f"msg{i:06d}" for i in range(100, 105)]
+    assert hub.stats()["syncs"] == 1
+    assert len([path for _, path in fake_gmail.request_log if "/history" in path]) == 1
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_expired_history_asks_clients_to_resync(fake_gmail, pubsub, hub):
+    events = hub.subscribe(GmailService(make_user()))
+    await events.__anext__()
+    fake_gmail.add_message(100)
+    fake_gmail.expire_history()
+    fake_gmail.add_message(101)
+
+    await deliver(pubsub, hub)
+
+    event = await events.__anext__()
+    assert event == {"event": "resync", "data": {"historyId": fake_gmail.history_id}}
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_a_resync_instead_of_a_gap(fake_gmail, pubsub, hub):
+    hub.queue_size = 1
+    events = hub.subscribe(GmailService(make_user()))
+    await events.__anext__()
+    for index in (100, 101):
+        fake_gmail.add_message(index)
+        await deliver(pubsub, hub)
+
+    assert (await events.__anext__())["event"] == "resync"
+    assert hub.stats()["dropped"] == 1
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_webhook_validation(hub, monkeypatch):
+    envelope = {"message": {"data": base64.b64encode(b'{"emailAddress": "x@example.com", "historyId": 5}').decode()}}
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.post(f"{WEBHOOK}?token={VERIFICATION_TOKEN}", json=envelope)).status_code == 204
+        assert (await client.post(f"{WEBHOOK}?token={VERIFICATION_TOKEN}", json={"message": {"data": "!!"}})).status_code == 204
+        assert (await client.post(WEBHOOK, json=envelope)).status_code == 403
+        assert (await client.post(f"{WEBHOOK}?token=wrong", json=envelope)).status_code == 403
+
+        # Unconfigured, the webhook cannot tell Pub/Sub from a forger.
+        monkeypatch.setattr(settings, "PUBSUB_VERIFICATION_TOKEN", None)
+        assert (await client.post(WEBHOOK, json=envelope)).status_code == 503
+
+    # Nobody is subscribed for x@example.com.
+    assert hub.stats()["ignored"] == 1
+
+
+def test_websocket_updates(fake_gmail, pubsub, hub):
+    token = create_access_token(make_user())
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/api/v1/push/updates/ws?token={token}") as websocket:
+            assert websocket.receive_json()["event"] == "subscribed"
+            fake_gmail.add_message(100)
+            for envelope in pubsub.push_envelopes():
+                assert client.post(WEBHOOK, params={"token": VERIFICATION_TOKEN}, json=envelope).status_code == 204
+
+            event = websocket.receive_json()
+            assert event["event"] == "inbox"
+            assert event["data"]["added"][0]["id"] == "msg000100"
+
+
+def test_websocket_requires_a_valid_token(hub):
+    with TestClient(app) as client:
+        with pytest.raises(Exception):
+            with client.websocket_connect("/api/v1/push/updates/ws?token=invalid") as websocket:
+                websocket.receive_json()
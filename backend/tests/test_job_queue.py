@@ -0,0 +1,258 @@
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.api.deps import get_ai_service, get_current_user, get_gmail_service, get_job_queue
+from app.main import app
+from app.services.job_queue import InMemoryJobStore, JobQueue, QueueFullError, RedisJobStore
+from conftest import RecordingGmailService, make_user, parse_sse
+from fake_redis import FakeRedis
+
+
+def returning(value, delay: float = 0.0):
+    async def work():
+        await asyncio.sleep(delay)
+        return value
+    return work
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_records_timings():
+    queue = JobQueue(workers=2)
+    job = await queue.submit("a@example.com", returning("done", 0.01), command="check mail")
+    assert job["status"] == "queued"
+    assert job["command"] == "check mail"
+
+    finished = await queue.wait(job["id"], timeout=1)
+
+    assert finished["status"] == "succeeded"
+    assert finished["result"] == "done"
+    assert finished["started_at"] >= finished["created_at"]
+    assert finished["finished_at"] >= finished["started_at"]
+    stats = queue.stats()
+    assert stats["succeeded"] == 1
+    assert stats["run_seconds"]["count"] == 1 and stats["run_seconds"]["max"] > 0
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_error():
+    async def boom():
+        raise ValueError("model unavailable")
+
+    queue = JobQueue(workers=1)
+    job = await queue.submit("a@example.com", boom)
+    finished = await queue.wait(job["id"], timeout=1)
+
+    assert finished["status"] == "failed"
+    assert finished["error"] == "model unavailable"
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_jobs_past_the_timeout_fail():
+    queue = JobQueue(workers=1, job_timeout=0.05)
+    slow = await queue.submit("a@example.com", returning("late", 10))
+    quick = await queue.submit("a@example.com", returning("done"))
+
+    finished = await queue.wait(slow["id"], timeout=1)
+
+    assert finished["status"] == "failed"
+    assert finished["error"] == "Timed out after 0.05 seconds"
+    assert (await queue.wait(quick["id"], timeout=1))["status"] == "succeeded"
+    assert queue.stats()["timed_out"] == 1
+    await queue.aclose()
+
+
+class FlakyStore(InMemoryJobStore):
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+
+    async def save(self, job):
+        if self.failing and job["status"] == "running":
+            raise ConnectionError("store unavailable")
+        await super().save(job)
+
+
+@pytest.mark.asyncio
+async def test_store_errors_do_not_stop_the_workers():
+    store = FlakyStore()
+    queue = JobQueue(store=store, workers=1)
+
+    first = await queue.submit("a@example.com", returning("one"))
+    assert (await queue.wait(first["id"], timeout=1))["status"] == "succeeded"
+    store.failing = False
+    second = await queue.submit("a@example.com", returning("two"))
+
+    assert (await queue.wait(second["id"], timeout=1))["result"] == "two"
+    assert (await store.load(first["id"]))["status"] == "succeeded"
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_workers_serve_users_round_robin():
+    order = []
+    gate = asyncio.Event()
+
+    def recording(name):
+        async def work():
+            await gate.wait()
+            order.append(name)
+        return work
+
+    queue = JobQueue(workers=1)
+    blocker = await queue.submit("blocker", recording("blocker"))
+    await asyncio.sleep(0)
+    jobs = [await queue.submit("heavy", recording(f"heavy{i}")) for i in range(3)]
+    jobs.append(await queue.submit("light", recording("light0")))
+    gate.set()
+
+    for job in [blocker] + jobs:
+        await queue.wait(job["id"], timeout=1)
+    assert order == ["blocker", "heavy0", "light0", "heavy1", "heavy2"]
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_depth_limits():
+    gate = asyncio.Event()
+    queue = JobQueue(workers=1, max_depth=3, max_per_user=2)
+    await queue.submit("a", gate.wait)
+    await asyncio.sleep(0)  # the worker picks up the first job
+
+    await queue.submit("a", gate.wait)
+    await queue.submit("a", gate.wait)
+    with pytest.raises(QueueFullError):
+        await queue.submit("a", gate.wait)
+    await queue.submit("b", gate.wait)
+    with pytest.raises(QueueFullError):
+        await queue.submit("c", gate.wait)
+
+    assert queue.stats()["rejected"] == 2
+    assert queue.stats()["queued"] == 3
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_and_running_jobs():
+    queue = JobQueue(workers=1)
+    running = await queue.submit("a", returning("late", 10))
+    queued = await queue.submit("a", returning("never"))
+    await asyncio.sleep(0.01)
+
+    assert (await queue.cancel(queued["id"]))["status"] == "cancelled"
+    assert (await queue.cancel(running["id"]))["status"] == "cancelled"
+    assert queue.stats()["cancelled"] == 2
+    assert queue.stats()["running"] == 0
+
+    # Finished jobs are left as they are.
+    done = await queue.submit("a", returning("ok"))
+    await queue.wait(done["id"], timeout=1)
+    assert (await queue.cancel(done["id"]))["status"] == "succeeded"
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_redis_store_serves_other_processes():
+    redis = FakeRedis()
+    queue = JobQueue(store=RedisJobStore(redis), workers=1, poll_interval=0.01)
+    job = await queue.submit("a", returning("done", 0.05))
+
+    # A second process sharing Redis only sees the stored records.
+    other = JobQueue(store=RedisJobStore(redis), poll_interval=0.01)
+    statuses = [record["status"] async for record in other.subscribe(job["id"])]
+
+    assert statuses[0] in ("queued", "running")
+    assert statuses[-1] == "succeeded"
+    assert (await other.get(job["id"]))["result"] == "done"
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_expires_finished_jobs():
+    now = [0.0]
+    store = InMemoryJobStore(ttl_seconds=10, clock=lambda: now[0])
+    await store.save({"id": "old", "finished_at": 0.0})
+    await store.save({"id": "running", "finished_at": None})
+
+    now[0] = 11
+    await store.save({"id": "new", "finished_at": 11.0})
+
+    assert await store.load("old") is None
+    assert await store.load("running") is not None
+    assert await store.load("new") is not None
+
+
+class SlowAIService:
+    def __init__(self):
+        self.gate = asyncio.Event()
+
+    async def interpret_command(self, command, gmail_service):
+        await self.gate.wait()
+        return {"output": f"Processed: {command}"}
+
+
+@pytest_asyncio.fixture
+async def job_client(monkeypatch):
+    ai_service = SlowAIService()
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: make_user("owner@example.com"))
+    monkeypatch.setitem(app.dependency_overrides, get_gmail_service, RecordingGmailService)
+    monkeypatch.setitem(app.dependency_overrides, get_ai_service, lambda: ai_service)
+    yield httpx.AsyncClient(app=app, base_url="http://test"), ai_service
+    await get_job_queue().aclose()
+
+
+@pytest.mark.asyncio
+async def test_job_endpoints(job_client):
+    client, ai_service = job_client
+    async with client:
+        response = await client.post("/api/emails/process-command/jobs", json={"command": "summarize my inbox"})
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        response = await client.get(f"/api/emails/process-command/jobs/{job_id}")
+        assert response.json()["status"] in ("queued", "running")
+
+        ai_service.gate.set()
+        response = await client.get(f"/api/emails/process-command/jobs/{job_id}?wait=5")
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"] == "Processed: summarize my inbox"
+
+        response = await client.get(f"/api/emails/process-command/jobs/{job_id}/events")
+        [(event, data)] = parse_sse(response.text)
+        assert (event, data["result"]) == ("succeeded", "Processed: summarize my inbox")
+
+        metrics = (await client.get("/metrics/jobs")).json()
+        assert metrics["submitted"] == 1 and metrics["succeeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_events_stream_status_changes(job_client):
+    client, ai_service = job_client
+    async with client:
+        job_id = (await client.post("/api/emails/process-command/jobs", json={"command": "x"})).json()["id"]
+        asyncio.get_running_loop().call_later(0.05, ai_service.gate.set)
+
+        response = await client.get(f"/api/emails/process-command/jobs/{job_id}/events")
+
+    events = parse_sse(response.text)
+    assert [event for event, _ in events][-2:] == ["running", "succeeded"]
+    assert events[-1][1]["result"] == "Processed: x"
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_private_and_cancellable(job_client, monkeypatch):
+    client, _ = job_client
+    async with client:
+        job_id = (await client.post("/api/emails/process-command/jobs", json={"command": "x"})).json()["id"]
+
+        monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: make_user("intruder@example.com"))
+        assert (await client.get(f"/api/emails/process-command/jobs/{job_id}")).status_code == 404
+        assert (await client.delete(f"/api/emails/process-command/jobs/{job_id}")).status_code == 404
+
+        monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: make_user("owner@example.com"))
+        response = await client.delete(f"/api/emails/process-command/jobs/{job_id}")
+        assert response.json()["status"] == "cancelled"
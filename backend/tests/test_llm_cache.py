@@ -0,0 +1,204 @@
+import hashlib
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.conversation_memory import ConversationMemory, InMemoryConversationStore
+from app.services.llm_cache import InMemoryCacheBackend, LLMResponseCache, SQLiteCacheBackend, create_llm_cache
+from conftest import RecordingGmailService
+from fake_llm import FakeChatModel, tool_call
+
+
+def bag_of_words(text: str, dims: int = 64):
+    vector = [0.0] * dims
+    for word in text.split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dims] += 1.0
+    return vector
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteCacheBackend(str(tmp_path / "cache.db"), **kwargs)
+        return InMemoryCacheBackend(**kwargs)
+
+    return make
+
+
+def test_exact_tier_matches_normalized_prompt(make_backend):
+    cache = LLMResponseCache(make_backend())
+    cache.store("u", "Summarize my last 10 emails", {"output": "summary"})
+
+    assert cache.lookup("u", "  summarize   MY last 10 emails ") == {"output": "summary"}
+    assert cache.lookup("other-user", "Summarize my last 10 emails") is None
+    assert cache.stats()["exact_hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_semantic_tier_uses_similarity_threshold(make_backend):
+    cache = LLMResponseCache(make_backend(), embedder=bag_of_words, similarity_threshold=0.8)
+    cache.store("u", "summarize my last ten emails please", {"output": "summary"})
+
+    assert cache.lookup("u", "please summarize my last ten emails") == {"output": "summary"}
+    assert cache.lookup("u", "delete the spam folder") is None
+    assert cache.lookup("v", "please summarize my last ten emails") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_tier_requires_matching_numbers(make_backend):
+    cache = LLMResponseCache(make_backend(), embedder=bag_of_words, similarity_threshold=0.5)
+    cache.store("u", "summarize my last 50 emails please", {"output": "fifty"})
+
+    assert cache.lookup("u", "summarize my last 5 emails please") is None
+    assert cache.lookup("u", "please summarize my last 50 emails") == {"output": "fifty"}
+
+
+def test_hashing_embedder_setting_enables_semantic_tier(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "LLM_CACHE_SIMILARITY_THRESHOLD", 0.8)
+    assert create_llm_cache().embedder is None
+
+    monkeypatch.setattr(settings, "LLM_CACHE_EMBEDDER", "hashing")
+    cache = create_llm_cache()
+    cache.store("u", "summarize my last 5 emails please", {"output": "five"})
+
+    assert cache.lookup("u", "please summarize my last 5 emails") == {"output": "five"}
+    assert cache.lookup("u", "please summarize my last 50 emails") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_entries_expire_after_ttl(make_backend, clock):
+    cache = LLMResponseCache(make_backend(ttl_seconds=60, clock=clock), embedder=bag_of_words)
+    cache.store("u", "hello", {"output": "hi"})
+
+    clock.now += 61
+
+    assert cache.lookup("u", "hello") is None
+
+
+def test_least_recently_used_entries_are_evicted(make_backend, clock):
+    cache = LLMResponseCache(make_backend(max_entries=2, clock=clock))
+    for prompt in ("a", "b"):
+        clock.now += 1
+        cache.store("u", prompt, prompt)
+    clock.now += 1
+    cache.lookup("u", "a")
+    clock.now += 1
+    cache.store("u", "c", "c")
+
+    assert cache.lookup("u", "a") == "a"
+    assert cache.lookup("u", "b") is None
+    assert cache.lookup("u", "c") == "c"
+
+
+@pytest.mark.asyncio
+async def test_read_only_commands_are_cached_per_user():
+    llm = FakeChatModel.from_responses([tool_call("fetch_emails", limit=3), "Three emails."])
+    # Without conversation memory, so the second command has no history.
+    service = AIService(llm=llm, response_cache=LLMResponseCache(InMemoryCacheBackend()), memory=None)
+    alice = RecordingGmailService("alice@example.com")
+
+    first = await service.interpret_command("summarize my last 3 emails", alice)
+    calls = llm.calls
+    second = await service.interpret_command("Summarize my last 3 emails", alice)
+
+    assert first["output"] == second["output"] == "Three emails."
+    assert llm.calls == calls
+    await service.interpret_command("summarize my last 3 emails", RecordingGmailService("bob@example.com"))
+    assert llm.calls > calls
+
+
+@pytest.mark.asyncio
+async def test_standalone_commands_are_cached_despite_history():
+    llm = FakeChatModel.from_responses(["Three emails."])
+    service = AIService(
+        llm=llm, response_cache=LLMResponseCache(InMemoryCacheBackend()),
+        memory=ConversationMemory(InMemoryConversationStore())
+    )
+    gmail_service = RecordingGmailService()
+
+    await service.interpret_command("what's new in my inbox today?", gmail_service)
+    await service.interpret_command("what's new in my inbox today?", gmail_service)
+
+    assert llm.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_follow_ups_are_cached_per_conversation_state():
+    llm = FakeChatModel.from_responses(["An answer."])
+    service = AIService(
+        llm=llm, response_cache=LLMResponseCache(InMemoryCacheBackend()),
+        memory=ConversationMemory(InMemoryConversationStore())
+    )
+    gmail_service = RecordingGmailService()
+
+    await service.interpret_command("who emailed me about the budget?", gmail_service)
+    await service.interpret_command("what did they say?", gmail_service)
+    calls = llm.calls
+    # The history now holds the first follow-up too, so it is answered afresh.
+    await service.interpret_command("what did they say?", gmail_service)
+
+    assert llm.calls == calls + 1
+
+
+@pytest.mark.asyncio
+async def test_side_effecting_commands_are_never_cached():
+    llm = FakeChatModel.from_responses([tool_call("send_email", to="x@example.com", subject="S", body="B"), "Sent."])
+    service = AIService(llm=llm, response_cache=LLMResponseCache(InMemoryCacheBackend()), memory=None)
+    gmail_service = RecordingGmailService()
+
+    # Phrased without "send" so only the tool-run guard applies.
+    await service.interpret_command("let x@example.com know I'm late", gmail_service)
+    await service.interpret_command("let x@example.com know I'm late", gmail_service)
+
+    assert len(gmail_service.sent) == 2
+    assert service.cache_stats()["uncacheable"] == 2
+    assert service.cache_stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_send_commands_bypass_lookup():
+    cache = LLMResponseCache(InMemoryCacheBackend(), embedder=bag_of_words, similarity_threshold=0.5)
+    llm = FakeChatModel.from_responses([tool_call("send_email", to="bob@example.com", subject="S", body="B"), "Sent."])
+    service = AIService(llm=llm, response_cache=cache)
+    gmail_service = RecordingGmailService()
+    cache.store("command:dummy@example.com", "emails to bob@example.com", {"output": "cached"})
+
+    result = await service.interpret_command("send emails to bob@example.com", gmail_service)
+
+    assert result["output"] == "Sent."
+    assert gmail_service.sent
+
+
+@pytest.mark.asyncio
+async def test_drafts_are_cached_per_user():
+    llm = FakeChatModel.from_responses(["SUBJECT: Meeting\n---\nLet's meet."])
+    service = AIService(llm=llm, response_cache=LLMResponseCache(InMemoryCacheBackend()))
+
+    first = await service.generate_draft("meeting request", user="a@example.com")
+    events = [event async for event in service.stream_draft("Meeting request", user="a@example.com")]
+
+    assert llm.calls == 1
+    assert events[-1] == {"event": "final", "data": first}
+    await service.generate_draft("meeting request", user="b@example.com")
+    assert llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_work_runs_off_the_event_loop(monkeypatch):
+    cache, threads = LLMResponseCache(InMemoryCacheBackend(), embedder=bag_of_words), []
+    for name in ("lookup", "store"):
+        def record(*args, _method=getattr(cache, name), **kwargs):
+            threads.append(threading.current_thread())
+            return _method(*args, **kwargs)
+        monkeypatch.setattr(cache, name, record)
+    service = AIService(llm=FakeChatModel.from_responses(["SUBJECT: Hi\n---\nHello."]), response_cache=cache)
+
+    await service.generate_draft("say hi", user="a@example.com")
+    await service.generate_draft("say hi", user="a@example.com")
+
+    assert len(threads) == 3 and threading.current_thread() not in threads
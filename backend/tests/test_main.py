@@ -28,8 +28,6 @@ def fake_get_current_user():
         }
     }
 
-app.dependency_overrides[get_current_user] = fake_get_current_user
-
 # Mock Gmail API service methods
 class MockGmailService:
     async def get_recent_emails(self, limit=10):
@@ -44,17 +42,16 @@ class MockGmailService:
             for i in range(1, limit + 1)
         ]
 
-    async def send_email(self, to, subject, body):
+    async def get_emails_page(self, page_size, page_token=None):
+        return {"emails": await MockGmailService.get_recent_emails(self, page_size), "nextPageToken": None}
+
+    async def send_email(self, to, subject, body, cc=None, bcc=None, attachments=()):
         return {"id": "dummy_message_id"}
 
 # Override GmailService initialization
 def mock_gmail_service_init(self, user_credentials):
     pass
 
-GmailService.__init__ = mock_gmail_service_init
-GmailService.get_recent_emails = MockGmailService.get_recent_emails
-GmailService.send_email = MockGmailService.send_email
-
 # Mock AI service
 class MockAIService:
     async def interpret_command(self, command, gmail_service):
@@ -66,8 +63,17 @@ class MockAIService:
 def mock_ai_service_init(self, *args, **kwargs):
     self.llm = MockAIService()
 
-AIService.__init__ = mock_ai_service_init
-AIService.interpret_command = MockAIService.interpret_command
+# Patch the services for the tests in this module only, so other test modules
+# can exercise the real implementations.
+@pytest.fixture(autouse=True)
+def mock_services(monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, fake_get_current_user)
+    monkeypatch.setattr(GmailService, "__init__", mock_gmail_service_init)
+    monkeypatch.setattr(GmailService, "get_recent_emails", MockGmailService.get_recent_emails)
+    monkeypatch.setattr(GmailService, "get_emails_page", MockGmailService.get_emails_page)
+    monkeypatch.setattr(GmailService, "send_email", MockGmailService.send_email)
+    monkeypatch.setattr(AIService, "__init__", mock_ai_service_init)
+    monkeypatch.setattr(AIService, "interpret_command", MockAIService.interpret_command)
 
 # Add health endpoint to the app
 @app.get("/health")
@@ -0,0 +1,105 @@
+import pytest
+
+from app.services.gmail_service import GmailService
+from conftest import make_user
+
+
+def requests_since(server, start):
+    return [path.split("?")[0] for _, path in server.request_log[start:]]
+
+
+@pytest.fixture
+def service(fake_gmail, message_store):
+    return GmailService(make_user(), message_store=message_store)
+
+
+@pytest.mark.asyncio
+async def test_repeat_reads_are_served_locally(fake_gmail, service):
+    first = await service.get_recent_emails(5)
+    mark = fake_gmail.round_trips
+
+    second = await service.get_recent_emails(5)
+
+    assert second == first
+    assert [email["id"] for email in first] == [m["id"] for m in fake_gmail.messages[:5]]
+    # Only the history delta check goes over the wire.
+    assert requests_since(fake_gmail, mark) == ["/gmail/v1/users/me/history"]
+
+
+@pytest.mark.asyncio
+async def test_new_messages_are_fetched_incrementally(fake_gmail, service):
+    await service.get_recent_emails(5)
+    new = fake_gmail.add_message(100)
+    mark = fake_gmail.round_trips
+
+    emails = await service.get_recent_emails(5)
+
+    assert emails[0]["id"] == new["id"]
+    assert [email["id"] for email in emails] == [m["id"] for m in fake_gmail.messages[:5]]
+    assert requests_since(fake_gmail, mark) == ["/gmail/v1/users/me/history", "/batch"]
+
+
+@pytest.mark.asyncio
+async def test_deletions_and_label_changes_are_applied(fake_gmail, service):
+    await service.get_recent_emails(5)
+    deleted, archived = fake_gmail.messages[0]["id"], fake_gmail.messages[1]["id"]
+    fake_gmail.delete_message(deleted)
+    fake_gmail.modify_labels(archived, remove=["INBOX"])
+    mark = fake_gmail.round_trips
+
+    emails = await service.get_recent_emails(3)
+
+    ids = [email["id"] for email in emails]
+    assert deleted not in ids and archived not in ids
+    assert ids == [m["id"] for m in fake_gmail.messages if "INBOX" in m["labelIds"]][:3]
+    assert requests_since(fake_gmail, mark) == ["/gmail/v1/users/me/history"]
+
+
+@pytest.mark.asyncio
+async def test_larger_limit_extends_the_cached_window(fake_gmail, service):
+    await service.get_recent_emails(5)
+    mark = fake_gmail.round_trips
+
+    emails = await service.get_recent_emails(10)
+
+    assert [email["id"] for email in emails] == [m["id"] for m in fake_gmail.messages[:10]]
+    # Only the five messages not cached yet are fetched.
+    assert requests_since(fake_gmail, mark) == [
+        "/gmail/v1/users/me/history", "/gmail/v1/users/me/messages", "/batch"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_small_inbox_is_fully_cached(fake_gmail, service):
+    fake_gmail.messages = fake_gmail.messages[:3]
+    await service.get_recent_emails(10)
+    mark = fake_gmail.round_trips
+
+    emails = await service.get_recent_emails(10)
+
+    assert len(emails) == 3
+    assert requests_since(fake_gmail, mark) == ["/gmail/v1/users/me/history"]
+
+
+@pytest.mark.asyncio
+async def test_expired_history_triggers_full_resync(fake_gmail, service, message_store):
+    await service.get_recent_emails(5)
+    fake_gmail.delete_message(fake_gmail.messages[0]["id"])
+    fake_gmail.expire_history()
+
+    emails = await service.get_recent_emails(5)
+
+    assert [email["id"] for email in emails] == [m["id"] for m in fake_gmail.messages[:5]]
+    assert message_store.get_sync_state("dummy@example.com")["history_id"] == fake_gmail.history_id
+
+
+@pytest.mark.asyncio
+async def test_users_are_isolated(fake_gmail, message_store):
+    alice = GmailService(make_user("alice@example.com"), message_store=message_store)
+    bob = GmailService(make_user("bob@example.com"), message_store=message_store)
+
+    await alice.get_recent_emails(5)
+
+    assert message_store.get_sync_state("bob@example.com") is None
+    assert message_store.recent("bob@example.com", 5) == []
+    assert len(await bob.get_recent_emails(5)) == 5
@@ -0,0 +1,96 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.outputs import LLMResult
+
+from app.api.deps import get_current_user
+from app.core.metrics import (
+    GMAIL_REQUEST_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    LLM_REQUEST_SECONDS,
+    LLM_TOKENS,
+    STAGE_SECONDS,
+    TOOL_SECONDS,
+    Histogram,
+)
+from app.main import app
+from app.services.ai_service import AIService
+from app.services.llm_metrics import MetricsCallbackHandler
+from conftest import RecordingGmailService, make_user
+from fake_llm import FakeChatModel, tool_call
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("path",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, 'a"b')
+
+    lines = histogram.render()
+
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert lines[2:] == [
+        'demo_seconds_bucket{path="a\\"b",le="0.1"} 1',
+        'demo_seconds_bucket{path="a\\"b",le="1"} 3',
+        'demo_seconds_bucket{path="a\\"b",le="+Inf"} 4',
+        'demo_seconds_sum{path="a\\"b"} 4.25',
+        'demo_seconds_count{path="a\\"b"} 4',
+    ]
+
+
+def test_requests_and_gmail_calls_are_timed(fake_gmail, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+    route = ("GET", "/api/v1/emails/recent", "200")
+    before = (
+        HTTP_REQUEST_SECONDS.count(*route),
+        GMAIL_REQUEST_SECONDS.count("gmail.users.messages.list", "ok"),
+        GMAIL_REQUEST_SECONDS.count("batch", "ok"),
+        STAGE_SECONDS.count("gmail_build"),
+    )
+
+    assert client.get("/api/v1/emails/recent", params={"limit": 3}).status_code == 200
+    assert client.get("/api/v1/emails/messages/missing").status_code == 404
+
+    assert HTTP_REQUEST_SECONDS.count(*route) == before[0] + 1
+    assert GMAIL_REQUEST_SECONDS.count("gmail.users.messages.list", "ok") == before[1] + 1
+    assert GMAIL_REQUEST_SECONDS.count("batch", "ok") == before[2] + 1
+    assert GMAIL_REQUEST_SECONDS.count("gmail.users.messages.get", "404") >= 1
+    assert STAGE_SECONDS.count("gmail_build") == before[3] + 1
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/emails/messages/{message_id}",status="404"}' in response.text
+    assert "# TYPE gmail_request_duration_seconds histogram" in response.text
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_and_tools_are_timed():
+    llm = FakeChatModel.from_responses([tool_call("fetch_emails", limit=2), "Two emails."], cycle=False)
+    service = AIService(llm=llm, response_cache=None, memory=None)
+    llm_calls = LLM_REQUEST_SECONDS.count("FakeChatModel", "ok")
+    tool_calls = TOOL_SECONDS.count("fetch_emails", "ok")
+
+    await service.interpret_command("anything new?", RecordingGmailService())
+    await service.interpret_command("show my last 1 email", RecordingGmailService())
+
+    after = LLM_REQUEST_SECONDS.count("FakeChatModel", "ok")
+    assert after == llm_calls + 2
+    # One tool call from the agent, one from the fast path.
+    assert TOOL_SECONDS.count("fetch_emails", "ok") == tool_calls + 2
+
+
+def test_token_usage_is_counted():
+    handler = MetricsCallbackHandler()
+    run_id = uuid.uuid4()
+    prompt = LLM_TOKENS.value("demo-model", "prompt")
+
+    handler.on_chat_model_start({}, [[]], run_id=run_id, invocation_params={"model_name": "demo-model"})
+    handler.on_llm_end(
+        LLMResult(generations=[], llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}}),
+        run_id=run_id
+    )
+
+    assert LLM_TOKENS.value("demo-model", "prompt") == prompt + 120
+    assert LLM_TOKENS.value("demo-model", "completion") >= 30
+    assert LLM_REQUEST_SECONDS.count("demo-model", "ok") >= 1
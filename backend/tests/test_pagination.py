@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.main import app
+from app.services import gmail_service
+from app.services.gmail_service import GmailService
+from conftest import make_user
+
+
+@pytest.fixture
+def client(fake_gmail, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    return TestClient(app)
+
+
+def test_page_tokens_walk_the_whole_inbox(fake_gmail, client):
+    seen, token = [], None
+    while True:
+        params = {"limit": 10, **({"page_token": token} if token else {})}
+        response = client.get("/api/v1/emails/recent", params=params)
+        assert response.status_code == 200
+        seen += [email["id"] for email in response.json()]
+        token = response.headers.get("X-Next-Page-Token")
+        if token is None:
+            break
+
+    assert seen == [m["id"] for m in fake_gmail.messages]
+
+
+def test_page_size_is_capped(fake_gmail, client, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_PAGE_MAX_SIZE", 7)
+
+    response = client.get("/api/v1/emails/recent", params={"limit": 500})
+
+    assert len(response.json()) == 7
+    assert response.headers["X-Next-Page-Token"] == "7"
+    assert client.get("/api/v1/emails/recent", params={"limit": 0}).status_code == 422
+
+
+def test_ndjson_streams_one_message_per_line(fake_gmail, client, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_BATCH_SIZE", 4)
+
+    response = client.get("/api/v1/emails/recent", params={"limit": 10, "format": "ndjson"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["X-Next-Page-Token"] == "10"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [m["id"] for m in fake_gmail.messages[:10]]
+    assert [path for _, path in fake_gmail.request_log].count("/batch") == 3
+
+    accept = client.get("/api/v1/emails/recent", params={"limit": 2}, headers={"Accept": "application/x-ndjson"})
+    assert len(accept.text.splitlines()) == 2
+
+
+@pytest.mark.asyncio
+async def test_pages_reuse_the_message_store(fake_gmail, message_store):
+    service = GmailService(make_user(), message_store=message_store)
+    await service.get_recent_emails(10)
+    batched = len(fake_gmail.batched_requests)
+
+    page = await service.get_emails_page(15)
+
+    # The first ten messages are cached; only the next five are fetched.
+    assert [email["id"] for email in page["emails"]] == [m["id"] for m in fake_gmail.messages[:15]]
+    assert len(fake_gmail.batched_requests) - batched == 5
+    assert page["emails"][:10] == await service.get_recent_emails(10)
+
+
+def test_first_page_comes_from_the_synced_store(fake_gmail, client, message_store, monkeypatch):
+    monkeypatch.setattr(gmail_service, "get_message_store", lambda: message_store)
+    client.get("/api/v1/emails/recent", params={"limit": 5})
+    reply = fake_gmail.add_message(100)
+    mark, batched = len(fake_gmail.request_log), len(fake_gmail.batched_requests)
+
+    for params in ({"limit": 5}, {"limit": 5, "format": "ndjson"}):
+        response = client.get("/api/v1/emails/recent", params=params)
+        ids = [json.loads(line)["id"] for line in response.text.splitlines()] if "format" in params else [
+            email["id"] for email in response.json()
+        ]
+        assert ids == [reply["id"]] + [m["id"] for m in fake_gmail.messages[1:5]]
+        assert response.headers["X-Next-Page-Token"] == "5"
+
+    # History deltas bring in the new message; nothing else is fetched again.
+    assert len(fake_gmail.batched_requests) - batched == 1
+    assert any("/history" in path for _, path in fake_gmail.request_log[mark:])
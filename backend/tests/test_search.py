@@ -0,0 +1,172 @@
+import sqlite3
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.main import app
+from app.services.ai_service import AIService
+from app.services.gmail_service import GmailService
+from app.services.search_index import SearchIndex, build_match_query, owner_token
+from app.services.tool_encoding import encode_tool_output
+from conftest import RecordingGmailService, make_user
+from fake_llm import FakeChatModel, tool_call
+
+
+def message(message_id, subject, sender="bob@example.com", snippet="", internal_date=0, **extra):
+    return {"id": message_id, "subject": subject, "sender": sender, "snippet": snippet,
+            "internalDate": internal_date, **extra}
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    yield index
+    index.close()
+
+
+def test_queries_are_quoted_for_fts5():
+    content = "{subject sender text} : "
+    assert build_match_query("invo budget") == f'{content}"invo"* AND {content}"budget"*'
+    assert build_match_query('"quarterly report" -draft') == f'{content}"quarterly report" NOT {content}"draft"*'
+    assert build_match_query("from:alice@example.com") == 'sender : "alice example com"*'
+    # Unknown prefixes and FTS5 operators are plain words.
+    assert build_match_query("re:budget OR NEAR(") == f'{content}"re budget"* AND {content}"OR"* AND {content}"NEAR"*'
+    assert build_match_query("-only !!") is None
+
+
+def test_search_matches_fields_and_ranks_subject_hits_first(index):
+    index.add("alice@example.com", [
+        message("m1", "Lunch", snippet="the invoice is attached", internal_date=2),
+        message("m2", "Invoice for March", sender="Billing <billing@shop.com>", internal_date=1),
+        message("m3", "Café opening", snippet="new menu", internal_date=3),
+    ])
+    index.add("bob@example.com", [message("b1", "Invoice", snippet="someone else's mail")])
+
+    assert [m["id"] for m in index.search("alice@example.com", "invoic")] == ["m2", "m1"]
+    assert [m["id"] for m in index.search("alice@example.com", "invoice -lunch")] == ["m2"]
+    assert [m["id"] for m in index.search("alice@example.com", "from:billing")] == ["m2"]
+    assert [m["id"] for m in index.search("alice@example.com", "cafe")] == ["m3"]
+    assert index.search("alice@example.com", "invoice")[1]["match"] == "the [invoice] is attached"
+    assert index.search("alice@example.com", "invoice", limit=1)[0]["id"] == "m2"
+
+    index.remove("alice@example.com", ["m2"])
+    assert [m["id"] for m in index.search("alice@example.com", "invoice")] == ["m1"]
+    assert index.count("alice@example.com") == 2
+
+
+def test_snippets_never_replace_an_indexed_body(index):
+    index.add("u", [message("m1", "Hello", snippet="short preview", body="<p>The full   budget</p> figures")])
+    index.add("u", [message("m1", "Hello", snippet="short preview")])
+
+    assert index.search("u", "figures")[0]["match"] == "The full budget [figures]"
+    assert index.search("u", "preview") == []
+
+
+def test_queries_only_match_the_users_own_rows(index):
+    index.add("alice@example.com", [message("a1", "Budget", snippet="numbers")])
+    index.add("bob@example.com", [message("b1", "Budget", snippet="numbers")])
+
+    assert [m["id"] for m in index.search("alice@example.com", "budget")] == ["a1"]
+    # The owner column is only reachable through the user, not through terms.
+    assert index.search("alice@example.com", owner_token("alice@example.com")) == []
+    assert index.search("carol@example.com", "budget") == []
+
+
+def test_indexes_without_owner_tokens_are_rebuilt(tmp_path):
+    path = str(tmp_path / "search.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE search_docs (user TEXT NOT NULL, id TEXT NOT NULL, UNIQUE (user, id))")
+    conn.execute("INSERT INTO search_docs VALUES ('u', 'm1')")
+    conn.commit()
+    conn.close()
+
+    index = SearchIndex(path)
+    assert index.count("u") == 0
+    index.add("u", [message("m1", "Hello")])
+    assert [m["id"] for m in index.search("u", "hello")] == ["m1"]
+    index.close()
+
+
+@pytest.mark.asyncio
+async def test_fetched_messages_are_indexed(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_INDEX_BACKFILL_MESSAGES", 0)
+    service = GmailService(make_user(), search_index=SearchIndex())
+
+    await service.get_recent_emails(5)
+    assert [m["id"] for m in await service.search_emails('subject:"Subject 23"')] == ["msg000023"]
+    assert await service.search_emails("subject:Subject 3") == []
+
+    # Opening a message indexes its body.
+    await service.get_email("msg000003")
+    result = await service.search_emails('"body of message 3"')
+    assert [m["id"] for m in result] == ["msg000003"]
+
+    start = await service.get_history_id()
+    fake_gmail.delete_message("msg000023")
+    await service.get_history_changes(start)
+    assert await service.search_emails('subject:"Subject 23"') == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_indexes_bodies_of_snippet_only_messages(fake_gmail, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_INDEX_BACKFILL_MESSAGES", 0)
+    service = GmailService(make_user(), search_index=SearchIndex())
+    await service.get_recent_emails(5)
+    assert await service.search_emails('"body of message 23"') == []
+
+    await service.index_mailbox(5)
+    assert [m["id"] for m in await service.search_emails('"body of message 23"')] == ["msg000023"]
+
+    # Messages indexed with their body are not fetched again.
+    mark = fake_gmail.round_trips
+    await service.index_mailbox(5)
+    assert fake_gmail.round_trips == mark + 1
+
+
+@pytest.mark.asyncio
+async def test_index_work_runs_off_the_event_loop(fake_gmail, monkeypatch):
+    index, threads = SearchIndex(), []
+    for name in ("count", "has_messages", "add", "search"):
+        def record(*args, _method=getattr(index, name), **kwargs):
+            threads.append(threading.current_thread())
+            return _method(*args, **kwargs)
+        monkeypatch.setattr(index, name, record)
+    service = GmailService(make_user(), search_index=index)
+
+    assert len(await service.search_emails("subject", limit=3)) == 3
+    assert len(threads) == 4 and threading.current_thread() not in threads
+
+
+def test_search_endpoint_backfills_an_empty_index(fake_gmail, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/emails/search", params={"q": 'subject:"Subject 7"'})
+    assert response.status_code == 200
+    assert [(m["id"], m["subject"]) for m in response.json()] == [("msg000007", "Subject 7")]
+
+    mark = fake_gmail.round_trips
+    response = client.get("/api/v1/emails/search", params={"q": "from:sender12", "limit": 5})
+    assert [m["id"] for m in response.json()] == ["msg000012"]
+    assert fake_gmail.round_trips == mark
+
+    assert client.get("/api/v1/emails/search", params={"q": ""}).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_agent_can_search_emails():
+    llm = FakeChatModel.from_responses([tool_call("search_emails", query="invoice", limit=3), "Found it."], cycle=False)
+    service = AIService(llm=llm, response_cache=None, memory=None)
+
+    result = await service.interpret_command("find the invoice email", RecordingGmailService())
+
+    action, observation = result["intermediate_steps"][0]
+    assert action.tool == "search_emails"
+    assert observation == {"emails": [{"from": "a@example.com", "subject": "About invoice", "snippet": "[invoice]"}]}
+    assert encode_tool_output("search_emails", observation, "compact") == (
+        "emails: 1 (id|from|subject|snippet)\n1|a@example.com|About invoice|[invoice]"
+    )
+    assert result["output"] == "Found it."
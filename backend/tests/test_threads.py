@@ -0,0 +1,118 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.main import app
+from app.services.gmail_service import GmailService
+from app.services.header_index import HeaderIndex
+from conftest import make_user
+
+
+def requests_since(server, start):
+    return [path.split("?")[0] for _, path in server.request_log[start:]]
+
+
+@pytest.fixture
+def service(fake_gmail, message_store):
+    return GmailService(make_user(), message_store=message_store, header_index=HeaderIndex())
+
+
+@pytest.mark.asyncio
+async def test_threads_group_messages_with_their_headers(fake_gmail, service):
+    page = await service.list_threads(3)
+
+    # 25 messages, three per thread, newest thread first.
+    assert [t["id"] for t in page["threads"]] == ["thread000008", "thread000007", "thread000006"]
+    thread = page["threads"][1]
+    assert thread["messageCount"] == 3
+    assert thread["subject"] == "Subject 21"
+    assert thread["participants"] == [f"Sender {i} <sender{i}@example.com>" for i in (21, 22, 23)]
+    assert thread["snippet"] == "Snippet for message 23 & more"
+    assert [path for _, path in fake_gmail.batched_requests] == [
+        path for _, path in fake_gmail.batched_requests if "/threads/" in path
+    ]
+    assert len(fake_gmail.batched_requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_page_tokens_walk_the_inbox_without_overlap(fake_gmail, service):
+    seen, token = [], None
+    while True:
+        page = await service.list_threads(4, token)
+        seen += [t["id"] for t in page["threads"]]
+        token = page["nextPageToken"]
+        if token is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 9
+    threads = [await service.get_thread(thread_id) for thread_id in seen]
+    assert sum(thread["messageCount"] for thread in threads) == 25
+
+
+@pytest.mark.asyncio
+async def test_unchanged_threads_are_served_from_the_index(fake_gmail, service):
+    await service.list_threads(5)
+    mark = fake_gmail.round_trips
+
+    await service.list_threads(5)
+    assert requests_since(fake_gmail, mark) == ["/gmail/v1/users/me/threads"]
+
+    # A reply only invalidates its own thread.
+    reply = fake_gmail.add_message(23)
+    batched = len(fake_gmail.batched_requests)
+    page = await service.list_threads(5)
+
+    assert [path.split("?")[0].rsplit("/", 1)[1] for _, path in fake_gmail.batched_requests[batched:]] == [
+        reply["threadId"]
+    ]
+    updated = next(t for t in page["threads"] if t["id"] == reply["threadId"])
+    assert updated["messageCount"] == 4
+
+
+@pytest.mark.asyncio
+async def test_thread_view_carries_threading_headers(fake_gmail, service):
+    await service.list_threads(2)
+    mark = fake_gmail.round_trips
+
+    thread = await service.get_thread("thread000007")
+
+    # Only the historyId check; the headers come from the index.
+    assert requests_since(fake_gmail, mark) == ["/gmail/v1/users/me/threads/thread000007"]
+    assert "format=minimal" in fake_gmail.request_log[-1][1]
+    first, second, third = thread["messages"]
+    assert (first["messageId"], first["references"]) == ("<msg21@example.com>", [])
+    assert second["references"] == ["<msg21@example.com>"]
+    assert third["references"] == ["<msg21@example.com>", "<msg22@example.com>"]
+    assert all(message["threadId"] == "thread000007" for message in thread["messages"])
+    assert "body" not in first
+
+
+@pytest.mark.asyncio
+async def test_thread_view_shows_replies_that_arrive_after_caching(fake_gmail, service):
+    await service.list_threads(5)
+    reply = fake_gmail.add_message(23)
+
+    thread = await service.get_thread(reply["threadId"])
+
+    assert thread["messageCount"] == 4
+    assert thread["messages"][-1]["id"] == reply["id"]
+    mark = fake_gmail.round_trips
+    assert (await service.get_thread(reply["threadId"]))["messageCount"] == 4
+    assert len(requests_since(fake_gmail, mark)) == 1
+
+
+def test_thread_endpoints(fake_gmail, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/emails/threads", params={"page_size": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["threads"]) == 2 and data["nextPageToken"]
+
+    response = client.get(f"/api/v1/emails/threads/{data['threads'][0]['id']}")
+    assert response.status_code == 200
+    assert response.json()["messages"][0]["subject"] == "Subject 24"
+
+    assert client.get("/api/v1/emails/threads/missing").status_code == 404
+    assert client.get("/api/v1/emails/threads", params={"page_size": 500}).status_code == 422
@@ -0,0 +1,106 @@
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+from app.services.credential_store import get_credential_store
+from app.services.gmail_service import GmailService
+from app.services.token_manager import TokenManager, token_manager
+from conftest import make_user
+
+
+@pytest.fixture
+def token_server(fake_gmail):
+    """Fake Gmail that rejects ``dummy_token`` until it has been refreshed."""
+    fake_gmail.valid_tokens = set()
+    return fake_gmail
+
+
+def user_for(server, email="dummy@example.com", **credentials):
+    user = make_user(email=email)
+    user["credentials"].update(token_uri=server.url + "token", **credentials)
+    return user
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_refresh(token_server):
+    service = GmailService(user_for(token_server))
+
+    emails = await asyncio.gather(*(service.get_email(f"msg{i:06d}") for i in range(1, 9)))
+
+    assert [email["id"] for email in emails] == [f"msg{i:06d}" for i in range(1, 9)]
+    assert token_server.token_refreshes == 1
+    assert token_manager.stats()["refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refreshed_token_outlives_the_request(token_server):
+    user = user_for(token_server)
+    await GmailService(user).get_email("msg000001")
+
+    # A later request builds a new service from the same (stale) JWT payload.
+    second = GmailService(user)
+    await second.get_email("msg000002")
+
+    assert second.credentials.token == "fresh-token-1"
+    assert token_server.token_refreshes == 1
+    assert token_server.unauthorized == 1
+
+
+@pytest.mark.asyncio
+async def test_refreshes_proactively_before_expiry(token_server):
+    expiry = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+    token_server.valid_tokens.add("dummy_token")
+    service = GmailService(user_for(token_server, expiry=expiry.isoformat()))
+
+    await service.get_email("msg000001")
+    await service.get_email("msg000002")
+
+    assert token_server.token_refreshes == 1
+    assert token_server.unauthorized == 0
+    assert service.credentials.expiry > datetime.datetime.utcnow() + datetime.timedelta(minutes=50)
+
+
+@pytest.mark.asyncio
+async def test_users_do_not_share_credentials(token_server):
+    alice = GmailService(user_for(token_server, email="alice@example.com", refresh_token="alice-refresh"))
+    bob = GmailService(user_for(token_server, email="bob@example.com", refresh_token="bob-refresh"))
+
+    await asyncio.gather(alice.get_email("msg000001"), bob.get_email("msg000001"))
+
+    assert alice.credentials is not bob.credentials
+    assert token_server.token_refreshes == 2
+
+
+@pytest.mark.asyncio
+async def test_refreshed_token_is_written_back_to_the_credential_store(token_server):
+    user = user_for(token_server)
+    credential_id = get_credential_store().put(user["email"], user["credentials"])
+    user["cid"] = credential_id
+
+    await GmailService(user).get_email("msg000001")
+
+    assert get_credential_store().get(credential_id)["token"] == "fresh-token-1"
+
+
+def test_coalesces_refresh_racing_a_completed_one():
+    class FakeCredentials:
+        token = "old"
+        refreshed_at = None
+        expiry = None
+
+        def __init__(self):
+            self._refresh_lock = threading.Lock()
+
+        def _refresh_now(self, request):
+            self.token = "new"
+
+    manager = TokenManager()
+    credentials = FakeCredentials()
+    manager.refresh(credentials, None)
+    # A request that failed with the old token but reached refresh afterwards.
+    manager.refresh(credentials, None)
+
+    assert manager.stats()["refreshes"] == 1
+    assert manager.stats()["coalesced"] == 1
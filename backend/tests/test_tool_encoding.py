@@ -0,0 +1,66 @@
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.tool_encoding import (
+    encode_email_table,
+    encode_tool_output,
+    estimate_tokens,
+    normalize_sender,
+    truncate_to_tokens,
+)
+from conftest import RecordingGmailService
+from fake_llm import FakeChatModel, tool_call
+
+EMAILS = {"emails": [
+    {"from": "Alice Smith <Alice@Example.com>", "subject": "Lunch | Friday", "snippet": "See you at noon " * 20},
+    {"from": "noreply", "subject": "Your\nreceipt", "snippet": "Thanks!"},
+]}
+
+
+def test_senders_are_reduced_to_their_address():
+    assert normalize_sender("Alice Smith <Alice@Example.com>") == "alice@example.com"
+    assert normalize_sender("bob@example.com") == "bob@example.com"
+    assert normalize_sender("Mailer Daemon") == "Mailer Daemon"
+
+
+def test_snippets_are_cut_at_a_word_boundary():
+    text = "word " * 100
+    cut = truncate_to_tokens(text, 10)
+
+    assert estimate_tokens(cut) <= 11
+    assert cut.endswith("word…")
+    assert truncate_to_tokens("short", 10) == "short"
+
+
+def test_email_lists_become_a_numbered_table():
+    table = encode_email_table(EMAILS["emails"], snippet_tokens=8)
+
+    header, first, second = table.splitlines()
+    assert header == "emails: 2 (id|from|subject|snippet)"
+    assert first.startswith("1|alice@example.com|Lunch / Friday|See you at noon")
+    assert first.endswith("…")
+    assert second == "2|noreply|Your receipt|Thanks!"
+    assert encode_email_table([]) == "emails: 0"
+
+
+def test_compact_output_is_smaller_than_json(monkeypatch):
+    compact = encode_tool_output("fetch_emails", EMAILS, "compact")
+    verbose = encode_tool_output("fetch_emails", EMAILS, "json")
+
+    assert estimate_tokens(compact) < estimate_tokens(verbose) / 2
+    assert encode_tool_output("send_email", "Email sent", "compact") == "Email sent"
+    assert encode_tool_output("other", {"a": 1}, "compact") == '{"a":1}'
+
+
+@pytest.mark.asyncio
+async def test_agent_sees_the_encoded_tool_output(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_OUTPUT_FORMAT", "compact")
+    llm = FakeChatModel.from_responses([tool_call("fetch_emails", limit=2), "Two emails."], cycle=False)
+    service = AIService(llm=llm, response_cache=None, memory=None)
+
+    await service.interpret_command("anything from a@example.com?", RecordingGmailService())
+
+    tool_message = llm.prompts[1][-1]
+    assert tool_message.type == "tool"
+    assert tool_message.content.splitlines()[1] == "1|a@example.com|Hello dummy@example.com|hi"
@@ -0,0 +1,106 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_ai_service, get_current_user
+from app.main import app
+from app.services.ai_service import AIService
+from app.services.email_triage import EmailTriage, parse_triage
+from app.services.llm_cache import InMemoryCacheBackend
+from conftest import make_user
+from fake_llm import FunctionChatModel, triage_reply
+
+
+def make_emails(count: int, start: int = 0):
+    return [
+        {"id": f"m{i}", "subject": f"Urgent: item {i}" if i % 5 == 0 else f"Item {i}",
+         "sender": f"Sender {i} <s{i}@example.com>", "snippet": f"snippet {i}"}
+        for i in range(start, start + count)
+    ]
+
+
+def make_triage(llm, **kwargs) -> EmailTriage:
+    service = AIService(llm=llm, response_cache=None, memory=None)
+    triage = service.email_triage
+    for name, value in kwargs.items():
+        setattr(triage, name, value)
+    return triage
+
+
+def test_triage_replies_are_parsed_per_row():
+    reply = "1|High|Work|Budget due Friday\n2 | low | Unknown | Weekly digest\n3|urgent|work|bad\n9|low|work|out of range\nnoise"
+
+    assert parse_triage(reply, 3) == {
+        1: {"priority": "high", "category": "work", "summary": "Budget due Friday"},
+        2: {"priority": "low", "category": "other", "summary": "Weekly digest"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_emails_are_packed_into_batches():
+    llm = FunctionChatModel(respond=triage_reply)
+    triage = make_triage(llm, batch_size=10, cache=None)
+
+    results = await triage.triage(make_emails(25), user="alice")
+
+    assert llm.calls == 3
+    assert [email["id"] for email in results] == [f"m{i}" for i in range(25)]
+    assert results[5]["priority"] == "high" and results[6]["priority"] == "low"
+    assert results[6]["summary"] == "Summary of Item 6"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_capped():
+    llm = FunctionChatModel(respond=triage_reply, latency=0.05)
+    triage = make_triage(llm, batch_size=2, concurrency=3, cache=None)
+
+    await triage.triage(make_emails(20), user="alice")
+
+    assert llm.calls == 10
+    assert 1 < llm.max_active <= 3
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_per_user_and_message():
+    llm = FunctionChatModel(respond=triage_reply)
+    triage = make_triage(llm, batch_size=10, cache=InMemoryCacheBackend(ttl_seconds=60))
+
+    first = await triage.triage(make_emails(10), user="alice")
+    assert llm.calls == 1
+
+    again = await triage.triage(make_emails(1, start=10) + make_emails(10), user="alice")
+    assert again[1:] == first
+    assert llm.calls == 2 and triage.stats()["cached"] == 10
+
+    await triage.triage(make_emails(10), user="bob")
+    assert llm.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_unanswered_emails_are_left_blank_and_retried():
+    # Only the unanswered email goes into the second call.
+    replies = iter(["1|low|work|First only", "1|high|finance|Second"])
+    llm = FunctionChatModel(respond=lambda messages: next(replies))
+    triage = make_triage(llm, batch_size=10, cache=InMemoryCacheBackend(ttl_seconds=60))
+
+    first = await triage.triage(make_emails(2), user="alice")
+    assert first[1]["priority"] is None
+
+    second = await triage.triage(make_emails(2), user="alice")
+    assert second[1]["priority"] == "high"
+    assert llm.calls == 2
+
+
+def test_triage_endpoint(fake_gmail, monkeypatch):
+    ai_service = AIService(llm=FunctionChatModel(respond=triage_reply), response_cache=None, memory=None)
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, make_user)
+    monkeypatch.setitem(app.dependency_overrides, get_ai_service, lambda: ai_service)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/emails/triage", json={"limit": 12})
+
+    assert response.status_code == 200
+    emails = response.json()
+    assert [email["id"] for email in emails] == [m["id"] for m in fake_gmail.messages[:12]]
+    assert all(email["priority"] in ("high", "low") and email["category"] == "work" for email in emails)
+    assert client.post("/api/v1/emails/triage", json={"limit": 1000}).status_code == 422
+    assert len(client.post("/api/v1/emails/triage").json()) == 20
@@ -0,0 +1,152 @@
+import threading
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services import vector_index as vector_index_module
+from app.services.ai_service import AIService
+from app.services.gmail_service import GmailService
+from app.services.vector_index import HashingEmbedder, VectorIndex
+from conftest import RecordingGmailService, make_user
+from fake_llm import FakeChatModel, tool_call
+
+INBOX = [
+    {"id": "m1", "subject": "Deposit return", "sender": "Landlord <jim@rent.example>",
+     "snippet": "I will return your deposit after the inspection of the flat"},
+    {"id": "m2", "subject": "Team lunch", "sender": "bob@work.example", "snippet": "pizza on friday at noon"},
+    {"id": "m3", "subject": "Invoice 42", "sender": "billing@shop.example", "snippet": "your invoice is due next week"},
+    {"id": "m4", "subject": "Flight booked", "sender": "travel@air.example", "snippet": "your flight to lisbon is confirmed"},
+]
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed_many(["The landlord kept the deposit", ""])
+
+    assert first.shape == (2, 64) and first.dtype == np.float32
+    assert np.allclose(first, HashingEmbedder(dim=64).embed_many(["The landlord kept the deposit", ""]))
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    assert not first[1].any()
+    # Stopwords and plurals do not change the vector.
+    assert np.allclose(embedder.embed_query("deposits"), embedder.embed_query("the deposit"))
+
+
+def test_questions_retrieve_the_related_message():
+    index = VectorIndex()
+    index.add("alice", INBOX)
+
+    results = index.search("alice", "what did the landlord say about the deposit?", k=2)
+    assert results[0]["id"] == "m1"
+    assert results[0]["subject"] == "Deposit return"
+    assert 0 < results[0]["score"] <= 1
+    assert [r["id"] for r in index.search("alice", "when is my flight", k=1)] == ["m4"]
+    assert index.search("bob", "deposit") == []
+
+
+def test_updates_are_incremental_and_rows_are_reused():
+    index = VectorIndex()
+    assert index.add("alice", INBOX) == 4
+    assert index.add("alice", INBOX) == 0
+    assert index.add("alice", [{**INBOX[1], "snippet": "lunch moved to the ramen place"}]) == 1
+    assert index.search("alice", "ramen", k=1)[0]["id"] == "m2"
+
+    index.remove("alice", ["m1"])
+    assert index.count("alice") == 3
+    assert all(r["id"] != "m1" for r in index.search("alice", "landlord deposit"))
+    index.add("alice", [{"id": "m5", "subject": "Parking permit", "snippet": "renew your parking permit"}])
+    assert index.has_messages("alice", ["m1", "m5"]) == {"m5"}
+    assert len(index._user("alice").ids) == 4
+
+
+def test_memmap_matrix_grows_and_persists(tmp_path):
+    index = VectorIndex(directory=str(tmp_path), initial_capacity=2)
+    index.add("alice", INBOX)
+    assert isinstance(index._user("alice").matrix, np.memmap)
+    assert len(index._user("alice").matrix) == 4
+    index.close()
+
+    reopened = VectorIndex(directory=str(tmp_path), initial_capacity=2)
+    assert reopened.count("alice") == 4
+    assert reopened.search("alice", "invoice due", k=1)[0]["id"] == "m3"
+    assert reopened.add("alice", INBOX) == 0
+    reopened.close()
+
+
+def test_batched_blocked_search_matches_single_queries(monkeypatch):
+    index = VectorIndex()
+    messages = [{"id": f"m{i}", "subject": f"topic{i % 7} report", "snippet": f"word{i} detail{i % 3}"} for i in range(40)]
+    index.add("alice", messages)
+    queries = ["topic3 report", "detail1 word10", "topic5"]
+    expected = [[r["score"] for r in index.search("alice", query, k=4)] for query in queries]
+
+    monkeypatch.setattr(vector_index_module, "SEARCH_BLOCK_ROWS", 3)
+    batched = index.search_many("alice", queries, k=4)
+    assert [[r["score"] for r in results] for results in batched] == expected
+    assert batched[1][0]["id"] == "m10"
+
+
+class ListEmbedder(Embeddings):
+    """Any LangChain embeddings, returning plain unnormalized lists."""
+
+    def embed_documents(self, texts):
+        return [[float("invoice" in t.lower()) * 3, float("lunch" in t.lower()) * 2, 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_any_langchain_embeddings_can_be_plugged_in():
+    index = VectorIndex(embedder=ListEmbedder())
+    assert index.dim == 3
+    index.add("alice", INBOX)
+    assert index.search("alice", "invoice", k=1)[0]["id"] == "m3"
+
+
+@pytest.mark.asyncio
+async def test_synced_messages_are_embedded_incrementally(fake_gmail):
+    service = GmailService(make_user(), vector_index=VectorIndex())
+
+    results = await service.find_relevant_emails("Subject 7", 3)
+    assert results[0]["id"] == "msg000007"
+    assert service.vector_index.count(service.user_email) == 25
+
+    start = await service.get_history_id()
+    fake_gmail.add_message(40)
+    fake_gmail.delete_message("msg000007")
+    await service.get_history_changes(start)
+
+    assert service.vector_index.count(service.user_email) == 25
+    assert (await service.find_relevant_emails("Subject 40", 1))[0]["id"] == "msg000040"
+    assert all(r["id"] != "msg000007" for r in await service.find_relevant_emails("Subject 7", 5))
+
+
+@pytest.mark.asyncio
+async def test_embedding_and_search_run_off_the_event_loop(fake_gmail, monkeypatch):
+    index, threads = VectorIndex(), []
+    for name in ("add", "search"):
+        def record(*args, _method=getattr(index, name), **kwargs):
+            threads.append(threading.current_thread())
+            return _method(*args, **kwargs)
+        monkeypatch.setattr(index, name, record)
+    service = GmailService(make_user(), vector_index=index)
+
+    await service.get_recent_emails(3)
+    assert (await service.find_relevant_emails("Subject 25", 1))[0]["id"] == "msg000025"
+    assert len(threads) == 2 and threading.current_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_agent_answers_from_retrieved_emails():
+    llm = FakeChatModel.from_responses(
+        [tool_call("find_relevant_emails", question="what did the landlord say about the deposit?"), "After the inspection."],
+        cycle=False
+    )
+    service = AIService(llm=llm, response_cache=None, memory=None)
+
+    result = await service.interpret_command("what did the landlord say about the deposit?", RecordingGmailService())
+
+    action, observation = result["intermediate_steps"][0]
+    assert action.tool == "find_relevant_emails"
+    assert observation["emails"][0]["from"] == "landlord@example.com"
+    assert result["output"] == "After the inspection."